@@ -0,0 +1,21 @@
+import sys
+
+from utils.batch_utils import print_batch_summary, run_batch, run_registry_batch
+from utils.config_utils import load_registry
+
+gbp_to_usd_rate=1.232204 # https://www.oanda.com/lang/es/fx-for-business/historical-rates, None for the monthly average of exchange_rates.csv
+hourly_rate = 1 # In GBP, for the people without a 'pay_rate'
+
+if __name__ == '__main__':
+    registry = load_registry('config.json') # People and companies, config.example.json until config.json is created
+    # Files or glob patterns can be given on the command line, e.g. python batch_generator.py "0-RawData/*_2022.csv",
+    # otherwise every raw file of every person is processed
+    files = sys.argv[1:]
+    if files:
+        employee_data = registry.get_person()
+        results = run_batch(files,registry.companies,employee_data,employee_data.get('pay_rate',hourly_rate),gbp_to_usd_rate)
+    else:
+        results = run_registry_batch(registry,hourly_rate,gbp_to_usd_rate)
+    print_batch_summary(results)
+    if any(result['error'] is not None for result in results):
+        sys.exit(1)
@@ -0,0 +1,72 @@
+"""
+Benchmark of the WorklogAnalytics aggregates on synthetic shift histories of increasing size.
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_hour_report_pdf import get_synthetic_hour_report_frame
+from utils.analytics_utils import WorklogAnalytics
+from utils.shift_utils import ShiftStore
+
+SIZES = [10_000, 100_000, 1_000_000]
+N_COMPANIES = 50
+
+def get_synthetic_analytics(n_rows,seed=0):
+    """
+    Build a WorklogAnalytics object from a synthetic export spread over several years and companies.
+
+    Parameters:
+    - n_rows (int): Number of shifts.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    - WorklogAnalytics: The shifts.
+    """
+    df,_ = get_synthetic_hour_report_frame(min(n_rows,10_000),drop_date_from_beginning_end=False)
+    store = ShiftStore.from_frame(df)
+    rng = np.random.default_rng(seed)
+    # Repeat the month and move every copy to a random month of the last three years
+    positions = rng.integers(0,len(store),n_rows)
+    store = store[positions]
+    store.days = store.days-rng.integers(0,36,n_rows).astype(np.int32)*30
+    companies = np.array([f'Company{i}' for i in range(N_COMPANIES)],dtype=object)[rng.integers(0,N_COMPANIES,n_rows)]
+    return WorklogAnalytics(store,companies)
+
+def bench_analytics(n_rows,repeat=3):
+    """
+    Time the hours by week, weekday, hour of day, company and keyword of a synthetic history.
+
+    Parameters:
+    - n_rows (int): Number of shifts.
+    - repeat (int): Number of timed runs, the best one is reported.
+
+    Returns:
+    - float: Best wall time in seconds for all five aggregates.
+    """
+    analytics = get_synthetic_analytics(n_rows)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        analytics.hours_by_week()
+        analytics.hours_by_weekday()
+        analytics.hours_by_hour_of_day()
+        analytics.hours_by_company()
+        analytics.hours_by_keyword()
+        timings.append(time.perf_counter()-start)
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes',type=int,nargs='+',default=SIZES)
+    parser.add_argument('--repeat',type=int,default=3)
+    args = parser.parse_args()
+
+    print(f'{"rows":>10} {"seconds":>10} {"rows/s":>12}')
+    for n_rows in args.sizes:
+        seconds = bench_analytics(n_rows,args.repeat)
+        print(f'{n_rows:>10} {seconds:>10.3f} {n_rows/seconds:>12,.0f}')
@@ -0,0 +1,53 @@
+"""
+Benchmark of extract_worked_hour_as_df on synthetic exports of increasing size.
+
+Run from the repository root:
+    python -m benchmarks.bench_extract_worked_hours
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_worklog import write_synthetic_export
+from utils import invoice_utils
+
+SIZES = [1_000, 100_000, 1_000_000]
+
+def bench_extract_worked_hours(n_rows,repeat=3,language='German'):
+    """
+    Time extract_worked_hour_as_df on a synthetic export.
+
+    Parameters:
+    - n_rows (int): Number of shift rows in the export.
+    - repeat (int): Number of timed runs, the best one is reported.
+    - language (str): Language of the export. Default is 'German'.
+
+    Returns:
+    - float: Best wall time in seconds.
+    """
+    with tempfile.TemporaryDirectory() as raw_directory:
+        write_synthetic_export(os.path.join(raw_directory,'Bench_062022.csv'),n_rows,language=language)
+        raw_directory_before = invoice_utils.RAW_DIRECTORY
+        invoice_utils.RAW_DIRECTORY = raw_directory
+        try:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                invoice_utils.extract_worked_hour_as_df(6,2022,'Bench',cache=False)
+                timings.append(time.perf_counter()-start)
+        finally:
+            invoice_utils.RAW_DIRECTORY = raw_directory_before
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes',type=int,nargs='+',default=SIZES)
+    parser.add_argument('--repeat',type=int,default=3)
+    parser.add_argument('--language',default='German',choices=['German','English','Spanish'])
+    args = parser.parse_args()
+
+    print(f'{"rows":>10} {"seconds":>10} {"rows/s":>12}')
+    for n_rows in args.sizes:
+        seconds = bench_extract_worked_hours(n_rows,args.repeat,args.language)
+        print(f'{n_rows:>10} {seconds:>10.3f} {n_rows/seconds:>12,.0f}')
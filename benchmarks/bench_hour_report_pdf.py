@@ -0,0 +1,73 @@
+"""
+Benchmark of generate_and_save_pdf on hour reports of increasing length.
+
+Run from the repository root:
+    python -m benchmarks.bench_hour_report_pdf
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.synthetic_worklog import generate_synthetic_export
+from utils import invoice_utils
+
+SIZES = [100, 1_000, 10_000]
+COMPANY_DATA = {'name':'Bench'}
+EMPLOYEE_DATA = {'name':'Bench Name','initials':'BN','position':'Bench position','email':'bench@company.com'}
+
+def get_synthetic_hour_report_frame(n_rows,drop_date_from_beginning_end=True):
+    """
+    Build the DataFrame passed to generate_and_save_pdf from a synthetic export.
+
+    Parameters:
+    - n_rows (int): Number of shift rows.
+    - drop_date_from_beginning_end (bool): Whether to render 'Begin' and 'End' as "HH:MM" strings, as
+      extract_worked_hour_as_df does. Default is True.
+
+    Returns:
+    - df (pd.DataFrame): DataFrame with the worked hours.
+    - total_hours (str): The total hours worked in "HH:MM" format.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.csv') as f:
+        generate_synthetic_export(n_rows).to_csv(f.name,index=False)
+        df,total_hours = invoice_utils.parse_worked_hour_file(f.name,2022)
+    if drop_date_from_beginning_end:
+        df['Begin'] = invoice_utils.get_hhmm_from_datetimes(df['Begin'],df['Date'])
+        df['End'] = invoice_utils.get_hhmm_from_datetimes(df['End'],df['Date'])
+    return df,total_hours
+
+def bench_hour_report_pdf(n_rows,repeat=3):
+    """
+    Time generate_and_save_pdf on a synthetic month.
+
+    Parameters:
+    - n_rows (int): Number of shift rows in the report.
+    - repeat (int): Number of timed runs, the best one is reported.
+
+    Returns:
+    - float: Best wall time in seconds.
+    """
+    df,total_hours = get_synthetic_hour_report_frame(n_rows)
+    with tempfile.TemporaryDirectory() as output_directory:
+        output_directory_before = invoice_utils.PROCESSED_HOURS_DIRECTORY
+        invoice_utils.PROCESSED_HOURS_DIRECTORY = output_directory
+        try:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                invoice_utils.generate_and_save_pdf(df,6,2022,total_hours,COMPANY_DATA,EMPLOYEE_DATA)
+                timings.append(time.perf_counter()-start)
+        finally:
+            invoice_utils.PROCESSED_HOURS_DIRECTORY = output_directory_before
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes',type=int,nargs='+',default=SIZES)
+    parser.add_argument('--repeat',type=int,default=3)
+    args = parser.parse_args()
+
+    print(f'{"rows":>10} {"seconds":>10} {"rows/s":>12}')
+    for n_rows in args.sizes:
+        seconds = bench_hour_report_pdf(n_rows,args.repeat)
+        print(f'{n_rows:>10} {seconds:>10.3f} {n_rows/seconds:>12,.0f}')
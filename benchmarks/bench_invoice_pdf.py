@@ -0,0 +1,53 @@
+"""
+Benchmark of generate_invoice, from the raw export to the invoice PDF, on synthetic months of increasing size.
+
+Run from the repository root:
+    python -m benchmarks.bench_invoice_pdf
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_pdf_templates import COMPANY_DATA, EMPLOYEE_DATA
+from benchmarks.synthetic_worklog import write_synthetic_export
+from utils import cache_utils, invoice_utils
+
+SIZES = [100, 10_000]
+
+def bench_invoice_pdf(n_rows,repeat=3):
+    """
+    Time generate_invoice on a synthetic export, with an empty parse cache for every run.
+
+    Parameters:
+    - n_rows (int): Number of shift rows in the export.
+    - repeat (int): Number of timed runs, the best one is reported.
+
+    Returns:
+    - float: Best wall time in seconds.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic_export(os.path.join(directory,f'{COMPANY_DATA["name"]}_062022.csv'),n_rows)
+        directories_before = invoice_utils.PROCESSED_DIRECTORY,cache_utils.CACHE_DIRECTORY
+        invoice_utils.PROCESSED_DIRECTORY = directory
+        try:
+            timings = []
+            for i in range(repeat):
+                cache_utils.CACHE_DIRECTORY = os.path.join(directory,f'cache{i}')
+                start = time.perf_counter()
+                invoice_utils.generate_invoice(6,2022,1.25,1.,COMPANY_DATA,EMPLOYEE_DATA,raw_directory=directory)
+                timings.append(time.perf_counter()-start)
+        finally:
+            invoice_utils.PROCESSED_DIRECTORY,cache_utils.CACHE_DIRECTORY = directories_before
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes',type=int,nargs='+',default=SIZES)
+    parser.add_argument('--repeat',type=int,default=3)
+    args = parser.parse_args()
+
+    print(f'{"rows":>10} {"seconds":>10} {"rows/s":>12}')
+    for n_rows in args.sizes:
+        seconds = bench_invoice_pdf(n_rows,args.repeat)
+        print(f'{n_rows:>10} {seconds:>10.3f} {n_rows/seconds:>12,.0f}')
@@ -0,0 +1,68 @@
+"""
+Benchmark of hour report and invoice PDFs per second, with the static layout rebuilt for every document
+(as before the templates) and with the cached templates.
+
+Run from the repository root:
+    python -m benchmarks.bench_pdf_templates
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_hour_report_pdf import get_synthetic_hour_report_frame
+from utils import invoice_utils
+
+COMPANY_DATA = {'name':'Bench','street':'Building Street','street_cont':'123 Street','city':'Company city','postcode':'12345'}
+EMPLOYEE_DATA = {'name':'Bench Name','initials':'BN','position':'Bench position','email':'bench@company.com',
+                 'street':'My Street 123','city':'MyCity','state':'MyState','postcode':'12345','country':'My Country',
+                 'phone':'+123 456 789','bank_name':'My Bank','bank_address':'1234 Bank Street','holder_name':'Holder Name',
+                 'swift':'ABCDEF12','routing_nb':'123456789','account_nb':'12345679012'}
+
+def bench_documents(n_documents,n_rows,reuse_templates):
+    """
+    Time the generation of hour reports and invoices for the same company and employee.
+
+    Parameters:
+    - n_documents (int): Number of hour reports and of invoices to generate.
+    - n_rows (int): Number of shift rows in every hour report.
+    - reuse_templates (bool): Whether to keep the cached templates between documents.
+
+    Returns:
+    - tuple: (hour reports per second, invoices per second).
+    """
+    df,total_hours = get_synthetic_hour_report_frame(n_rows)
+    invoice_df = pd.DataFrame([['67','Work hours','£ 1.00','£ 67.00']],columns=['QTY','DESCRIPTION','UNIT PRICE','AMOUNT'])
+    with tempfile.TemporaryDirectory() as output_directory:
+        directories_before = invoice_utils.PROCESSED_HOURS_DIRECTORY,invoice_utils.PROCESSED_DIRECTORY
+        invoice_utils.PROCESSED_HOURS_DIRECTORY = invoice_utils.PROCESSED_DIRECTORY = output_directory
+        try:
+            invoice_utils._get_template.cache_clear()
+            start = time.perf_counter()
+            for _ in range(n_documents):
+                if not reuse_templates:
+                    invoice_utils._get_template.cache_clear()
+                invoice_utils.generate_and_save_pdf(df,6,2022,total_hours,COMPANY_DATA,EMPLOYEE_DATA)
+            hour_reports_per_second = n_documents/(time.perf_counter()-start)
+
+            start = time.perf_counter()
+            for _ in range(n_documents):
+                if not reuse_templates:
+                    invoice_utils._get_template.cache_clear()
+                invoice_utils.generate_table_and_save_pdf(invoice_df,6,2022,1.2,80.,COMPANY_DATA,EMPLOYEE_DATA)
+            invoices_per_second = n_documents/(time.perf_counter()-start)
+        finally:
+            invoice_utils.PROCESSED_HOURS_DIRECTORY,invoice_utils.PROCESSED_DIRECTORY = directories_before
+    return hour_reports_per_second,invoices_per_second
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents',type=int,default=200)
+    parser.add_argument('--rows',type=int,default=60,help='Shift rows per hour report')
+    args = parser.parse_args()
+
+    print(f'{"layout":>10} {"hour reports/s":>15} {"invoices/s":>12}')
+    for label,reuse_templates in [('rebuilt',False),('template',True)]:
+        hour_reports_per_second,invoices_per_second = bench_documents(args.documents,args.rows,reuse_templates)
+        print(f'{label:>10} {hour_reports_per_second:>15,.1f} {invoices_per_second:>12,.1f}')
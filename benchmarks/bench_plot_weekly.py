@@ -0,0 +1,50 @@
+"""
+Benchmark of the weekly hour distribution plot, drawn and rendered to PNG headless, on months of increasing size.
+
+Run from the repository root:
+    python -m benchmarks.bench_plot_weekly
+"""
+import argparse
+import io
+import time
+
+from benchmarks.bench_hour_report_pdf import get_synthetic_hour_report_frame
+from utils import invoice_utils
+
+SIZES = [100, 1_000, 10_000]
+
+def bench_plot_weekly(n_rows,repeat=3):
+    """
+    Time draw_weekly_hour_distribution plus the PNG rendering of the figure on a synthetic month.
+
+    Parameters:
+    - n_rows (int): Number of shifts in the month.
+    - repeat (int): Number of timed runs, the best one is reported.
+
+    Returns:
+    - float: Best wall time in seconds.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    df,_ = get_synthetic_hour_report_frame(n_rows,drop_date_from_beginning_end=False)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = Figure(figsize=(18, 9))
+        FigureCanvasAgg(fig)
+        invoice_utils.draw_weekly_hour_distribution(fig,df)
+        fig.savefig(io.BytesIO(),format='png')
+        timings.append(time.perf_counter()-start)
+    return min(timings)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes',type=int,nargs='+',default=SIZES)
+    parser.add_argument('--repeat',type=int,default=3)
+    args = parser.parse_args()
+
+    print(f'{"rows":>10} {"seconds":>10} {"rows/s":>12}')
+    for n_rows in args.sizes:
+        seconds = bench_plot_weekly(n_rows,args.repeat)
+        print(f'{n_rows:>10} {seconds:>10.3f} {n_rows/seconds:>12,.0f}')
@@ -0,0 +1,46 @@
+"""
+Benchmark of the cold start of the generators: import time of utils.invoice_utils with fpdf and matplotlib imported
+eagerly (as before they became lazy) and lazily, measured with python -X importtime in fresh interpreters.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+CASES = {'eager (before)':'import utils.invoice_utils, matplotlib.pyplot, matplotlib.dates, fpdf',
+         'lazy, parsing only':'import utils.invoice_utils',
+         'lazy, invoice PDF':'import utils.invoice_utils, utils.pdf_utils'}
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$')
+
+def get_import_time(statement):
+    """
+    Run a statement in a fresh interpreter and sum the cumulative import time of its top-level imports.
+
+    Parameters:
+    - statement (str): The import statement.
+
+    Returns:
+    - float: The import time in seconds.
+    """
+    stderr = subprocess.run([sys.executable,'-X','importtime','-c',statement],
+                            capture_output=True,text=True,check=True).stderr
+    microseconds = 0
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        # Top-level imports are not indented, nested ones are counted in their cumulative time
+        if match and match[2]=='':
+            microseconds += int(match[1])
+    return microseconds/1e6
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat',type=int,default=5)
+    args = parser.parse_args()
+
+    print(f'{"case":>20} {"import seconds":>15}')
+    for label,statement in CASES.items():
+        seconds = min(get_import_time(statement) for _ in range(args.repeat))
+        print(f'{label:>20} {seconds:>15.3f}')
@@ -0,0 +1,142 @@
+"""
+Run every benchmark at several sizes and compare the timings with a stored baseline.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks                   # compare with benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --save-baseline   # store the current timings as the baseline
+    python -m benchmarks.run_benchmarks --quick           # smallest sizes only
+
+Timings depend on the machine, so the baseline is only meaningful on the machine that recorded it:
+record one before changing the pipeline (e.g. invoice_utils.py) and compare after. The exit code is 1 when a
+benchmark is slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+from benchmarks.bench_analytics import bench_analytics
+from benchmarks.bench_extract_worked_hours import bench_extract_worked_hours
+from benchmarks.bench_hour_report_pdf import bench_hour_report_pdf
+from benchmarks.bench_invoice_pdf import bench_invoice_pdf
+from benchmarks.bench_plot_weekly import bench_plot_weekly
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),'baseline.json')
+REGRESSION_THRESHOLD = 1.3 # Slower than the baseline by more than this factor is reported as a regression
+REGRESSION_MIN_SECONDS = 0.01 # ... and by more than this, so the noise of millisecond timings is not reported
+
+# (name, function of (n_rows, repeat), sizes)
+BENCHMARKS = [
+    ('parse_german',lambda n_rows,repeat: bench_extract_worked_hours(n_rows,repeat,'German'),[1_000, 10_000, 100_000]),
+    ('parse_english',lambda n_rows,repeat: bench_extract_worked_hours(n_rows,repeat,'English'),[1_000, 10_000, 100_000]),
+    ('parse_spanish',lambda n_rows,repeat: bench_extract_worked_hours(n_rows,repeat,'Spanish'),[1_000, 10_000, 100_000]),
+    ('aggregation',bench_analytics,[10_000, 100_000, 1_000_000]),
+    ('hour_report_pdf',bench_hour_report_pdf,[100, 1_000, 5_000]),
+    ('invoice_pdf',bench_invoice_pdf,[100, 10_000]),
+    ('plot_weekly',bench_plot_weekly,[100, 1_000, 10_000]),
+]
+
+def run_benchmarks(names=None,quick=False,repeat=5):
+    """
+    Run the benchmarks.
+
+    Parameters:
+    - names (list, optional): Names of the benchmarks to run. Defaults to all of them.
+    - quick (bool): Whether to only run the smallest size of every benchmark. Default is False.
+    - repeat (int): Number of timed runs per size, the best one is kept. Default is 5.
+
+    Returns:
+    - dict: Best wall time in seconds by '{benchmark}/{rows}'.
+    """
+    results = {}
+    for name,function,sizes in BENCHMARKS:
+        if names and name not in names:
+            continue
+        for n_rows in sizes[:1] if quick else sizes:
+            results[f'{name}/{n_rows}'] = function(n_rows,repeat)
+    return results
+
+def get_environment():
+    """
+    Returns:
+    - dict: Versions of Python and of the libraries the timings depend on, and the platform.
+    """
+    import matplotlib
+    import numpy
+    import pandas
+    environment = {'python':platform.python_version(),'platform':platform.platform(),'numpy':numpy.__version__,
+                   'pandas':pandas.__version__,'matplotlib':matplotlib.__version__}
+    try:
+        import fpdf
+        environment['fpdf'] = getattr(fpdf,'FPDF_VERSION',getattr(fpdf,'__version__',''))
+    except ImportError:
+        pass
+    return environment
+
+def save_baseline(results,baseline_path=BASELINE_PATH):
+    """
+    Store timings as the baseline, with the environment they were recorded in.
+
+    Parameters:
+    - results (dict): Timings, as returned by run_benchmarks.
+    - baseline_path (str): Where to write the baseline. Default is BASELINE_PATH.
+    """
+    with open(baseline_path,'w') as f:
+        json.dump({'environment':get_environment(),'results':results},f,indent=2)
+        f.write('\n')
+
+def compare_with_baseline(results,baseline,threshold=REGRESSION_THRESHOLD):
+    """
+    Compare timings with a baseline.
+
+    Parameters:
+    - results (dict): Timings, as returned by run_benchmarks.
+    - baseline (dict): Baseline timings, in the same format.
+    - threshold (float): Ratio above which a timing is a regression, if it is also more than
+      REGRESSION_MIN_SECONDS slower. Default is REGRESSION_THRESHOLD.
+
+    Returns:
+    - list: (key, seconds, baseline seconds or None, ratio or None, is_regression) per result.
+    """
+    comparison = []
+    for key,seconds in results.items():
+        baseline_seconds = baseline.get(key)
+        ratio = seconds/baseline_seconds if baseline_seconds else None
+        is_regression = ratio is not None and ratio>threshold and seconds-baseline_seconds>REGRESSION_MIN_SECONDS
+        comparison.append((key,seconds,baseline_seconds,ratio,is_regression))
+    return comparison
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--benchmarks',nargs='+',choices=[name for name,_,_ in BENCHMARKS],
+                        help='Benchmarks to run, all by default')
+    parser.add_argument('--quick',action='store_true',help='Only run the smallest size of every benchmark')
+    parser.add_argument('--repeat',type=int,default=5)
+    parser.add_argument('--baseline',default=BASELINE_PATH,help='Baseline JSON file')
+    parser.add_argument('--save-baseline',action='store_true',help='Store the timings as the baseline')
+    parser.add_argument('--threshold',type=float,default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.benchmarks,args.quick,args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print(f'{"benchmark":<28} {"seconds":>10} {"baseline":>10} {"ratio":>7}')
+    regressions = 0
+    for key,seconds,baseline_seconds,ratio,is_regression in compare_with_baseline(results,baseline,args.threshold):
+        baseline_text = '' if baseline_seconds is None else f'{baseline_seconds:.4f}'
+        ratio_text = '' if ratio is None else f'{ratio:.2f}'
+        print(f'{key:<28} {seconds:>10.4f} {baseline_text:>10} {ratio_text:>7}{"  REGRESSION" if is_regression else ""}')
+        regressions += is_regression
+
+    if args.save_baseline:
+        # Benchmarks that were not run keep their baseline
+        save_baseline({**baseline,**results},args.baseline)
+        print(f'Baseline saved to {args.baseline}')
+    elif regressions:
+        print(f'{regressions} benchmark(s) slower than the baseline by more than {args.threshold}x')
+        sys.exit(1)
@@ -0,0 +1,95 @@
+"""
+Generator for synthetic exports of the 'worklog' app, in the same format as the files in 0-RawData.
+"""
+import numpy as np
+import pandas as pd
+
+WEEKDAYS_DE = ['Mo.','Di.','Mi.','Do.','Fr.','Sa.','So.']
+MONTHS_DE = ['Jan.','Feb.','März','Apr.','Mai','Juni','Juli','Aug.','Sept.','Okt.','Nov.','Dez.']
+# Headers, date spellings, total label and hour unit of the exports in every language of the app
+SYNTHETIC_FORMATS = {
+    'German':{'columns':['Datum','Schichtbeginn','Schichtende','Stunden','Pause','Notizen'],
+              'weekdays':WEEKDAYS_DE,'months':MONTHS_DE,'total':'Gesamt:','hour_unit':'std'},
+    'English':{'columns':['Date','Shift start','Shift end','Hours','Break','Notes'],
+               'weekdays':['Mon','Tue','Wed','Thu','Fri','Sat','Sun'],
+               'months':['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec'],
+               'total':'Total:','hour_unit':'h'},
+    'Spanish':{'columns':['Fecha','Inicio del turno','Fin del turno','Horas','Pausa','Notas'],
+               'weekdays':['lun.','mar.','mié.','jue.','vie.','sáb.','dom.'],
+               'months':['ene.','feb.','mar.','abr.','may.','jun','jul','ago.','sep.','oct.','nov.','dic.'],
+               'total':'Total:','hour_unit':'h'},
+}
+
+def format_worklog_duration(minutes,hour_unit='std'):
+    """
+    Format minutes the way the worklog app does in its hours column, e.g. "1std 59m" or "13m".
+
+    Parameters:
+    - minutes (int): The duration in minutes.
+    - hour_unit (str): The abbreviation of hours in the language of the export. Default is 'std' (German).
+
+    Returns:
+    - str: The formatted duration.
+    """
+    if minutes>=60:
+        return f'{minutes//60}{hour_unit} {minutes%60}m'
+    return f'{minutes}m'
+
+def generate_synthetic_export(n_rows,month=6,year=2022,overnight_share=0.05,long_note_share=0.1,seed=0,
+                              language='German'):
+    """
+    Generate a synthetic worklog export for one month.
+
+    Parameters:
+    - n_rows (int): Number of shift rows, excluding the trailing totals row.
+    - month (int): The month the shifts fall in.
+    - year (int): The year the shifts fall in.
+    - overnight_share (float): Fraction of shifts that end after midnight.
+    - long_note_share (float): Fraction of shifts whose notes wrap over several lines in the hour report.
+    - seed (int): Seed of the random generator.
+    - language (str): Language of the export, a key of SYNTHETIC_FORMATS. Default is 'German'.
+
+    Returns:
+    - pd.DataFrame: The export, newest entry first and with the totals row last.
+    """
+    export_format = SYNTHETIC_FORMATS[language]
+    rng = np.random.default_rng(seed)
+    days_in_month = pd.Timestamp(year=year,month=month,day=1).days_in_month
+    days = np.sort(rng.integers(1,days_in_month+1,n_rows))[::-1]
+    begin = rng.integers(0,22*60,n_rows)
+    duration = rng.integers(5,4*60,n_rows)
+    overnight = rng.random(n_rows)<overnight_share
+    begin[overnight] = rng.integers(21*60,24*60,overnight.sum())
+    end = (begin+duration)%(24*60)
+
+    notes = np.array([f'Sample note {i+1}' for i in range(n_rows)],dtype=object)
+    long_notes = rng.random(n_rows)<long_note_share
+    notes[long_notes] = [f'{note}: '+' '.join(['meeting','review','ticket #1234','refactoring','deployment'][j%5] for j in range(rng.integers(10,40)))
+                         for note in notes[long_notes]]
+
+    weekdays = pd.to_datetime(pd.DataFrame({'year':year,'month':month,'day':days})).dt.weekday.to_numpy()
+    hhmm = np.array([f'{m//60:02d}:{m%60:02d}' for m in range(24*60)])
+    weekday_names,month_name,hour_unit = export_format['weekdays'],export_format['months'][month-1],export_format['hour_unit']
+    df = pd.DataFrame(dict(zip(export_format['columns'],
+                               [[f'{weekday_names[w]}, {month_name} {d}' for w,d in zip(weekdays,days)],
+                                hhmm[begin],
+                                hhmm[end],
+                                [format_worklog_duration(m,hour_unit) for m in duration],
+                                '0m',
+                                notes])))
+    total = pd.DataFrame([['','',export_format['total'],format_worklog_duration(int(duration.sum()),hour_unit),'0m','']],
+                         columns=df.columns)
+    return pd.concat([df,total],ignore_index=True)
+
+def write_synthetic_export(path,n_rows,month=6,year=2022,**kwargs):
+    """
+    Write a synthetic worklog export to a CSV file.
+
+    Parameters:
+    - path (str): The destination file.
+    - n_rows (int): Number of shift rows, excluding the trailing totals row.
+    - month (int): The month the shifts fall in.
+    - year (int): The year the shifts fall in.
+    - kwargs: Passed on to generate_synthetic_export.
+    """
+    generate_synthetic_export(n_rows,month,year,**kwargs).to_csv(path,index=False)
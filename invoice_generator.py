@@ -1,34 +1,14 @@
+from utils.config_utils import load_registry
 from utils.invoice_utils import generate_invoice
 
-company_data = {'name':'CompanyName',
-                'street':'Building Street',
-                'street_cont':'123 Street',
-                'city':'Company city',
-                'postcode':'12345'}
-
-employee_data = {'name':"My Name",
-                 'initials': "MyInitials",
-                 'position':"My position",
-                 'email':"myemail@company.com",
-                 # Address:
-                 'street':"My Street 123",
-                 'city':"MyCity",
-                 'state':"MyState",
-                 'postcode':"12345",
-                 'country':"My Country",
-                 'phone':"+123 456 789",
-                 # Bank details:
-                 'bank_name':"My Bank",
-                 'bank_address':"1234 Bank Street, Bank State, Country, Zip code",
-                 'holder_name':"Holder Name",
-                 'swift':"ABCDEF12",
-                 'routing_nb':"123456789",
-                 'account_nb':'12345679012'}
-
+registry = load_registry('config.json') # People and companies, config.example.json until config.json is created
+company_data = registry.get_company('CompanyName')
+employee_data = registry.get_person() # The only person, or registry.get_person('MyInitials')
 
 month = 6
 year = 2022
-gbp_to_usd_rate=1.232204 # https://www.oanda.com/lang/es/fx-for-business/historical-rates
+gbp_to_usd_rate=1.232204 # https://www.oanda.com/lang/es/fx-for-business/historical-rates, None for the monthly average of exchange_rates.csv
 hourly_rate = 1 # In GBP 
 
-generate_invoice(month,year,gbp_to_usd_rate,hourly_rate,company_data,employee_data)
\ No newline at end of file
+generate_invoice(month,year,gbp_to_usd_rate,hourly_rate,company_data,employee_data,
+                 raw_directory=registry.get_raw_directory(employee_data['id']))
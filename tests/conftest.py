@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+
+import pytest
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_RAW_FILE = os.path.join(REPOSITORY_DIRECTORY,'0-RawData','CompanyName_062022.csv')
+SAMPLE_TOTAL_MINUTES = 67*60+7 # The 'Gesamt' row of the sample file
+
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path,monkeypatch):
+    """
+    Keep the parse cache of every test in its own directory.
+    """
+    import utils.cache_utils
+    directory = str(tmp_path/'cache')
+    monkeypatch.setattr(utils.cache_utils,'CACHE_DIRECTORY',directory)
+    return directory
+
+@pytest.fixture
+def raw_directory(tmp_path):
+    """
+    A raw data directory with a copy of the sample file, CompanyName_062022.csv.
+    """
+    directory = tmp_path/'raw'
+    directory.mkdir()
+    shutil.copy(SAMPLE_RAW_FILE,directory)
+    return str(directory)
+
+@pytest.fixture
+def example_config():
+    """
+    The employee and company details of config.example.json.
+    """
+    with open(os.path.join(REPOSITORY_DIRECTORY,'config.example.json')) as f:
+        config = json.load(f)
+    return config['employee'],{company['name']:company for company in config['companies']}
+
+def write_raw_file(directory,file_name,rows,total='0std 0m'):
+    """
+    Write a German worklog export with the given (date, begin, end, hours, notes) rows, newest first.
+    """
+    lines = ['Datum,Schichtbeginn,Schichtende,Stunden,Pause,Notizen']
+    lines += [f'"{date}",{begin},{end},{hours},0m,{notes}' for date,begin,end,hours,notes in rows]
+    lines.append(f',,Gesamt:,{total},0m,')
+    path = os.path.join(str(directory),file_name)
+    with open(path,'w',encoding='utf-8') as f:
+        f.write('\n'.join(lines)+'\n')
+    return path
+
+@pytest.fixture
+def output_directories(tmp_path,monkeypatch):
+    """
+    Send the hour reports and invoices of a test to its own directories, returned as (hour reports, invoices).
+    """
+    import utils.batch_utils
+    import utils.invoice_utils
+    hours_directory = str(tmp_path/'2-ProcessedHours')
+    invoices_directory = str(tmp_path/'1-Invoices')
+    for module in (utils.invoice_utils,utils.batch_utils):
+        monkeypatch.setattr(module,'PROCESSED_HOURS_DIRECTORY',hours_directory)
+        monkeypatch.setattr(module,'PROCESSED_DIRECTORY',invoices_directory)
+    return hours_directory,invoices_directory
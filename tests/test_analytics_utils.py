@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from tests.conftest import SAMPLE_TOTAL_MINUTES, write_raw_file
+from utils.analytics_utils import WorklogAnalytics
+from utils.invoice_utils import extract_worked_hour_as_df, get_minutes_from_hhmm
+from utils.shift_utils import ShiftStore
+
+def test_aggregates_match_pandas_on_the_sample_month(raw_directory):
+    analytics = WorklogAnalytics.from_raw_files(os.path.join(raw_directory,'*.csv'),person='MI')
+    df,_ = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory)
+    hours = pd.Series(get_minutes_from_hhmm(df['Hours'])/60,index=df.index)
+    assert len(analytics) == 60
+    assert analytics.total_hours() == SAMPLE_TOTAL_MINUTES/60
+    assert analytics.hours_by_company().to_dict() == {'CompanyName':SAMPLE_TOTAL_MINUTES/60}
+    assert analytics.hours_by_person().to_dict() == {'MI':SAMPLE_TOTAL_MINUTES/60}
+    iso = df['Date'].dt.isocalendar()
+    expected_weeks = hours.groupby([iso['year'].astype(int),iso['week'].astype(int)]).sum()
+    assert np.allclose(analytics.hours_by_week().to_numpy(),expected_weeks.to_numpy())
+    assert analytics.hours_by_week().index.tolist() == expected_weeks.index.tolist()
+    expected_weekdays = hours.groupby(df['Date'].dt.dayofweek).sum().reindex(range(7),fill_value=0)
+    assert np.allclose(analytics.hours_by_weekday().to_numpy(),expected_weekdays.to_numpy())
+    assert np.isclose(analytics.hours_by_hour_of_day().sum(),SAMPLE_TOTAL_MINUTES/60)
+
+def test_overnight_shifts_are_split_over_the_hours_they_cover():
+    analytics = WorklogAnalytics(ShiftStore([19173],[23*60+30],[25*60],['Release night']),['X'])
+    by_hour = analytics.hours_by_hour_of_day()
+    assert by_hour[23] == 0.5 and by_hour[0] == 1 and by_hour.sum() == 1.5
+    assert analytics.hours_by_keyword().to_dict() == {'release':1.5,'night':1.5}
+    assert analytics.hours_by_keyword(['Night','deploy']).to_dict() == {'night':1.5,'deploy':0.}
+
+def test_select_by_date_company_and_person(tmp_path):
+    write_raw_file(tmp_path,'A_062022.csv',[('Do., Juni 30','10:00','12:00','2std 0m','Review'),
+                                            ('Mi., Juni 1','9:00','10:00','1std 0m','Docs')])
+    write_raw_file(tmp_path,'B_062022.csv',[('Mi., Juni 15','9:00','9:45','0std 45m','Call')])
+    analytics = WorklogAnalytics.from_raw_files(str(tmp_path/'*.csv'),cache=False)
+    assert analytics.total_hours() == 3.75
+    assert analytics.select(start='2022-06-02').total_hours() == 2.75
+    assert analytics.select(end='2022-06-15',companies=['A']).total_hours() == 1
+    assert analytics.select(persons=['nobody']).total_hours() == 0
@@ -0,0 +1,45 @@
+import os
+
+from benchmarks.synthetic_worklog import write_synthetic_export
+from tests.conftest import write_raw_file
+from utils.archive_utils import WorklogArchive
+from utils.invoice_utils import extract_worked_hour_as_df
+
+def test_export_gives_back_the_ingested_files(raw_directory,tmp_path):
+    write_synthetic_export(os.path.join(raw_directory,'Other_092022.csv'),300,month=9,language='Spanish')
+    crlf_path = os.path.join(raw_directory,'Crlf_072022.csv')
+    with open(crlf_path,'wb') as f:
+        f.write(b'Datum,Schichtbeginn,Schichtende,Stunden,Pause,Notizen\r\n"Fr., Juli 1",9:00,9:30,30m,0m,\r\n'
+                b',,Gesamt:,0std 30m,0m,')
+    archive = WorklogArchive(str(tmp_path/'archive'))
+    assert archive.append_raw_files(os.path.join(raw_directory,'*.csv'),person='MI') == 3
+    exported = WorklogArchive(str(tmp_path/'archive')).export_csv(str(tmp_path/'exported'))
+    assert len(exported) == 3
+    for file_path in exported:
+        with open(file_path,'rb') as f, open(os.path.join(raw_directory,os.path.basename(file_path)),'rb') as original:
+            assert f.read() == original.read(),file_path
+
+def test_archived_shifts_equal_the_parsed_file(raw_directory,tmp_path):
+    archive = WorklogArchive(str(tmp_path/'archive'))
+    archive.append_raw_files(os.path.join(raw_directory,'*.csv'),person='MI')
+    archive = WorklogArchive(str(tmp_path/'archive'))
+    df,_ = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory)
+    archived = archive.to_frame()
+    assert len(archive) == 60
+    for column in df.columns:
+        assert archived[column].tolist() == df[column].tolist(),column
+    assert set(archived['Company']) == {'CompanyName'} and set(archived['Person']) == {'MI'}
+    assert len(archive.to_frame(start='2022-06-29')) == len(df[df['Date']>='2022-06-29'])
+    assert len(archive.to_frame(companies=['Nobody'])) == 0
+
+def test_changed_files_replace_their_segment(tmp_path):
+    rows = [('Do., Juni 30','10:00','12:00','2std 0m','Review')]
+    path = write_raw_file(tmp_path,'X_062022.csv',rows,'2std 0m')
+    archive = WorklogArchive(str(tmp_path/'archive'))
+    assert archive.append_raw_files(path) == 1
+    assert archive.append_raw_files(path) == 0
+    write_raw_file(tmp_path,'X_062022.csv',[('Do., Juni 30','13:00','13:30','0std 30m','Call')]+rows,'2std 30m')
+    assert archive.append_raw_files(path) == 1
+    archive = WorklogArchive(str(tmp_path/'archive'))
+    assert len(archive.segments) == 1 and len(archive) == 2
+    assert archive.to_frame()['Notes'].tolist() == ['Call','Review']
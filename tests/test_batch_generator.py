@@ -0,0 +1,9 @@
+import importlib
+import sys
+
+def test_importing_does_not_read_the_config(tmp_path,monkeypatch):
+    # No config.json nor config.example.json in the working directory, e.g. a worker process started elsewhere
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delitem(sys.modules,'batch_generator',raising=False)
+    module = importlib.import_module('batch_generator')
+    assert not hasattr(module,'registry')
@@ -0,0 +1,36 @@
+import os
+
+from utils.batch_utils import get_batch_rates, run_batch
+
+def write_rates(tmp_path,lines):
+    path = tmp_path/'rates.csv'
+    path.write_text('date,pair,rate\n'+''.join(f'{line}\n' for line in lines))
+    return str(path)
+
+def test_batch_rates_are_the_monthly_averages(tmp_path,raw_directory):
+    rates_path = write_rates(tmp_path,['2022-06-01,GBP/USD,1.2','2022-06-15,GBP/USD,1.3'])
+    file_path = os.path.join(raw_directory,'CompanyName_062022.csv')
+    assert get_batch_rates([file_path],rates_path) == {file_path:1.25}
+
+def test_a_missing_currency_pair_fails_the_jobs_not_the_batch(tmp_path,raw_directory,example_config,output_directories):
+    employee_data,company_data_by_name = example_config
+    rates_path = write_rates(tmp_path,['2022-06-01,EUR/USD,1.1'])
+    file_path = os.path.join(raw_directory,'CompanyName_062022.csv')
+    assert get_batch_rates([file_path],rates_path) == {}
+    results = run_batch([file_path],company_data_by_name,employee_data,1,None,hour_report=False,max_workers=1,
+                        rates_path=rates_path)
+    assert len(results) == 1
+    assert 'No exchange rates for GBP/USD' in results[0]['error']
+
+def test_a_person_without_pay_rate_fails_their_jobs_only(tmp_path,raw_directory,example_config,output_directories):
+    from utils.batch_utils import run_registry_batch
+    from utils.config_utils import ConfigRegistry
+    employee_data,company_data_by_name = example_config
+    people = [dict(employee_data,id='A',raw_directory=raw_directory,pay_rate=1),
+              dict(employee_data,id='B',raw_directory=raw_directory)]
+    registry = ConfigRegistry(people,list(company_data_by_name.values()))
+    results = run_registry_batch(registry,gbp_to_usd_rate=1.2,max_workers=1)
+    errors = {result['person']:result['error'] for result in results}
+    assert errors['A'] is None
+    assert "No pay rate for the invoice of 'B'" in errors['B']
+    assert os.path.exists(os.path.join(output_directories[1],'A','CompanyName','2022-06-CompanyName.pdf'))
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+
+from tests.conftest import write_raw_file
+from utils.cache_utils import clear_cache, evict_cache, get_cache_key, load_from_cache, save_to_cache
+from utils.invoice_utils import extract_worked_hour_as_df
+
+ROWS = [('Do., Juni 30','10:00','12:00','2std 0m','Review'),
+        ('Mi., Juni 29','09:00','10:00','1std 0m','Docs')]
+
+def cached_entries(cache_directory):
+    return sorted(os.listdir(cache_directory)) if os.path.isdir(cache_directory) else []
+
+def test_key_changes_with_the_content_and_the_extra_values(tmp_path):
+    path = write_raw_file(tmp_path,'X_062022.csv',ROWS)
+    key = get_cache_key(path,'v1',2022)
+    assert get_cache_key(path,'v1',2022) == key
+    assert get_cache_key(path,'v2',2022) != key
+    assert get_cache_key(path,'v1',2021) != key
+    write_raw_file(tmp_path,'X_062022.csv',ROWS[:1])
+    assert get_cache_key(path,'v1',2022) != key
+
+def test_an_edited_file_is_parsed_again(tmp_path,cache_directory):
+    write_raw_file(tmp_path,'X_062022.csv',ROWS)
+    df,total_hours = extract_worked_hour_as_df(6,2022,'X',raw_directory=str(tmp_path))
+    assert (len(df),total_hours) == (2,'3:00')
+    assert len(cached_entries(cache_directory)) == 1
+    write_raw_file(tmp_path,'X_062022.csv',[('Do., Juni 30','13:00','13:30','0std 30m','Call')]+ROWS)
+    df,total_hours = extract_worked_hour_as_df(6,2022,'X',raw_directory=str(tmp_path))
+    assert (len(df),total_hours) == (3,'3:30')
+    assert len(cached_entries(cache_directory)) == 2
+
+def test_the_same_file_of_another_year_is_parsed_again(tmp_path):
+    write_raw_file(tmp_path,'X_062022.csv',ROWS)
+    df,_ = extract_worked_hour_as_df(6,2022,'X',raw_directory=str(tmp_path))
+    os.rename(tmp_path/'X_062022.csv',tmp_path/'X_062021.csv')
+    df,_ = extract_worked_hour_as_df(6,2021,'X',raw_directory=str(tmp_path))
+    assert df['Date'].dt.year.unique().tolist() == [2021]
+
+def test_unreadable_entries_are_cache_misses(cache_directory):
+    save_to_cache('key',pd.DataFrame({'a':[1]}))
+    assert load_from_cache('key')['a'].tolist() == [1]
+    with open(os.path.join(cache_directory,'key.pkl'),'wb') as f:
+        f.write(b'written by another pandas')
+    assert load_from_cache('key') is None
+    assert load_from_cache('missing') is None
+
+def test_least_recently_used_entries_are_evicted_first(cache_directory):
+    for key in ['a','b','c']:
+        save_to_cache(key,b'x'*1000)
+    os.utime(os.path.join(cache_directory,'a.pkl'),(1,1))
+    os.utime(os.path.join(cache_directory,'b.pkl'),(2,2))
+    os.utime(os.path.join(cache_directory,'c.pkl'),(3,3))
+    load_from_cache('a') # Used last now
+    evict_cache(max_bytes=2500)
+    assert cached_entries(cache_directory) == ['a.pkl','c.pkl']
+    clear_cache()
+    assert cached_entries(cache_directory) == []
@@ -0,0 +1,36 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from utils.calendar_utils import EPOCH_ORDINAL, get_calendar_index
+
+def test_every_day_matches_the_datetime_module():
+    calendar_index = get_calendar_index()
+    days = np.arange(datetime.date(1970,1,1).toordinal(),datetime.date(2099,12,31).toordinal()+1)-EPOCH_ORDINAL
+    dates = [calendar_index.date(day) for day in days]
+    iso = np.array([date.isocalendar() for date in dates])
+    assert (calendar_index.iso_year(days) == iso[:,0]).all()
+    assert (calendar_index.iso_week(days) == iso[:,1]).all()
+    assert (calendar_index.weekday(days) == iso[:,2]-1).all()
+    assert (calendar_index.month(days) == [date.month for date in dates]).all()
+    assert (calendar_index.day_numbers([date.year for date in dates],[date.month for date in dates],
+                                       [date.day for date in dates]) == days).all()
+
+def test_month_bounds_and_weeks():
+    calendar_index = get_calendar_index()
+    first_day,last_day = calendar_index.month_bounds(2024,2)
+    assert (calendar_index.date(first_day),calendar_index.date(last_day)) == (datetime.date(2024,2,1),datetime.date(2024,2,29))
+    assert calendar_index.month_weeks(2021,1) == (53,4) # 1 January 2021 is in the last week of 2020
+    assert get_calendar_index() is calendar_index
+
+def test_dates_out_of_range_are_rejected():
+    calendar_index = get_calendar_index()
+    with pytest.raises(ValueError):
+        calendar_index.day_numbers(2022,2,29)
+    with pytest.raises(ValueError):
+        calendar_index.day_numbers(2022,13,1)
+    with pytest.raises(ValueError):
+        calendar_index.day_numbers(1969,12,31)
+    with pytest.raises(ValueError):
+        calendar_index.weekday(-1)
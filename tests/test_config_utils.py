@@ -0,0 +1,58 @@
+import os
+import shutil
+
+import pytest
+
+from tests.conftest import REPOSITORY_DIRECTORY, SAMPLE_RAW_FILE
+from utils.config_utils import ConfigRegistry, load_config, load_registry
+
+def test_example_configs_load():
+    registry = load_registry(os.path.join(REPOSITORY_DIRECTORY,'people.example.toml'))
+    assert list(registry.people) == ['MI','OP']
+    assert registry.get_person('OP')['pay_rate'] == 2
+    assert registry.get_raw_directory('OP') == os.path.abspath('0-RawData/other-person')
+    assert list(registry.companies) == ['CompanyName','Other']
+    employee_data,company_data_by_name = load_config(os.path.join(REPOSITORY_DIRECTORY,'config.example.json'))
+    assert employee_data['id'] == employee_data['initials'] and 'CompanyName' in company_data_by_name
+
+def test_lookups_name_the_known_entries(example_config):
+    employee_data,company_data_by_name = example_config
+    registry = ConfigRegistry([dict(employee_data,id='A'),dict(employee_data,id='B')],list(company_data_by_name.values()))
+    with pytest.raises(ValueError,match=r"\['A', 'B'\]"):
+        registry.get_person()
+    with pytest.raises(ValueError,match='Unknown person'):
+        registry.get_person('C')
+    with pytest.raises(ValueError,match='Unknown company'):
+        registry.get_company('Nobody')
+
+@pytest.mark.parametrize('change,message',[
+    ({'id':'A'},'used twice'),
+    ({'pay_rate':-1},'non-negative'),
+    ({'pay_rate':'1'},'non-negative'),
+    ({'email':None},None),
+])
+def test_invalid_people_are_rejected(example_config,change,message):
+    employee_data,company_data_by_name = example_config
+    person = {key:value for key,value in dict(employee_data,**change).items() if value is not None}
+    with pytest.raises(ValueError,match=message or 'missing the keys'):
+        ConfigRegistry([dict(employee_data,id='A'),person],list(company_data_by_name.values()))
+
+def test_jobs_are_filtered_by_person_company_and_period(tmp_path,example_config):
+    employee_data,company_data_by_name = example_config
+    for person_id,file_names in {'A':['CompanyName_062022.csv','CompanyName_072022.csv'],
+                                 'B':['Other_062022.csv','notes.csv']}.items():
+        os.makedirs(tmp_path/person_id)
+        for file_name in file_names:
+            shutil.copy(SAMPLE_RAW_FILE,tmp_path/person_id/file_name)
+    people = [dict(employee_data,id=person_id,raw_directory=str(tmp_path/person_id)) for person_id in 'AB']
+    registry = ConfigRegistry(people,list(company_data_by_name.values()))
+    jobs = [(person_id,os.path.basename(file_path)) for person_id,file_path in registry.get_jobs()]
+    assert jobs == [('A','CompanyName_062022.csv'),('A','CompanyName_072022.csv'),('B','Other_062022.csv')]
+    assert [job[0] for job in registry.get_jobs(person_ids=['B'])] == ['B']
+    assert len(registry.get_jobs(company_names=['CompanyName'],periods=[(6,2022)])) == 1
+
+def test_unknown_config_formats_are_rejected(tmp_path):
+    path = tmp_path/'config.yaml'
+    path.write_text('people: []')
+    with pytest.raises(ValueError,match='Config files are expected'):
+        load_registry(str(path))
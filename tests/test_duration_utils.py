@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from utils.duration_utils import (ROUNDING_POLICIES, convert_minor_units, describe_rounding, format_duration,
+                                  format_hours_quantity, format_money, get_amount_for_minutes, get_billable_minutes,
+                                  round_minutes, to_minor_units)
+from tests.conftest import SAMPLE_TOTAL_MINUTES
+
+RATE_MINOR = 2050 # 20.50 per hour
+
+# policy -> (billed minutes, amount in minor units) for the sample month of 67:07 at 20.50 per hour
+SAMPLE_BILLING = {
+    'exact':(4027,137589),
+    'floor_hour':(4020,137350),
+    'nearest_hour':(4020,137350),
+    'ceil_hour':(4080,139400),
+    'floor_quarter':(4020,137350),
+    'nearest_quarter':(4020,137350),
+    'ceil_quarter':(4035,137863),
+}
+
+def test_every_policy_has_expected_billing():
+    assert set(SAMPLE_BILLING) == set(ROUNDING_POLICIES)
+
+@pytest.mark.parametrize('policy',list(ROUNDING_POLICIES))
+def test_billed_minutes_and_amount_for_every_policy(policy):
+    billed_minutes,amount = SAMPLE_BILLING[policy]
+    assert round_minutes(SAMPLE_TOTAL_MINUTES,policy) == billed_minutes
+    assert get_amount_for_minutes(billed_minutes,RATE_MINOR) == amount
+
+def test_round_minutes_rounds_halves_up():
+    assert round_minutes(np.array([7,8,22,23]),'nearest_quarter').tolist() == [0,15,15,30]
+    assert round_minutes(30,'nearest_hour') == 60
+
+def test_round_minutes_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        round_minutes(60,'ceil_day')
+
+def test_billable_minutes_per_shift_differs_from_the_total():
+    minutes = np.array([50,50,50])
+    assert get_billable_minutes(minutes,'ceil_hour') == 180
+    assert get_billable_minutes(minutes,'ceil_hour',per_shift=True) == 180
+    assert get_billable_minutes(minutes,'floor_hour') == 120
+    assert get_billable_minutes(minutes,'floor_hour',per_shift=True) == 0
+
+def test_amount_rounds_half_a_minor_unit_up():
+    assert get_amount_for_minutes(1,30) == 1 # 0.5
+    assert get_amount_for_minutes(1,29) == 0
+    assert get_amount_for_minutes(np.array([60,90]),RATE_MINOR).tolist() == [2050,3075]
+
+def test_to_minor_units_avoids_float_truncation():
+    assert to_minor_units(20.5) == 2050
+    assert to_minor_units(0.29) == 29
+    assert to_minor_units(np.array([1.005,19.99])).tolist() == [100,1999]
+
+def test_convert_minor_units():
+    assert convert_minor_units(137350,1.25) == 171688
+    assert convert_minor_units(137350,1.25,rounding_minor=100) == 171700
+    assert convert_minor_units(np.array([100,200]),np.array([0.5,2])).tolist() == [50,400]
+
+def test_describe_rounding():
+    assert describe_rounding('exact',4027,4027) is None
+    assert describe_rounding('floor_hour',4027,4020) == 'Billed time rounded down to the hour, 0:07 not billed'
+    assert describe_rounding('ceil_quarter',4027,4035) == 'Billed time rounded up to the quarter hour, 0:08 added'
+    assert describe_rounding('nearest_hour',4020,4020) == 'Billed time rounded to the nearest hour'
+    assert (describe_rounding('floor_hour',150,60,per_shift=True)
+            == 'Billed time of every shift rounded down to the hour, 1:30 not billed')
+
+def test_formatting():
+    assert format_duration(SAMPLE_TOTAL_MINUTES) == '67:07'
+    assert format_duration(-5) == '-0:05'
+    assert format_hours_quantity(4020) == '67'
+    assert format_hours_quantity(4035) == '67.25'
+    assert format_money(137350) == '1,373.50'
+    assert format_money(-5,symbol='£ ',thousands_separator=False) == '-£ 0.05'
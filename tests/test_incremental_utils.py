@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+
+from utils.incremental_utils import update_worked_hours
+from utils.invoice_utils import extract_worked_hour_as_df, parse_worked_hour_file
+
+from tests.conftest import write_raw_file
+
+ROWS = [('Do., Juni 30','10:00','12:00','2std 0m','Review'),
+        ('Mi., Juni 29','22:00','01:30','3std 30m',''),
+        ('Mi., Juni 29','09:15','09:45','30m','123')]
+
+def test_appended_rows_give_the_same_frame_as_a_full_parse(tmp_path):
+    file_path = write_raw_file(tmp_path,'CompanyName_062022.csv',ROWS[1:])
+    update_worked_hours(file_path,2022)
+    write_raw_file(tmp_path,'CompanyName_062022.csv',ROWS)
+    df,total_hours = update_worked_hours(file_path,2022)
+    expected_df,expected_total_hours = parse_worked_hour_file(file_path,2022)
+    pd.testing.assert_frame_equal(df.reset_index(drop=True),expected_df.reset_index(drop=True))
+    assert total_hours == expected_total_hours == '6:00'
+
+def test_files_of_the_same_name_in_different_directories_are_kept_apart(tmp_path):
+    os.makedirs(tmp_path/'first')
+    os.makedirs(tmp_path/'second')
+    first_path = write_raw_file(tmp_path/'first','CompanyName_062022.csv',ROWS)
+    second_path = write_raw_file(tmp_path/'second','CompanyName_062022.csv',ROWS[:1])
+    assert update_worked_hours(first_path,2022)[1] == '6:00'
+    assert update_worked_hours(second_path,2022)[1] == '2:00'
+    assert update_worked_hours(first_path,2022)[1] == '6:00'
+
+def test_incremental_parse_without_cache_writes_nothing(tmp_path,cache_directory):
+    write_raw_file(tmp_path,'CompanyName_062022.csv',ROWS)
+    df,total_hours = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=str(tmp_path),incremental=True,
+                                               cache=False)
+    assert (len(df),total_hours) == (3,'6:00')
+    assert not os.path.exists(cache_directory)
@@ -0,0 +1,59 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.conftest import REPOSITORY_DIRECTORY, SAMPLE_TOTAL_MINUTES, write_raw_file
+from utils.invoice_utils import (extract_worked_hour_as_df, get_hour_report_template, get_invoice_template,
+                                 get_minutes_from_hhmm, get_minutes_from_total_hours, get_total_amount)
+
+# extract_worked_hour_as_df(6,2022,'CompanyName') of the sample file, as returned before the parser was vectorized
+BASELINE_PARSED_FILE = os.path.join(REPOSITORY_DIRECTORY,'tests','data','CompanyName_062022_parsed.csv')
+
+def test_sample_month_matches_the_baseline_parser(raw_directory):
+    df,total_hours = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory,cache=False)
+    expected = pd.read_csv(BASELINE_PARSED_FILE,dtype=str,keep_default_na=False)
+    assert total_hours == '67:07'
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected) == 60
+    assert (df['Date'].dt.strftime('%Y-%m-%d').to_numpy() == expected['Date'].to_numpy()).all()
+    for column in ['Begin','End','Hours','Pause','Notes']:
+        assert df[column].tolist() == expected[column].tolist(),column
+    assert get_minutes_from_hhmm(df['Hours']).sum() == SAMPLE_TOTAL_MINUTES
+
+def test_cached_parse_equals_a_fresh_parse(raw_directory):
+    fresh,fresh_total = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory,cache=False)
+    for _ in range(2): # Parsed and saved, then loaded from the cache
+        cached,cached_total = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory)
+        pd.testing.assert_frame_equal(cached,fresh)
+        assert cached_total == fresh_total
+
+def test_overnight_shifts_end_the_next_day(tmp_path):
+    write_raw_file(tmp_path,'X_122022.csv',[('Sa., Dez. 31','23:30','1:15','1std 45m','Night'),
+                                            ('Sa., Dez. 31','9:05','10:00','0std 55m','Morning')],'2std 40m')
+    df,total_hours = extract_worked_hour_as_df(12,2022,'X',drop_date_from_beginning_end=False,raw_directory=str(tmp_path),
+                                               cache=False)
+    assert total_hours == '2:40'
+    assert df['End'].tolist() == [pd.Timestamp('2023-01-01 01:15'),pd.Timestamp('2022-12-31 10:00')]
+    assert df['Hours'].tolist() == ['01:45','00:55']
+
+def test_get_minutes_from_hhmm():
+    assert get_minutes_from_hhmm(pd.Series(['00:00','9:05','23:59'])).tolist() == [0,545,1439]
+    with pytest.raises(ValueError):
+        get_minutes_from_hhmm(pd.Series(['24:00']))
+
+def test_total_helpers():
+    assert get_minutes_from_total_hours('67:07') == SAMPLE_TOTAL_MINUTES
+    assert get_total_amount(pd.Series(['£ 1,200.00','£ 35.5','£ -0.50'])) == '£ 1,235.00'
+    with pytest.raises(ValueError):
+        get_total_amount(pd.Series(['£ 1.005']))
+
+def test_templates_accept_details_json_cannot_hold(example_config):
+    # A TOML config can hold dates, e.g. start_date = 2022-01-01
+    employee_data,company_data_by_name = example_config
+    employee_data = dict(employee_data,start_date=datetime.date(2022,1,1))
+    company_data = dict(company_data_by_name['CompanyName'],contract_date=datetime.date(2021,12,1))
+    assert get_hour_report_template(company_data,employee_data) is get_hour_report_template(company_data,employee_data)
+    assert get_invoice_template(company_data,employee_data) is not None
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_worklog import write_synthetic_export
+from utils import locale_utils
+from utils.invoice_utils import parse_worked_hour_file
+from utils.locale_utils import get_locale_from_columns, get_month_and_day_from_dates, register_locale
+
+@pytest.mark.parametrize('language',['English','Spanish'])
+def test_every_language_parses_like_german(tmp_path,language):
+    for export_language in ['German',language]:
+        write_synthetic_export(tmp_path/f'{export_language}.csv',200,month=9,language=export_language)
+    german,german_total = parse_worked_hour_file(str(tmp_path/'German.csv'),2022)
+    other,other_total = parse_worked_hour_file(str(tmp_path/f'{language}.csv'),2022)
+    assert other_total == german_total
+    pd.testing.assert_frame_equal(other,german)
+
+def test_month_spellings_are_case_insensitive():
+    dates = pd.Series(['Fr., Sept. 2','mo., sep. 5','Sa., Dez. 31','Do., Juni 30'])
+    months,days = get_month_and_day_from_dates(dates,'German')
+    assert months.tolist() == [9,9,12,6]
+    assert days.tolist() == [2,5,31,30]
+
+def test_unknown_headers_and_dates_are_reported():
+    with pytest.raises(ValueError,match="the first column is 'Datum '"):
+        get_locale_from_columns(['Datum ','Schichtbeginn'])
+    with pytest.raises(ValueError,match='not in the German format'):
+        get_month_and_day_from_dates(pd.Series(['Do., June 30']),'German')
+    with pytest.raises(ValueError):
+        get_month_and_day_from_dates(pd.Series(['Do., Juni 30']),'Klingon')
+
+def test_registered_locales_are_recognised(tmp_path,monkeypatch):
+    monkeypatch.setattr(locale_utils,'LOCALES',dict(locale_utils.LOCALES))
+    months = [('janv.',),('févr.',),('mars',),('avr.',),('mai',),('juin',),('juil.',),('août',),('sept.',),
+              ('oct.',),('nov.',),('déc.',)]
+    register_locale('French','Date du jour',months)
+    try:
+        path = tmp_path/'French.csv'
+        path.write_text('Date du jour,Début,Fin,Heures,Pause,Notes\n"jeu., juin 30",10:00,11:30,1h 30m,0m,Revue\n'
+                        ',,Total:,1h 30m,0m,\n',encoding='utf-8')
+        df,total_hours = parse_worked_hour_file(str(path),2022)
+        assert (df['Date'].tolist(),total_hours) == ([pd.Timestamp('2022-06-30')],'1:30')
+        with pytest.raises(ValueError):
+            register_locale('Short','Datum',months[:11])
+    finally:
+        monkeypatch.undo()
+        locale_utils._compile_locales()
+    with pytest.raises(ValueError):
+        get_locale_from_columns(['Date du jour'])
@@ -0,0 +1,62 @@
+import os
+
+from utils.batch_utils import run_batch
+from utils.manifest_utils import BuildManifest
+
+def run(raw_directory,example_config,manifest_path,pay_rate=1,report_date='2022-06-30'):
+    employee_data,company_data_by_name = example_config
+    results = run_batch(os.path.join(raw_directory,'*.csv'),company_data_by_name,employee_data,pay_rate,1.232204,
+                        max_workers=1,report_date=report_date,skip_unchanged=True,manifest_path=manifest_path)
+    assert [result['error'] for result in results] == [None]
+    return sorted(results[0]['skipped'])
+
+def read_outputs(output_directories):
+    outputs = {}
+    for directory in output_directories:
+        for name in os.listdir(directory):
+            with open(os.path.join(directory,name),'rb') as f:
+                outputs[name] = f.read()
+    return outputs
+
+def test_only_documents_with_changed_inputs_are_generated(raw_directory,example_config,output_directories,tmp_path):
+    manifest_path = str(tmp_path/'build'/'manifest.json')
+    assert run(raw_directory,example_config,manifest_path) == []
+    outputs = read_outputs(output_directories)
+    assert len(outputs) == 2
+    assert run(raw_directory,example_config,manifest_path) == ['hour_report','invoice']
+    # The pay rate is only a dependency of the invoice
+    assert run(raw_directory,example_config,manifest_path,pay_rate=2) == ['hour_report']
+    assert run(raw_directory,example_config,manifest_path,pay_rate=2) == ['hour_report','invoice']
+    assert run(raw_directory,example_config,manifest_path) == ['hour_report']
+    # Same inputs and pinned dates give the same bytes
+    assert read_outputs(output_directories) == outputs
+
+def test_deleted_or_edited_documents_are_generated_again(raw_directory,example_config,output_directories,tmp_path):
+    manifest_path = str(tmp_path/'manifest.json')
+    run(raw_directory,example_config,manifest_path)
+    hour_report, = os.listdir(output_directories[0])
+    os.remove(os.path.join(output_directories[0],hour_report))
+    assert run(raw_directory,example_config,manifest_path) == ['invoice']
+    invoice, = os.listdir(output_directories[1])
+    with open(os.path.join(output_directories[1],invoice),'ab') as f:
+        f.write(b'\n')
+    assert run(raw_directory,example_config,manifest_path) == ['hour_report']
+    assert run(raw_directory,example_config,manifest_path,report_date='2022-07-01') == []
+    with open(os.path.join(raw_directory,'CompanyName_062022.csv'),encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    lines.insert(1,'"Do., Juni 30",13:00,13:30,0std 30m,0m,Late call')
+    with open(os.path.join(raw_directory,'CompanyName_062022.csv'),'w',encoding='utf-8') as f:
+        f.write('\n'.join(lines)+'\n')
+    assert run(raw_directory,example_config,manifest_path,report_date='2022-07-01') == []
+
+def test_dependencies_are_compared_as_saved(tmp_path):
+    output_path = tmp_path/'document.pdf'
+    output_path.write_bytes(b'%PDF')
+    manifest = BuildManifest(file_path=str(tmp_path/'manifest.json'))
+    manifest.record(str(output_path),{'rate':1.5,'report_date':None,'periods':(6,2022)})
+    manifest.save()
+    manifest = BuildManifest.load(str(tmp_path/'manifest.json'))
+    assert manifest.is_up_to_date(str(output_path),{'rate':1.5,'report_date':None,'periods':(6,2022)})
+    assert not manifest.is_up_to_date(str(output_path),{'rate':1.6,'report_date':None,'periods':(6,2022)})
+    (tmp_path/'manifest.json').write_text('{"version": 0}')
+    assert BuildManifest.load(str(tmp_path/'manifest.json')).entries == {}
@@ -0,0 +1,81 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from tests.conftest import write_raw_file
+from utils.invoice_utils import extract_worked_hour_as_df
+from utils.overlap_utils import ShiftIntervalIndex, apply_overlap_policy, find_shift_overlaps
+
+ROWS = [('Do., Juni 30','10:00','12:00','2std 0m','Review'),
+        ('Do., Juni 30','11:00','13:00','2std 0m','Call'),
+        ('Mi., Juni 29','09:00','10:00','1std 0m','Docs'),
+        ('Mi., Juni 29','09:00','10:00','1std 0m','Docs')]
+
+@pytest.fixture
+def overlapping_directory(tmp_path):
+    write_raw_file(tmp_path,'X_062022.csv',ROWS,'6std 0m')
+    return str(tmp_path)
+
+def test_warning_points_at_the_caller_of_extract(overlapping_directory):
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        extract_worked_hour_as_df(6,2022,'X',drop_date_from_beginning_end=False,raw_directory=overlapping_directory,
+                                  cache=False,overlaps='warn')
+    assert len(caught) == 1
+    assert '1 duplicated and 1 overlapping shifts, 2:00 counted twice' in str(caught[0].message)
+    assert caught[0].filename == __file__
+
+def test_warning_points_at_the_caller_of_apply_overlap_policy(overlapping_directory):
+    df,_ = extract_worked_hour_as_df(6,2022,'X',drop_date_from_beginning_end=False,raw_directory=overlapping_directory,
+                                     cache=False)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        apply_overlap_policy(df,'warn')
+    assert caught[0].filename == __file__
+
+def brute_force_flags(begins,ends,groups):
+    # A shift is flagged when an earlier one of its group, in (begin, end, position) order, is still running
+    keys = list(zip(begins,ends,range(len(begins))))
+    return sorted(i for i in range(len(begins))
+                  if any(groups[j]==groups[i] and keys[j]<keys[i] and begins[i]<ends[j] for j in range(len(begins))))
+
+def brute_force_double_counted(begins,ends,groups):
+    covered = sum(len(set().union(*[range(b,e) for b,e,g in zip(begins,ends,groups) if g==group]))
+                  for group in set(groups))
+    return int(np.sum(np.subtract(ends,begins)))-covered
+
+@pytest.mark.parametrize('seed',range(20))
+def test_sweep_matches_a_brute_force_search(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(0,40))
+    begins = rng.integers(0,600,n)
+    ends = begins+rng.integers(1,90,n)
+    duplicated = rng.random(n)<0.1
+    begins[1:][duplicated[1:]],ends[1:][duplicated[1:]] = begins[:-1][duplicated[1:]],ends[:-1][duplicated[1:]]
+    groups = rng.integers(0,3,n)
+    index = ShiftIntervalIndex(begins,ends,groups)
+    assert index.flagged_positions().tolist() == brute_force_flags(begins.tolist(),ends.tolist(),groups.tolist())
+    assert index.double_counted_minutes() == brute_force_double_counted(begins.tolist(),ends.tolist(),groups.tolist())
+    report = index.report()
+    assert (groups[report['position']] == groups[report['other_position']]).all()
+    assert (report['overlap_minutes']>0).all()
+
+def test_touching_shifts_do_not_overlap():
+    index = ShiftIntervalIndex([0,60,120],[60,120,180])
+    assert len(index.report()) == 0 and index.double_counted_minutes() == 0
+
+def test_report_and_policies(overlapping_directory):
+    df,total_hours = extract_worked_hour_as_df(6,2022,'X',drop_date_from_beginning_end=False,
+                                               raw_directory=overlapping_directory,cache=False)
+    overlaps = find_shift_overlaps(df)
+    assert overlaps[['overlaps','kind','overlap_minutes']].values.tolist() == [[0,'overlap',60],[2,'duplicate',60]]
+    assert overlaps.index.tolist() == [1,3]
+    with pytest.raises(ValueError,match='counted twice'):
+        apply_overlap_policy(df,'error')
+    merged,merged_total = apply_overlap_policy(df,'merge')
+    assert (total_hours,merged_total) == ('6:00','4:00')
+    assert merged['Hours'].tolist() == ['03:00','01:00']
+    assert merged['Notes'].tolist() == ['Review; Call','Docs']
+    with pytest.raises(ValueError):
+        apply_overlap_policy(df,'ignore')
@@ -0,0 +1,48 @@
+import datetime
+import os
+
+import pytest
+
+from utils.invoice_utils import extract_worked_hour_as_df, generate_and_save_pdf
+from utils.pdf_utils import PDFTemplate, get_pdf_bytes, output_pdf, wait_for_pdf_writes
+
+def build_page(text):
+    template = PDFTemplate()
+    template.pdf.set_compression(False) # So the text can be searched in the bytes
+    template.pdf.set_font('arial','',12)
+    template.pdf.cell(40,10,'Static',0,1)
+    template.add_slot('value',40,10,ln=1)
+    pdf = template.render(value=text)
+    pdf.set_document_date(datetime.datetime(2022,6,30))
+    return template,pdf
+
+def test_rendering_leaves_the_template_unchanged():
+    template,pdf = build_page('First')
+    assert (pdf.x,pdf.y) == (template.pdf.x,template.pdf.y)
+    second = template.render(value='Second')
+    second.set_document_date(datetime.datetime(2022,6,30))
+    assert b'(First)' in get_pdf_bytes(pdf) and b'(First)' not in get_pdf_bytes(second)
+    template.pdf.set_document_date(datetime.datetime(2022,6,30))
+    assert b'(First)' not in get_pdf_bytes(template.pdf)
+
+def test_pinned_date_gives_the_same_bytes():
+    assert get_pdf_bytes(build_page('Same')[1]) == get_pdf_bytes(build_page('Same')[1])
+    assert b"/CreationDate (D:20220630000000)" in get_pdf_bytes(build_page('Same')[1])
+
+def test_every_destination_gives_the_same_document(tmp_path):
+    content = output_pdf(build_page('Text')[1],None,'bytes')
+    output_pdf(build_page('Text')[1],str(tmp_path/'now.pdf'))
+    output_pdf(build_page('Text')[1],str(tmp_path/'later'/'background.pdf'),'background')
+    wait_for_pdf_writes()
+    assert (tmp_path/'now.pdf').read_bytes() == content == (tmp_path/'later'/'background.pdf').read_bytes()
+    with pytest.raises(ValueError):
+        output_pdf(build_page('Text')[1],None,'printer')
+
+def test_hour_report_bytes_match_the_written_file(raw_directory,example_config,tmp_path):
+    employee_data,company_data_by_name = example_config
+    df,total_hours = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory)
+    arguments = (df,6,2022,total_hours,company_data_by_name['CompanyName'],employee_data)
+    content = generate_and_save_pdf(*arguments,destination='bytes',report_date='2022-06-30')
+    generate_and_save_pdf(*arguments,output_directory=str(tmp_path/'reports'),report_date='2022-06-30')
+    written, = os.listdir(tmp_path/'reports')
+    assert (tmp_path/'reports'/written).read_bytes() == content
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+pytest.importorskip('matplotlib')
+
+from utils.config_utils import ConfigRegistry
+from utils.plot_utils import export_registry_weekly_plots, export_weekly_plots
+
+def test_weekly_plots_are_saved_in_every_format(tmp_path,raw_directory):
+    results = export_weekly_plots([('CompanyName',6,2022)],formats=('png','svg'),output_directory=str(tmp_path/'images'),
+                                  raw_directory=raw_directory,max_workers=1)
+    assert results[0]['error'] is None
+    assert sorted(os.listdir(tmp_path/'images')) == ['CompanyName_062022_week_distribution.png',
+                                                     'CompanyName_062022_week_distribution.svg']
+
+def test_people_of_the_same_company_get_their_own_plots(tmp_path,raw_directory,example_config):
+    employee_data,company_data_by_name = example_config
+    people = [dict(employee_data,id='A',raw_directory=raw_directory),dict(employee_data,id='B',raw_directory=raw_directory)]
+    registry = ConfigRegistry(people,list(company_data_by_name.values()))
+    results = export_registry_weekly_plots(registry,output_directory=str(tmp_path/'images'),max_workers=1)
+    assert [(result['person'],result['error']) for result in results] == [('A',None),('B',None)]
+    for person_id in ('A','B'):
+        assert os.path.exists(tmp_path/'images'/person_id/'CompanyName_062022_week_distribution.png')
@@ -0,0 +1,39 @@
+import json
+
+from utils.invoice_utils import extract_worked_hour_as_df
+from utils.profiling_utils import Profiler, profile_stage, profiled
+
+@profiled
+def outer():
+    with profile_stage('inner') as stage:
+        stage.rows = 3
+    with profile_stage('inner') as stage:
+        stage.rows = 4
+
+def test_stages_nest_and_add_up():
+    with Profiler() as profiler:
+        outer()
+    assert [(record['path'],record['depth'],record['rows']) for record in profiler.to_dicts()] == [
+        ('outer/inner',1,3),('outer/inner',1,4),('outer',0,None)]
+    lines = profiler.summary().splitlines()
+    assert lines[1].split()[:2] == ['outer','1']
+    assert lines[2].split()[:2] == ['inner','2'] and lines[2].split()[4] == '7'
+    assert all(record['peak_bytes'] is not None for record in profiler.to_dicts())
+
+def test_pipeline_stages_are_recorded(raw_directory,tmp_path):
+    with Profiler(trace_memory=False) as profiler:
+        extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory,cache=False)
+    profiler.to_json(str(tmp_path/'profile.json'))
+    with open(tmp_path/'profile.json') as f:
+        stages = {stage['path']:stage for stage in json.load(f)['stages']}
+    assert stages['extract_worked_hour_as_df/parse_worked_hour_file/read_csv']['rows'] == 61
+    assert stages['extract_worked_hour_as_df/parse_worked_hour_file/parse_dates']['rows'] == 60
+    assert stages['extract_worked_hour_as_df']['peak_bytes'] is None
+
+def test_nothing_is_recorded_without_a_profiler():
+    with Profiler() as profiler:
+        pass
+    outer()
+    with profile_stage('idle') as stage:
+        stage.rows = 1
+    assert profiler.records == []
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from utils.duration_utils import ROUNDING_POLICIES, round_minutes, split_rounded_minutes
+from utils.invoice_utils import extract_worked_hour_as_df, get_minutes_from_hhmm
+from utils.project_utils import assign_projects, check_project_rules, get_line_items
+
+RULES = [{'name':'Odd','pattern':r'note \d*[13579]$'},
+         {'name':'Teens','pattern':r'note 1\d$','rate':2}]
+
+def test_assign_projects_takes_the_first_matching_rule():
+    notes = np.array(['Sample note 11','Sample note 12','Sample note 3',np.nan],dtype=object)
+    assert assign_projects(notes,RULES).tolist() == [0,1,0,-1]
+
+def test_check_project_rules_rejects_bad_rules():
+    with pytest.raises(ValueError):
+        check_project_rules([{'name':'No pattern'}])
+    with pytest.raises(ValueError):
+        check_project_rules([{'name':'Bad','pattern':'('}])
+
+@pytest.mark.parametrize('policy',list(ROUNDING_POLICIES))
+def test_split_rounded_minutes_adds_up_to_the_rounded_total(policy):
+    minutes = np.array([595,836,2596,0,1])
+    rounded = split_rounded_minutes(minutes,policy)
+    assert rounded.sum() == round_minutes(int(minutes.sum()),policy)
+    assert (rounded>=0).all()
+
+@pytest.mark.parametrize('policy',list(ROUNDING_POLICIES))
+def test_line_items_bill_the_same_time_as_the_unsplit_invoice(raw_directory,policy):
+    df,_ = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory,cache=False)
+    minutes = get_minutes_from_hhmm(df['Hours'])
+    split = get_line_items(minutes,df['Notes'],RULES,1,policy)
+    unsplit = get_line_items(minutes,df['Notes'],[],1,policy)
+    assert len(split) == 3
+    assert split['minutes'].sum() == unsplit['minutes'].sum() == round_minutes(int(minutes.sum()),policy)
+
+def test_line_items_of_the_sample_month_bill_67_hours(raw_directory):
+    df,_ = extract_worked_hour_as_df(6,2022,'CompanyName',raw_directory=raw_directory,cache=False)
+    line_items = get_line_items(get_minutes_from_hhmm(df['Hours']),df['Notes'],RULES,1,'floor_hour')
+    assert line_items['minutes'].sum() == 67*60
+    assert (line_items['minutes']%60 == 0).all()
@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils.rate_utils import ExchangeRateStore, get_exchange_rate_store
+
+RATES = pd.DataFrame({'date':['2022-06-15','2022-06-01','2022-07-01','2022-06-01'],
+                      'pair':['GBP/USD','GBP/USD','gbp / usd','EUR/USD'],
+                      'rate':[1.3,1.2,1.25,1.05]})
+
+def test_rate_in_force_on_a_date():
+    store = ExchangeRateStore(RATES)
+    assert store.get_rate('GBP/USD','2022-06-14') == 1.2
+    assert store.get_rate('GBP/USD','2022-06-15') == 1.3
+    assert store.get_rate('GBP/USD','2023-01-01') == 1.25
+    assert store.get_rate('USD/GBP','2022-06-01') == 1/1.2
+    assert store.get_rate('USD/USD','2022-06-01') == 1
+    assert store.get_rates('GBP/USD',['2022-06-01','2022-07-02']).tolist() == [1.2,1.25]
+    with pytest.raises(ValueError):
+        store.get_rate('GBP/USD','2022-05-31')
+
+def test_monthly_averages_and_conversion():
+    store = ExchangeRateStore(RATES)
+    assert store.get_monthly_average('GBP/USD',2022,6) == 1.25
+    assert store.get_monthly_average('USD/GBP',2022,7) == 0.8
+    assert store.get_monthly_averages('GBP/USD',[2022,2022],[7,6]).tolist() == [1.25,1.25]
+    converted = store.convert_monthly([10000,10000,10000],['GBP/USD','EUR/USD','USD/USD'],2022,6)
+    assert converted.tolist() == [12500,10500,10000]
+    assert store.convert_monthly([12345],'GBP/USD',[2022],[6],rounding_minor=100).tolist() == [15400]
+    with pytest.raises(ValueError):
+        store.get_monthly_average('GBP/USD',2022,8)
+
+def test_missing_pairs_and_bad_rates_are_value_errors():
+    with pytest.raises(ValueError,match='No exchange rates for GBP/EUR'):
+        ExchangeRateStore(RATES).get_rate('GBP/EUR','2022-06-01')
+    with pytest.raises(ValueError):
+        ExchangeRateStore(pd.DataFrame({'date':['2022-06-01'],'pair':['GBP/USD'],'rate':[0]}))
+
+def test_the_store_is_reloaded_when_the_file_changes(tmp_path):
+    path = tmp_path/'rates.csv'
+    path.write_text('date,pair,rate\n2022-06-01,GBP/USD,1.2\n')
+    store = get_exchange_rate_store(str(path))
+    assert get_exchange_rate_store(str(path)) is store
+    path.write_text('date,pair,rate\n2022-06-01,GBP/USD,1.3\n')
+    os.utime(path,(1,1))
+    assert get_exchange_rate_store(str(path)).get_rate('GBP/USD','2022-06-01') == 1.3
+    with pytest.raises(FileNotFoundError):
+        get_exchange_rate_store(str(tmp_path/'missing.csv'))
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from tests.conftest import write_raw_file
+from utils.search_utils import NotesIndex, get_note_tokens
+
+JUNE = [('Do., Juni 30','10:00','12:00','2std 0m','Réunion ABC-123'),
+        ('Mi., Juni 29','09:00','10:00','1std 0m','Project review'),
+        ('Di., Juni 28','09:00','09:30','0std 30m','Projection ABC-124')]
+JULY = [('Fr., Juli 1','14:00','14:45','0std 45m','project REVIEW')]
+
+@pytest.fixture
+def raw_files(tmp_path):
+    directory = tmp_path/'raw'
+    directory.mkdir()
+    write_raw_file(directory,'A_062022.csv',JUNE)
+    write_raw_file(directory,'B_072022.csv',JULY)
+    return str(directory/'*.csv')
+
+def test_note_tokens():
+    assert get_note_tokens('Fixed ABC-123') == ('123','abc','abc-123','fixed')
+    assert get_note_tokens('Réunion, v2.1') == ('1','reunion','v2','v2.1')
+
+def test_search_terms_prefixes_and_filters(raw_files):
+    index = NotesIndex()
+    assert index.update(raw_files,person='MI',cache=False) == 2
+    assert index.hours('review') == 1.75
+    assert index.hours('REVIEW project') == 1.75
+    assert index.hours('proj*') == 2.25
+    assert index.hours('abc-123') == 2 and index.hours('abc') == 2.5
+    assert index.hours('reunion') == index.hours('Réunion') == 2
+    assert index.hours('review',companies=['B']) == 0.75
+    assert index.hours('review',end='2022-06-30') == 1
+    assert index.hours('review',persons=['someone else']) == 0
+    assert index.hours('missing') == index.hours('') == 0
+    found = index.search('review')
+    assert found[['Company','Person','Notes']].values.tolist() == [['A','MI','Project review'],['B','MI','project REVIEW']]
+
+def test_only_changed_files_are_parsed_again(raw_files,tmp_path):
+    index = NotesIndex()
+    index.update(raw_files,cache=False)
+    index_path = str(tmp_path/'index'/'notes_index.pkl')
+    index.save(index_path)
+    index = NotesIndex.load(index_path)
+    assert index.update(raw_files,cache=False) == 0
+    write_raw_file(tmp_path/'raw','B_072022.csv',JULY+[('Fr., Juli 1','9:00','9:15','0std 15m','Standup')])
+    assert index.update(raw_files,cache=False) == 1
+    assert index.hours('standup') == 0.25 and index.hours('review') == 1.75
+    os.remove(tmp_path/'raw'/'A_062022.csv')
+    assert index.update(raw_files,cache=False) == 0
+    assert index.hours('review') == 0.75 and len(index) == 2
+
+def test_unreadable_index_files_load_empty(tmp_path):
+    path = tmp_path/'notes_index.pkl'
+    path.write_bytes(b'not a pickle')
+    assert len(NotesIndex.load(str(path))) == 0
+    assert len(NotesIndex.load(str(tmp_path/'missing.pkl'))) == 0
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from tests.conftest import SAMPLE_TOTAL_MINUTES
+from utils.invoice_utils import extract_worked_hour_as_df
+from utils.shift_utils import ShiftStore, extract_worked_hour_as_store
+
+def test_round_trip_renders_the_same_frame(raw_directory):
+    for drop_date in [True,False]:
+        df,_ = extract_worked_hour_as_df(6,2022,'CompanyName',drop_date_from_beginning_end=drop_date,
+                                         raw_directory=raw_directory)
+        store = extract_worked_hour_as_store(6,2022,'CompanyName',raw_directory=raw_directory)
+        rendered = store.to_frame(drop_date_from_beginning_end=drop_date)
+        for column in df.columns:
+            assert rendered[column].tolist() == df[column].tolist(),column
+
+def test_totals_and_selection(raw_directory):
+    store = extract_worked_hour_as_store(6,2022,'CompanyName',raw_directory=raw_directory)
+    assert len(store) == 60
+    assert store.minutes.sum() == SAMPLE_TOTAL_MINUTES
+    assert store.total_hours() == '67:07'
+    first_week = store[store.dates()<np.datetime64('2022-06-08')]
+    assert len(first_week)+len(store[store.dates()>=np.datetime64('2022-06-08')]) == 60
+    assert store.nbytes < store.to_frame().memory_usage(deep=True).sum()
+
+def test_concat_keeps_the_notes_of_every_store():
+    first = ShiftStore([19173],[23*60],[25*60],['Overnight'])
+    second = ShiftStore([19174,19174],[9*60,10*60],[9*60+30,10*60+5],[np.nan,'Call'])
+    store = ShiftStore.concat([first,second])
+    df = store.to_frame(drop_date_from_beginning_end=False)
+    assert df['End'].iloc[0] == pd.Timestamp('2022-07-01 01:00')
+    assert df['Hours'].tolist() == ['02:00','00:30','00:05']
+    assert df['Notes'].iloc[[0,2]].tolist() == ['Overnight','Call'] and pd.isna(df['Notes'].iloc[1])
+    assert len(ShiftStore.concat([])) == 0
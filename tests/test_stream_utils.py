@@ -0,0 +1,37 @@
+import pytest
+
+from tests.conftest import write_raw_file
+from utils.invoice_utils import parse_worked_hour_file
+from utils.stream_utils import iter_worked_hours_by_month
+
+# Newest first, over the turn of the year
+ROWS = [('Mo., Jan. 2','10:00','11:00','1std 0m','New year'),
+        ('Sa., Dez. 31','23:00','1:00','2std 0m','Overnight'),
+        ('Do., Dez. 1','9:00','9:30','0std 30m','Start of December'),
+        ('Mi., Nov. 30','8:00','12:15','4std 15m','End of November'),
+        ('Di., Nov. 1','8:00','8:05','0std 5m','Start of November')]
+
+@pytest.mark.parametrize('chunksize',[1,2,100])
+def test_months_are_split_whatever_the_chunk_size(tmp_path,chunksize):
+    path = write_raw_file(tmp_path,'X.csv',ROWS,'7std 50m')
+    months = list(iter_worked_hours_by_month(path,2023,chunksize=chunksize))
+    assert [(year,month,len(df),total_hours) for year,month,df,total_hours in months] == [
+        (2023,1,1,'1:00'),(2022,12,2,'2:30'),(2022,11,2,'4:20')]
+    assert months[1][2]['End'].iloc[0].isoformat() == '2023-01-01T01:00:00'
+
+def test_a_single_month_equals_the_full_parse(tmp_path):
+    path = write_raw_file(tmp_path,'X.csv',ROWS[3:],'4std 20m')
+    (year,month,df,total_hours), = iter_worked_hours_by_month(path,2022,chunksize=1)
+    expected,expected_total = parse_worked_hour_file(path,2022)
+    assert (year,month,total_hours) == (2022,11,expected_total)
+    assert df.equals(expected.reset_index(drop=True))
+
+def test_summary_rows_anywhere_are_skipped(tmp_path):
+    path = write_raw_file(tmp_path,'X.csv',ROWS[:2])
+    with open(path,encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    lines.insert(2,',,Gesamt:,1std 0m,0m,')
+    with open(path,'w',encoding='utf-8') as f:
+        f.write('\n'.join(lines)+'\n')
+    months = [(year,month,len(df)) for year,month,df,_ in iter_worked_hours_by_month(path,2023,chunksize=1)]
+    assert months == [(2023,1,1),(2022,12,1)]
@@ -0,0 +1,23 @@
+import re
+
+import pytest
+
+from benchmarks.synthetic_worklog import SYNTHETIC_FORMATS, generate_synthetic_export
+from utils.invoice_utils import get_minutes_from_total_hours, parse_worked_hour_file
+
+@pytest.mark.parametrize('language',list(SYNTHETIC_FORMATS))
+def test_synthetic_exports_parse_to_their_totals_row(tmp_path,language):
+    path = tmp_path/f'Synthetic_{language}.csv'
+    export = generate_synthetic_export(500,month=2,year=2024,overnight_share=0.2,language=language)
+    export.to_csv(path,index=False)
+    hours,minutes = map(int,re.fullmatch(r'(\d+)\D+ (\d+)m',export.iloc[-1,3]).groups())
+    df,total_hours = parse_worked_hour_file(str(path),2024)
+    assert len(df) == 500
+    assert (df['End']>df['Begin']).all()
+    assert (df['Begin'].dt.month == 2).all()
+    assert get_minutes_from_total_hours(total_hours) == hours*60+minutes
+
+def test_generation_is_reproducible():
+    first = generate_synthetic_export(50,seed=3)
+    assert first.equals(generate_synthetic_export(50,seed=3))
+    assert not first.equals(generate_synthetic_export(50,seed=4))
@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import REPOSITORY_DIRECTORY
+from worklog import main, parse_args
+
+def write_config(tmp_path,employee_data,company_data_by_name,people):
+    path = tmp_path/'people.json'
+    path.write_text(json.dumps({'people':[dict(employee_data,**person) for person in people],
+                                'companies':list(company_data_by_name.values())}))
+    return str(path)
+
+def test_batch_exits_with_zero_when_every_job_succeeds(tmp_path,raw_directory,example_config,output_directories):
+    config_path = write_config(tmp_path,*example_config,[{'id':'A','raw_directory':raw_directory,'pay_rate':1}])
+    assert main(['batch','--config',config_path,'--gbp-to-usd','1.2','--workers','1']) == 0
+
+def test_batch_exits_with_one_when_a_job_fails(tmp_path,raw_directory,example_config,output_directories,capsys):
+    config_path = write_config(tmp_path,*example_config,[{'id':'A','raw_directory':raw_directory,'pay_rate':1},
+                                                         {'id':'B','raw_directory':raw_directory}])
+    assert main(['batch','--config',config_path,'--gbp-to-usd','1.2','--workers','1']) == 1
+    assert 'FAILED' in capsys.readouterr().out
+
+def test_month_without_year_is_an_argument_error():
+    with pytest.raises(SystemExit):
+        parse_args(['batch','--month','6'])
+
+@pytest.mark.parametrize('statement,unexpected',[
+    ('import worklog; worklog.parse_args(["hours","--month","6","--year","2022","--company","X"])',
+     ['pandas','numpy','fpdf','matplotlib']),
+    ('import utils.invoice_utils',['fpdf','matplotlib']),
+])
+def test_heavy_modules_are_imported_lazily(statement,unexpected):
+    # A fresh interpreter, the test process has imported everything already
+    code = f'import sys; {statement}; print([name for name in {unexpected!r} if name in sys.modules])'
+    output = subprocess.run([sys.executable,'-c',code],capture_output=True,text=True,check=True,
+                            cwd=REPOSITORY_DIRECTORY).stdout
+    assert output.strip() == '[]'
+
+def test_invoice_utils_loads_the_pdf_class_on_use():
+    import utils.invoice_utils
+    from utils.pdf_utils import PDF
+    assert utils.invoice_utils.PDF is PDF
@@ -0,0 +1,202 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_utils import expand_raw_files, parse_raw_file_name
+from utils.calendar_utils import get_calendar_index
+from utils.invoice_utils import MINUTES_PER_DAY, RAW_DIRECTORY
+from utils.shift_utils import ShiftStore, extract_worked_hour_as_store
+
+NOTE_KEYWORD_PATTERN = re.compile(r'\w+')
+
+class WorklogAnalytics:
+    """
+    Aggregates over the shifts of many months and companies.
+
+    The shifts are held as one ShiftStore plus categorical company and person columns, so every query is a NumPy
+    bincount over integer codes and never touches the CSV files. Results are hours as floats.
+    """
+
+    def __init__(self,store,companies,persons=None):
+        """
+        Parameters:
+        - store (ShiftStore): The shifts.
+        - companies (array-like): Company name of every shift.
+        - persons (array-like, optional): Person id of every shift. Defaults to '' for every shift.
+        """
+        self.store = store
+        self.companies = pd.Categorical(companies)
+        self.persons = pd.Categorical(np.full(len(store),'',dtype=object) if persons is None else persons)
+
+    @classmethod
+    def from_raw_files(cls,files=None,person='',**kwargs):
+        """
+        Parse raw data files named '{company}_{MMYYYY}.csv' into a WorklogAnalytics object.
+
+        Parsing goes through extract_worked_hour_as_df, so files seen before are loaded from the parse cache.
+
+        Parameters:
+        - files (str or list, optional): Glob pattern(s) or paths. Defaults to every CSV file of RAW_DIRECTORY.
+        - person (str): The person whose shifts they are, e.g. the initials of the employee. Default is ''.
+        - kwargs: Passed on to extract_worked_hour_as_df, e.g. cache=False.
+
+        Returns:
+        - WorklogAnalytics: The shifts of all files.
+        """
+        return cls._from_person_files([(person,file_path) for file_path
+                                       in expand_raw_files(files or os.path.join(RAW_DIRECTORY,'*.csv'))],**kwargs)
+
+    @classmethod
+    def from_registry(cls,registry,person_ids=None,company_names=None,periods=None,**kwargs):
+        """
+        Parse the raw data files of every person of a config registry, each from their own raw directory.
+
+        Parameters:
+        - registry (utils.config_utils.ConfigRegistry): The people and companies.
+        - person_ids, company_names, periods: Narrow down the files, see ConfigRegistry.get_jobs.
+        - kwargs: Passed on to extract_worked_hour_as_df, e.g. cache=False.
+
+        Returns:
+        - WorklogAnalytics: The shifts of all files, with the id of their person.
+        """
+        return cls._from_person_files(registry.get_jobs(person_ids,company_names,periods),**kwargs)
+
+    @classmethod
+    def _from_person_files(cls,person_files,**kwargs):
+        """
+        Parse (person, file path) pairs into a WorklogAnalytics object.
+        """
+        stores = []
+        companies = []
+        persons = []
+        for person,file_path in person_files:
+            company_name,month,year = parse_raw_file_name(file_path)
+            store = extract_worked_hour_as_store(month,year,company_name,
+                                                 raw_directory=os.path.dirname(file_path),**kwargs)
+            stores.append(store)
+            companies.append(np.full(len(store),company_name,dtype=object))
+            persons.append(np.full(len(store),person,dtype=object))
+        companies = np.concatenate(companies) if companies else []
+        persons = np.concatenate(persons) if persons else []
+        return cls(ShiftStore.concat(stores),companies,persons)
+
+    def __len__(self):
+        return len(self.store)
+
+    def select(self,start=None,end=None,companies=None,persons=None):
+        """
+        Keep only the shifts in a date range and/or of some companies or people, e.g. for year-to-date figures.
+
+        Parameters:
+        - start (str or datetime-like, optional): First date included.
+        - end (str or datetime-like, optional): Last date included.
+        - companies (list, optional): Company names to keep.
+        - persons (list, optional): Person ids to keep.
+
+        Returns:
+        - WorklogAnalytics: The selected shifts.
+        """
+        mask = np.ones(len(self),dtype=bool)
+        if start is not None:
+            mask &= self.store.days>=np.datetime64(pd.Timestamp(start).date(),'D').astype(np.int64)
+        if end is not None:
+            mask &= self.store.days<=np.datetime64(pd.Timestamp(end).date(),'D').astype(np.int64)
+        if companies is not None:
+            mask &= np.isin(self.companies.codes,self.companies.categories.get_indexer(list(companies)))
+        if persons is not None:
+            mask &= np.isin(self.persons.codes,self.persons.categories.get_indexer(list(persons)))
+        return WorklogAnalytics(self.store[mask],self.companies[mask],self.persons[mask])
+
+    def total_hours(self):
+        """
+        Returns:
+        - float: The hours worked in all shifts.
+        """
+        return self.store.minutes.sum(dtype=np.int64)/60
+
+    def hours_by_week(self):
+        """
+        Get the hours worked in every ISO week, shifts counting for the week they begin in.
+
+        Returns:
+        - pd.Series: Hours indexed by (ISO year, ISO week), weeks without shifts left out.
+        """
+        calendar_index = get_calendar_index()
+        keys = (calendar_index.iso_year(self.store.days).astype(np.int64)*100
+                +calendar_index.iso_week(self.store.days))
+        unique_keys,inverse = np.unique(keys,return_inverse=True)
+        minutes = np.bincount(inverse,weights=self.store.minutes,minlength=len(unique_keys))
+        index = pd.MultiIndex.from_arrays([unique_keys//100,unique_keys%100],names=['Year','Week'])
+        return pd.Series(minutes/60,index=index,name='Hours')
+
+    def hours_by_weekday(self):
+        """
+        Get the hours worked on every weekday, shifts counting for the day they begin on.
+
+        Returns:
+        - pd.Series: Hours indexed by day name, Monday first.
+        """
+        minutes = np.bincount(get_calendar_index().weekday(self.store.days),weights=self.store.minutes,minlength=7)
+        return pd.Series(minutes/60,index=pd.Index(['Monday','Tuesday','Wednesday','Thursday','Friday','Saturday',
+                                                    'Sunday'],name='Weekday'),name='Hours')
+
+    def hours_by_hour_of_day(self):
+        """
+        Get the hours worked in every hour of the day, splitting shifts over the hours they cover.
+
+        Returns:
+        - pd.Series: Hours indexed by hour of the day, 0 to 23.
+        """
+        # Shifts start and stop on a two-day minute grid; the running sum of the starts minus the stops is
+        # the number of shifts on at every minute
+        begin_minutes = self.store.begin_minutes
+        end_minutes = np.minimum(self.store.end_minutes,2*MINUTES_PER_DAY)
+        changes = (np.bincount(begin_minutes,minlength=2*MINUTES_PER_DAY+1)
+                   -np.bincount(end_minutes,minlength=2*MINUTES_PER_DAY+1))
+        shifts_on = np.cumsum(changes[:2*MINUTES_PER_DAY]).reshape(2,MINUTES_PER_DAY).sum(axis=0)
+        return pd.Series(shifts_on.reshape(24,60).sum(axis=1)/60,index=pd.RangeIndex(24,name='Hour'),name='Hours')
+
+    def hours_by_company(self):
+        """
+        Returns:
+        - pd.Series: Hours indexed by company name.
+        """
+        minutes = np.bincount(self.companies.codes,weights=self.store.minutes,
+                              minlength=len(self.companies.categories))
+        return pd.Series(minutes/60,index=pd.Index(self.companies.categories,name='Company'),name='Hours')
+
+    def hours_by_person(self):
+        """
+        Returns:
+        - pd.Series: Hours indexed by person id.
+        """
+        minutes = np.bincount(self.persons.codes,weights=self.store.minutes,minlength=len(self.persons.categories))
+        return pd.Series(minutes/60,index=pd.Index(self.persons.categories,name='Person'),name='Hours')
+
+    def hours_by_keyword(self,keywords=None):
+        """
+        Get the hours worked per word of the notes, case insensitive.
+
+        A shift counts in full for every distinct word of its note. Shifts without notes are left out.
+
+        Parameters:
+        - keywords (list, optional): Words to report. Defaults to every word found in the notes.
+
+        Returns:
+        - pd.Series: Hours indexed by keyword, largest first.
+        """
+        notes = self.store.notes
+        # Hours per distinct note, then spread over the words of each note
+        note_minutes = np.bincount(notes.codes[notes.codes>=0],weights=self.store.minutes[notes.codes>=0],
+                                   minlength=len(notes.categories))
+        minutes_by_keyword = {}
+        for note,minutes in zip(notes.categories,note_minutes):
+            for keyword in set(NOTE_KEYWORD_PATTERN.findall(str(note).lower())):
+                minutes_by_keyword[keyword] = minutes_by_keyword.get(keyword,0)+minutes
+        hours = pd.Series(minutes_by_keyword,dtype=float,name='Hours')/60
+        if keywords is not None:
+            hours = hours.reindex([keyword.lower() for keyword in keywords],fill_value=0.)
+        hours.index.name = 'Keyword'
+        return hours.sort_values(ascending=False,kind='stable')
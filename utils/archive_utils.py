@@ -0,0 +1,370 @@
+import codecs
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_utils import expand_raw_files, parse_raw_file_name
+from utils.cache_utils import get_file_hash
+from utils.invoice_utils import (HHMM_STRINGS, MINUTES_PER_DAY, get_datetimes_from_components, get_file_language,
+                                 get_minutes_from_hhmm, get_month_and_day_from_dates)
+from utils.shift_utils import ShiftStore
+
+ARCHIVE_DIRECTORY = os.path.join(os.path.abspath(''),"4-Archive")
+ARCHIVE_VERSION = 1 # Bump whenever the layout of the files changes
+ARCHIVE_FILE_NAMES = {'records':'shifts.bin','heap':'strings.bin','header':'archive.json'}
+# Fixed-width record of every shift: begin and end in minutes since 1970-01-01, ids in the company and person
+# tables of the header, and offsets in the string heap of the note (-1 without one) and of the date, hours
+# and pause texts of the row as exported
+ARCHIVE_RECORD_DTYPE = np.dtype([('begin','<i4'),('end','<i4'),('company','<u2'),('person','<u2'),
+                                 ('note','<i8'),('date_text','<i8'),('hours_text','<i8'),('pause_text','<i8')])
+ARCHIVE_TEXT_COLUMNS = {'date_text':'Date','hours_text':'Hours','pause_text':'Pause'}
+HEAP_LENGTH_DTYPE = np.dtype('<u4') # Every string of the heap is its UTF-8 length followed by its bytes
+H_MM_STRINGS = np.array([f'{minutes//60}:{minutes%60:02d}' for minutes in range(MINUTES_PER_DAY)]) # "H:MM", as some exports write the hours
+
+def encode_heap_strings(strings,heap_offset):
+    """
+    Encode strings for the string heap, every distinct string once.
+
+    Parameters:
+    - strings (array-like): The strings.
+    - heap_offset (int): The offset in the heap the encoded bytes will be appended at.
+
+    Returns:
+    - offsets (np.ndarray): The heap offset of every string.
+    - data (bytes): The bytes to append to the heap.
+    """
+    codes,uniques = pd.factorize(pd.Series(strings,dtype=object))
+    encoded = [str(string).encode('utf-8') for string in uniques]
+    sizes = np.array([HEAP_LENGTH_DTYPE.itemsize+len(string) for string in encoded],dtype=np.int64)
+    unique_offsets = heap_offset+np.concatenate([[0],np.cumsum(sizes)[:-1]]).astype(np.int64)
+    data = b''.join(len(string).to_bytes(HEAP_LENGTH_DTYPE.itemsize,'little')+string for string in encoded)
+    return unique_offsets[codes],data
+
+class WorklogArchive:
+    """
+    Append-only binary archive of the shifts of every ingested worklog export, read through numpy.memmap.
+
+    The archive is a directory with three files: the fixed-width records of the shifts (ARCHIVE_RECORD_DTYPE),
+    the string heap their notes and exported texts point into, and a JSON header with the company and person
+    tables and one segment per ingested file. Opening the archive maps the files without reading them, so
+    years of history open instantly and a query only pages in the records of the segments it touches.
+
+    Every segment keeps what the shifts alone do not say about its file (header, language, total rows, line
+    endings), so export_csv writes the ingested files back byte for byte. Re-ingesting a file that changed
+    appends its new version and retires the old segment. There is a single writer at a time.
+
+        archive = WorklogArchive()
+        archive.append_raw_files('0-RawData/*.csv',person='MyInitials')
+        archive.to_frame(start='2022-01-01',companies=['CompanyName'])
+    """
+
+    def __init__(self,directory=None):
+        """
+        Parameters:
+        - directory (str, optional): The archive directory, created on the first append. Defaults to ARCHIVE_DIRECTORY.
+        """
+        self.directory = directory or ARCHIVE_DIRECTORY
+        try:
+            with open(self._get_path('header')) as f:
+                self.header = json.load(f)
+        except FileNotFoundError:
+            self.header = {'version':ARCHIVE_VERSION,'companies':[],'persons':[],'segments':[],
+                           'records':0,'heap_bytes':0}
+        if self.header['version']!=ARCHIVE_VERSION:
+            raise ValueError(f"'{self.directory}' is a version {self.header['version']} archive, "
+                             f'this version reads version {ARCHIVE_VERSION}')
+        self._map()
+
+    def _get_path(self,name):
+        return os.path.join(self.directory,ARCHIVE_FILE_NAMES[name])
+
+    def _map(self):
+        """
+        Map the records and the heap listed in the header, anything written after them is ignored.
+        """
+        if self.header['records']:
+            self.records = np.memmap(self._get_path('records'),dtype=ARCHIVE_RECORD_DTYPE,mode='r',
+                                     shape=(self.header['records'],))
+        else:
+            self.records = np.zeros(0,dtype=ARCHIVE_RECORD_DTYPE)
+        if self.header['heap_bytes']:
+            self.heap = np.memmap(self._get_path('heap'),dtype=np.uint8,mode='r',shape=(self.header['heap_bytes'],))
+        else:
+            self.heap = np.zeros(0,dtype=np.uint8)
+
+    def __len__(self):
+        return sum(segment['stop']-segment['start'] for segment in self.segments)
+
+    @property
+    def segments(self):
+        """
+        list: The segments of the files in the archive, the retired ones left out.
+        """
+        return [segment for segment in self.header['segments'] if segment['active']]
+
+    def _get_id(self,table,name):
+        """
+        Get the id of a company or person, adding it to its table of the header.
+        """
+        names = self.header[table]
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def append_raw_files(self,files,person=''):
+        """
+        Ingest raw data files.
+
+        Parameters:
+        - files (str or list): Glob pattern(s) or paths of '{company}_{MMYYYY}.csv' files.
+        - person (str): The person whose shifts they are, e.g. the initials of the employee. Default is ''.
+
+        Returns:
+        - int: The number of files appended, the files archived before and unchanged since are skipped.
+        """
+        return sum(self.append_raw_file(file_path,person) for file_path in expand_raw_files(files))
+
+    def append_raw_file(self,file_path,person=''):
+        """
+        Ingest a raw data file, see append_raw_files.
+
+        Returns:
+        - bool: Whether the file was appended.
+        """
+        company_name,month,year = parse_raw_file_name(file_path)
+        file_name = os.path.basename(file_path)
+        file_hash = get_file_hash(file_path)
+        previous = [segment for segment in self.segments
+                    if segment['file']==file_name and segment['person']==person]
+        if any(segment['hash']==file_hash for segment in previous):
+            return False
+
+        with open(file_path,'rb') as f:
+            content = f.read()
+        encoding = 'utf-8-sig' if content.startswith(codecs.BOM_UTF8) else 'utf-8'
+        first_line_end = content.find(b'\n')
+        line_terminator = '\r\n' if first_line_end>0 and content[first_line_end-1:first_line_end]==b'\r' else '\n'
+        df = pd.read_csv(io.BytesIO(content),dtype=str,keep_default_na=False,encoding=encoding)
+        if len(df.columns)!=6:
+            raise ValueError(f"'{file_path}' has {len(df.columns)} columns, worklog exports have 6")
+        file_language = get_file_language(df.columns)
+        columns = list(df.columns)
+        df.columns = ['Date','Begin','End','Hours','Pause','Notes']
+
+        # Total rows are kept as they are, with their place in the file (see utils.invoice_utils.is_summary_row)
+        is_summary = ((df['Date']=='') | (df['Begin']=='') | (df['End']=='')).to_numpy()
+        summary_rows = [[int(position),df.iloc[position].tolist()] for position in np.flatnonzero(is_summary)]
+        shifts = df[~is_summary]
+
+        # Newest shift first: the year goes down each time the month goes up, as in iter_worked_hours_by_month
+        months,days = get_month_and_day_from_dates(shifts['Date'],file_language)
+        previous_months = np.concatenate([months[:1],months[:-1]])
+        years = year-np.cumsum(months>previous_months)
+        day_numbers = get_datetimes_from_components(years,months,days).astype('datetime64[D]').astype(np.int64)
+        begin_minutes = get_minutes_from_hhmm(shifts['Begin'])
+        end_minutes = get_minutes_from_hhmm(shifts['End'])
+        times = np.concatenate([shifts['Begin'].to_numpy(dtype=str),shifts['End'].to_numpy(dtype=str)])
+        time_minutes = np.concatenate([begin_minutes,end_minutes])
+        if (HHMM_STRINGS[time_minutes]==times).all():
+            padded_times = True
+        elif (H_MM_STRINGS[time_minutes]==times).all():
+            padded_times = False
+        else:
+            raise ValueError(f"'{file_path}' mixes \"HH:MM\" and \"H:MM\" times, it cannot be archived as exported")
+        end_minutes = end_minutes+np.where(end_minutes<begin_minutes,MINUTES_PER_DAY,0)
+
+        records = np.zeros(len(shifts),dtype=ARCHIVE_RECORD_DTYPE)
+        records['begin'] = day_numbers*MINUTES_PER_DAY+begin_minutes
+        records['end'] = day_numbers*MINUTES_PER_DAY+end_minutes
+        records['company'] = self._get_id('companies',company_name)
+        records['person'] = self._get_id('persons',person)
+        notes = shifts['Notes'].to_numpy(dtype=object)
+        has_note = notes!=''
+        offsets,heap_data = encode_heap_strings(np.concatenate([notes[has_note]]+[shifts[column].to_numpy(dtype=object)
+                                                                                  for column in ARCHIVE_TEXT_COLUMNS.values()]),
+                                                self.header['heap_bytes'])
+        records['note'] = -1
+        records['note'][has_note] = offsets[:has_note.sum()]
+        for i,field in enumerate(ARCHIVE_TEXT_COLUMNS):
+            records[field] = offsets[has_note.sum()+i*len(shifts):has_note.sum()+(i+1)*len(shifts)]
+
+        # The data goes first and the header last, so an interrupted append leaves the archive as it was
+        os.makedirs(self.directory,exist_ok=True)
+        self._write_at('records',self.header['records']*ARCHIVE_RECORD_DTYPE.itemsize,records.tobytes())
+        self._write_at('heap',self.header['heap_bytes'],heap_data)
+        for segment in previous:
+            segment['active'] = False
+        start = self.header['records']
+        self.header['segments'].append({'file':file_name,'hash':file_hash,'company':company_name,'person':person,
+                                        'month':month,'year':year,'language':file_language,'columns':columns,
+                                        'encoding':encoding,'line_terminator':line_terminator,
+                                        'trailing_line_terminator':content.endswith(b'\n'),
+                                        'padded_times':padded_times,'summary_rows':summary_rows,
+                                        'first_minute':int(records['begin'].min()) if len(records) else None,
+                                        'last_minute':int(records['begin'].max()) if len(records) else None,
+                                        'start':start,'stop':start+len(records),'active':True})
+        self.header['records'] += len(records)
+        self.header['heap_bytes'] += len(heap_data)
+        self._save_header()
+        self._map()
+        return True
+
+    def _write_at(self,name,position,data):
+        """
+        Write data at a position of an archive file, cutting off what an interrupted append left after it.
+        """
+        file_path = self._get_path(name)
+        with open(file_path,'r+b' if os.path.exists(file_path) else 'wb') as f:
+            f.truncate(position)
+            f.seek(position)
+            f.write(data)
+
+    def _save_header(self):
+        file_path = self._get_path('header')
+        temporary_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(temporary_path,'w') as f:
+            json.dump(self.header,f,ensure_ascii=False)
+        os.replace(temporary_path,file_path)
+
+    def get_strings(self,offsets):
+        """
+        Read strings from the heap, every distinct offset once.
+
+        Parameters:
+        - offsets (np.ndarray): Heap offsets, -1 for a missing string.
+
+        Returns:
+        - np.ndarray: object array with the strings, NaN for the missing ones.
+        """
+        codes,unique_offsets = pd.factorize(np.asarray(offsets,dtype=np.int64))
+        strings = np.full(len(unique_offsets)+1,np.nan,dtype=object)
+        present = np.flatnonzero(unique_offsets>=0)
+        starts = unique_offsets[present]+HEAP_LENGTH_DTYPE.itemsize
+        lengths = self.heap[starts[:,None]-np.arange(HEAP_LENGTH_DTYPE.itemsize,0,-1)].copy().view(HEAP_LENGTH_DTYPE)[:,0].astype(np.int64)
+        # Gather the bytes of all the strings in one go, then cut them apart
+        ends = np.cumsum(lengths)
+        data = self.heap[np.arange(ends[-1] if len(ends) else 0)+np.repeat(starts-(ends-lengths),lengths)].tobytes()
+        strings[present] = [data[end-length:end].decode('utf-8') for end,length in zip(ends.tolist(),lengths.tolist())]
+        return strings[codes]
+
+    def positions(self,start=None,end=None,companies=None,persons=None):
+        """
+        Get the positions of the archived shifts.
+
+        Only the records of the segments overlapping the dates are read, the others are not paged in.
+
+        Parameters:
+        - start (str or datetime-like, optional): First date included.
+        - end (str or datetime-like, optional): Last date included.
+        - companies (list, optional): Company names to include.
+        - persons (list, optional): Persons to include.
+
+        Returns:
+        - np.ndarray: Positions in self.records, in the order the shifts were appended.
+        """
+        start_minute = None if start is None else int(pd.Timestamp(start).to_datetime64().astype('datetime64[D]').astype(np.int64))*MINUTES_PER_DAY
+        end_minute = None if end is None else (int(pd.Timestamp(end).to_datetime64().astype('datetime64[D]').astype(np.int64))+1)*MINUTES_PER_DAY
+        ranges = [(segment['start'],segment['stop']) for segment in self.segments
+                  if segment['stop']>segment['start']
+                  and (companies is None or segment['company'] in companies)
+                  and (persons is None or segment['person'] in persons)
+                  and (start_minute is None or segment['last_minute']>=start_minute)
+                  and (end_minute is None or segment['first_minute']<end_minute)]
+        if not ranges:
+            return np.zeros(0,dtype=np.int64)
+        positions = np.concatenate([np.arange(first,stop) for first,stop in ranges])
+        if start_minute is not None or end_minute is not None:
+            begin = self.records['begin'][positions]
+            keep = np.ones(len(positions),dtype=bool)
+            if start_minute is not None:
+                keep &= begin>=start_minute
+            if end_minute is not None:
+                keep &= begin<end_minute
+            positions = positions[keep]
+        return positions
+
+    def to_store(self,positions=None):
+        """
+        Get archived shifts as a ShiftStore.
+
+        Parameters:
+        - positions (np.ndarray, optional): Positions of the shifts, see positions. Defaults to every shift.
+
+        Returns:
+        - ShiftStore: The shifts.
+        """
+        if positions is None:
+            positions = self.positions()
+        records = self.records[positions]
+        days = records['begin']//MINUTES_PER_DAY
+        return ShiftStore(days,records['begin']-days*MINUTES_PER_DAY,records['end']-days*MINUTES_PER_DAY,
+                          self.get_strings(records['note']),self.get_strings(records['pause_text']))
+
+    def to_frame(self,start=None,end=None,companies=None,persons=None,drop_date_from_beginning_end=True):
+        """
+        Get archived shifts as a worklog DataFrame, see positions for the filters.
+
+        Returns:
+        - pd.DataFrame: The shifts, as returned by extract_worked_hour_as_df, plus their 'Company' and 'Person'.
+        """
+        positions = self.positions(start,end,companies,persons)
+        df = self.to_store(positions).to_frame(drop_date_from_beginning_end)
+        records = self.records[positions]
+        df['Company'] = np.asarray(self.header['companies'],dtype=object)[records['company']]
+        df['Person'] = np.asarray(self.header['persons'],dtype=object)[records['person']]
+        return df
+
+    def get_segment_csv(self,segment):
+        """
+        Render a segment in the CSV format of the worklog app, as the file it was ingested from.
+
+        Parameters:
+        - segment (dict): A segment of self.segments.
+
+        Returns:
+        - str: The content of the file.
+        """
+        records = self.records[segment['start']:segment['stop']]
+        time_strings = HHMM_STRINGS if segment['padded_times'] else H_MM_STRINGS
+        notes = self.get_strings(records['note'])
+        df = pd.DataFrame({'Date':self.get_strings(records['date_text']),
+                           'Begin':time_strings[records['begin']%MINUTES_PER_DAY],
+                           'End':time_strings[records['end']%MINUTES_PER_DAY],
+                           'Hours':self.get_strings(records['hours_text']),
+                           'Pause':self.get_strings(records['pause_text']),
+                           'Notes':np.where(pd.isna(notes),'',notes)})
+        # Put the total rows back in their place
+        rows = df.to_numpy(dtype=object).tolist()
+        for position,cells in segment['summary_rows']:
+            rows.insert(position,cells)
+        content = pd.DataFrame(rows,columns=segment['columns']).to_csv(index=False,
+                                                                       lineterminator=segment['line_terminator'])
+        if not segment['trailing_line_terminator']:
+            content = content[:-len(segment['line_terminator'])]
+        return content
+
+    def export_csv(self,directory,companies=None,persons=None):
+        """
+        Write the archived files back in the CSV format of the worklog app, under their original names.
+
+        Parameters:
+        - directory (str): The directory the files are written to.
+        - companies (list, optional): Company names to include.
+        - persons (list, optional): Persons to include.
+
+        Returns:
+        - list: The paths of the written files.
+        """
+        os.makedirs(directory,exist_ok=True)
+        file_paths = []
+        for segment in self.segments:
+            if (companies is not None and segment['company'] not in companies) or (persons is not None and segment['person'] not in persons):
+                continue
+            file_path = os.path.join(directory,segment['file'])
+            with open(file_path,'w',encoding=segment['encoding'],newline='') as f:
+                f.write(self.get_segment_csv(segment))
+            file_paths.append(file_path)
+        return file_paths
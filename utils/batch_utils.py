@@ -0,0 +1,366 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import os
+import re
+import time
+import traceback
+
+from utils.cache_utils import get_file_hash
+from utils.invoice_utils import (INVOICE_CURRENCY_PAIR, PROCESSED_DIRECTORY, PROCESSED_HOURS_DIRECTORY,
+                                 extract_worked_hour_as_df, generate_and_save_pdf, generate_invoice,
+                                 get_hour_report_path, get_invoice_path, get_rate_source)
+from utils.rate_utils import RATES_PATH, get_exchange_rate_store
+
+RAW_FILE_NAME_PATTERN = re.compile(r'^(?P<company_name>.+)_(?P<month>\d{2})(?P<year>\d{4})\.csv$')
+
+def parse_raw_file_name(file_path):
+    """
+    Get the company name, month and year from a raw data file named '{company}_{MMYYYY}.csv'.
+
+    Parameters:
+    - file_path (str): Path to the raw data file.
+
+    Returns:
+    - tuple: (company_name (str), month (int), year (int)).
+    """
+    match = RAW_FILE_NAME_PATTERN.match(os.path.basename(file_path))
+    if match is None:
+        raise ValueError(f"'{file_path}' does not follow the '{{company}}_{{MMYYYY}}.csv' naming pattern")
+    return match['company_name'], int(match['month']), int(match['year'])
+
+def expand_raw_files(files):
+    """
+    Expand a glob pattern or a list of paths and glob patterns into a sorted list of raw data files.
+
+    Parameters:
+    - files (str or list): A glob pattern, e.g. '0-RawData/*_2022.csv', or a list of paths and patterns.
+
+    Returns:
+    - list: The matching file paths, without duplicates.
+    """
+    if isinstance(files,str):
+        files = [files]
+    file_paths = set()
+    for pattern in files:
+        matches = glob.glob(pattern)
+        file_paths.update(matches if matches else [pattern])
+    return sorted(file_paths)
+
+def process_raw_file(file_path,company_data_by_name,employee_data,pay_rate,gbp_to_usd_rate,
+                     hour_report=True,invoice=True,rates_path=None,overlaps=None,person_id=None,output_subdirectory=None,
+                     report_date=None,rate_source=None):
+    """
+    Generate the hour report and the invoice for a single raw data file.
+
+    Exceptions are caught and returned, so a failing job never stops the rest of a batch. The PDFs are written
+    by the PDF writer threads, so the hour report is written while the invoice is laid out.
+
+    Parameters:
+    - file_path (str): Path to a '{company}_{MMYYYY}.csv' raw data file.
+    - company_data_by_name (dict): Company data dictionaries indexed by company name.
+    - employee_data (dict): Dictionary containing the employee's details.
+    - pay_rate (float or None): The rate of pay per hour in GBP. The job fails when it is None and an invoice is asked for.
+    - gbp_to_usd_rate (float or None): The conversion rate from GBP to USD, None for the monthly average of the
+      exchange rate file.
+    - hour_report (bool): Whether to generate the hour report. Default is True.
+    - invoice (bool): Whether to generate the invoice. Default is True.
+    - rates_path (str, optional): Exchange rate CSV file used when gbp_to_usd_rate is None.
+    - overlaps (str, optional): How duplicated and overlapping shifts are handled, see extract_worked_hour_as_df.
+    - person_id (str, optional): The id of the person whose file it is, reported in the result.
+    - output_subdirectory (str, optional): Subdirectory of PROCESSED_HOURS_DIRECTORY and PROCESSED_DIRECTORY the
+      documents are saved to, e.g. '{person}/{company}'. Default is None, the directories themselves.
+    - report_date (str or datetime-like, optional): The date of the documents. Defaults to today.
+    - rate_source (str, optional): Where gbp_to_usd_rate comes from, printed on the invoice, see generate_invoice.
+
+    Returns:
+    - dict: Job result with keys 'file', 'person', 'company', 'month', 'year', 'seconds', 'error' (None on success)
+      and 'skipped' (the documents left out because they are up to date, filled in by run_jobs).
+    """
+    result = {'file':file_path,'person':person_id,'company':None,'month':None,'year':None,'seconds':0.,'error':None,
+              'skipped':[]}
+    hour_report_directory,invoice_directory = get_output_directories(output_subdirectory)
+    start = time.perf_counter()
+    try:
+        company_name,month,year = parse_raw_file_name(file_path)
+        result.update(company=company_name,month=month,year=year)
+        company_data = company_data_by_name[company_name]
+        if invoice and pay_rate is None:
+            raise ValueError(f"No pay rate for the invoice of '{person_id or employee_data.get('initials','')}', give "
+                             f"the person a 'pay_rate' in the config or the batch a default pay rate")
+        raw_directory = os.path.dirname(os.path.abspath(file_path))
+        writes = []
+        if hour_report:
+            df,total_hours = extract_worked_hour_as_df(month,year,company_name,raw_directory=raw_directory,
+                                                       overlaps=overlaps)
+            writes.append(generate_and_save_pdf(df,month,year,total_hours,company_data,employee_data,
+                                                destination='background',output_directory=hour_report_directory,
+                                                report_date=report_date))
+        if invoice:
+            writes.append(generate_invoice(month,year,gbp_to_usd_rate,pay_rate,company_data,employee_data,
+                                           raw_directory=raw_directory,destination='background',
+                                           rates_path=rates_path,overlaps=overlaps,output_directory=invoice_directory,
+                                           report_date=report_date,rate_source=rate_source))
+        # The job is only done once its files are on disk, and write errors are reported with it
+        for write in writes:
+            write.result()
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter()-start
+    return result
+
+def get_output_directories(output_subdirectory=None):
+    """
+    Get the directories the hour report and the invoice of a job are saved to.
+
+    Parameters:
+    - output_subdirectory (str, optional): Subdirectory of PROCESSED_HOURS_DIRECTORY and PROCESSED_DIRECTORY, e.g.
+      '{person}/{company}'.
+
+    Returns:
+    - tuple: (hour report directory, invoice directory), (None, None) for the default directories.
+    """
+    if not output_subdirectory:
+        return None,None
+    return os.path.join(PROCESSED_HOURS_DIRECTORY,output_subdirectory),os.path.join(PROCESSED_DIRECTORY,output_subdirectory)
+
+def get_batch_rates(file_paths,rates_path=None):
+    """
+    Get the monthly average GBP to USD rate of every raw data file of a batch, in one lookup.
+
+    Parameters:
+    - file_paths (list): Paths of '{company}_{MMYYYY}.csv' files.
+    - rates_path (str, optional): Exchange rate CSV file. Defaults to utils.rate_utils.RATES_PATH.
+
+    Returns:
+    - dict: Rate by file path. Files that are misnamed or whose month has no rates are left out (all of them
+      when there is no rate file), their job reports the error.
+    """
+    months = {}
+    for file_path in file_paths:
+        try:
+            months[file_path] = parse_raw_file_name(file_path)[1:]
+        except ValueError:
+            pass
+    if not months or not os.path.exists(rates_path or RATES_PATH):
+        return {}
+    store = get_exchange_rate_store(rates_path)
+    try:
+        rates = store.get_monthly_averages(INVOICE_CURRENCY_PAIR,[year for _,year in months.values()],
+                                           [month for month,_ in months.values()])
+    except ValueError:
+        # Some month is missing, look the months up one by one to keep the others
+        rates = []
+        for month,year in months.values():
+            try:
+                rates.append(store.get_monthly_average(INVOICE_CURRENCY_PAIR,year,month))
+            except ValueError:
+                rates.append(None)
+    return {file_path:float(rate) for file_path,rate in zip(months,rates) if rate is not None}
+
+def run_batch(files,company_data_by_name,employee_data,pay_rate,gbp_to_usd_rate,
+              hour_report=True,invoice=True,max_workers=None,rates_path=None,overlaps=None,archive_directory=None,
+              report_date=None,skip_unchanged=False,manifest_path=None):
+    """
+    Generate hour reports and invoices for many raw data files in parallel.
+
+    The jobs are spread over a process pool, so pandas, matplotlib and fpdf are imported once per worker
+    instead of once per document.
+
+    Parameters:
+    - files (str or list): A glob pattern or a list of paths/patterns of '{company}_{MMYYYY}.csv' files.
+    - company_data_by_name (dict): Company data dictionaries indexed by company name.
+    - employee_data (dict): Dictionary containing the employee's details.
+    - pay_rate (float): The rate of pay per hour in GBP.
+    - gbp_to_usd_rate (float or None): The conversion rate from GBP to USD. When None, every invoice uses the
+      monthly average of its month in the exchange rate file, looked up once for the whole batch.
+    - hour_report (bool): Whether to generate the hour reports. Default is True.
+    - invoice (bool): Whether to generate the invoices. Default is True.
+    - max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+    - rates_path (str, optional): Exchange rate CSV file used when gbp_to_usd_rate is None.
+    - overlaps (str, optional): How duplicated and overlapping shifts are handled, e.g. 'error' to fail the jobs
+      of the files that have some. See extract_worked_hour_as_df.
+    - archive_directory (str, optional): Archive the files of the successful jobs are appended to, under the
+      id (or initials) of the employee (see utils.archive_utils.WorklogArchive). Default is None, nothing is archived.
+    - report_date (str or datetime-like, optional): The date of every document, e.g. "2022-06-30". Defaults to today;
+      a pinned date makes the documents byte for byte reproducible.
+    - skip_unchanged (bool): Whether to skip the documents whose raw file, config, rates, report date and code are
+      the same as when they were last generated (see utils.manifest_utils.BuildManifest). Default is False.
+    - manifest_path (str, optional): The build manifest used with skip_unchanged. Defaults to
+      utils.manifest_utils.MANIFEST_PATH.
+
+    Returns:
+    - list: One result dictionary per file (see process_raw_file), in the order of the files.
+    """
+    file_paths = expand_raw_files(files)
+    rates = {}
+    if invoice and gbp_to_usd_rate is None:
+        rates = get_batch_rates(file_paths,rates_path)
+    # A file without a rate still gets a job, so the worker reports the missing rate with the others
+    jobs = [{'file_path':file_path,'company_data_by_name':company_data_by_name,'employee_data':employee_data,
+             'pay_rate':pay_rate,'gbp_to_usd_rate':rates.get(file_path,gbp_to_usd_rate),'hour_report':hour_report,
+             'invoice':invoice,'rates_path':rates_path,'overlaps':overlaps,'report_date':report_date,
+             'rate_source':get_rate_source(rates_path) if file_path in rates else None}
+            for file_path in file_paths]
+    results = run_jobs(jobs,max_workers,get_batch_manifest(skip_unchanged,manifest_path))
+    if archive_directory is not None:
+        # Appended here rather than in the workers, the archive has a single writer; failed files are left out
+        from utils.archive_utils import WorklogArchive
+        WorklogArchive(archive_directory).append_raw_files([result['file'] for result in results
+                                                            if result['error'] is None],
+                                                           person=employee_data.get('id',employee_data.get('initials','')))
+    return results
+
+def run_registry_batch(registry,pay_rate=None,gbp_to_usd_rate=None,person_ids=None,company_names=None,periods=None,
+                       hour_report=True,invoice=True,max_workers=None,rates_path=None,overlaps=None,
+                       archive_directory=None,report_date=None,skip_unchanged=False,manifest_path=None):
+    """
+    Generate the hour reports and invoices of every person, client and month of a config registry in one batch.
+
+    The registry is loaded once by the caller and the details of every job are sent along with it, so no worker
+    reads the config. With several people, the documents of every person and client go to their own
+    '{person}/{company}' subdirectory of PROCESSED_HOURS_DIRECTORY and PROCESSED_DIRECTORY.
+
+    Parameters:
+    - registry (utils.config_utils.ConfigRegistry): The people and companies.
+    - pay_rate (float, optional): The rate of pay per hour in GBP of the people without a 'pay_rate'. Without either,
+      the invoice jobs of the person fail.
+    - gbp_to_usd_rate (float or None): The conversion rate from GBP to USD, see run_batch.
+    - person_ids (list, optional): The people to include. Defaults to everyone.
+    - company_names (list, optional): The companies to include. Defaults to every company with raw files.
+    - periods (list, optional): (month, year) tuples to include. Defaults to every month with raw files.
+    - hour_report, invoice, max_workers, rates_path, overlaps, report_date, skip_unchanged, manifest_path: See run_batch.
+    - archive_directory (str, optional): Archive the files of the successful jobs are appended to, under the id of
+      their person (see utils.archive_utils.WorklogArchive). Default is None, nothing is archived.
+
+    Returns:
+    - list: One result dictionary per job (see process_raw_file), sorted by person and file.
+    """
+    person_files = registry.get_jobs(person_ids,company_names,periods)
+    rates = {}
+    if invoice and gbp_to_usd_rate is None:
+        rates = get_batch_rates([file_path for _,file_path in person_files],rates_path)
+    jobs = []
+    for person_id,file_path in person_files:
+        person = registry.get_person(person_id)
+        company_name = parse_raw_file_name(file_path)[0]
+        jobs.append({'file_path':file_path,'company_data_by_name':registry.companies,'employee_data':person,
+                     'pay_rate':person.get('pay_rate',pay_rate),'gbp_to_usd_rate':rates.get(file_path,gbp_to_usd_rate),
+                     'hour_report':hour_report,'invoice':invoice,'rates_path':rates_path,'overlaps':overlaps,
+                     'report_date':report_date,'person_id':person_id,
+                     'rate_source':get_rate_source(rates_path) if file_path in rates else None,
+                     'output_subdirectory':None if registry.single_employee else os.path.join(person_id,company_name)})
+    results = run_jobs(jobs,max_workers,get_batch_manifest(skip_unchanged,manifest_path))
+    if archive_directory is not None:
+        from utils.archive_utils import WorklogArchive
+        archive = WorklogArchive(archive_directory)
+        for result in results:
+            if result['error'] is None:
+                archive.append_raw_file(result['file'],person=result['person'])
+    return results
+
+def get_batch_manifest(skip_unchanged,manifest_path=None):
+    """
+    Load the build manifest of a batch that skips the unchanged documents.
+
+    Returns:
+    - BuildManifest or None: The manifest, None without skip_unchanged.
+    """
+    if not skip_unchanged:
+        return None
+    from utils.manifest_utils import BuildManifest
+    return BuildManifest.load(manifest_path)
+
+def get_job_documents(job):
+    """
+    Get the documents of a job and what each of them is built from, as recorded in the build manifest.
+
+    Parameters:
+    - job (dict): The keyword arguments of process_raw_file.
+
+    Returns:
+    - dict: (output path, dependencies) tuple by document, 'hour_report' and 'invoice'.
+    """
+    from utils.manifest_utils import get_code_version, get_config_hash
+    company_name,month,year = parse_raw_file_name(job['file_path'])
+    company_data = job['company_data_by_name'][company_name]
+    employee_data = job['employee_data']
+    hour_report_directory,invoice_directory = get_output_directories(job.get('output_subdirectory'))
+    dependencies = {'raw_file':get_file_hash(job['file_path']),'config':get_config_hash(company_data,employee_data),
+                    'code':get_code_version(),'overlaps':job.get('overlaps'),'report_date':job.get('report_date')}
+    documents = {}
+    if job.get('hour_report',True):
+        documents['hour_report'] = (get_hour_report_path(month,year,employee_data,hour_report_directory),dependencies)
+    if job.get('invoice',True):
+        documents['invoice'] = (get_invoice_path(month,year,company_data,invoice_directory),
+                                dict(dependencies,pay_rate=job['pay_rate'],gbp_to_usd_rate=job['gbp_to_usd_rate'],
+                                     rate_source=job.get('rate_source')))
+    return documents
+
+def run_jobs(jobs,max_workers=None,manifest=None):
+    """
+    Run process_raw_file jobs over a process pool.
+
+    Parameters:
+    - jobs (list): The keyword arguments of process_raw_file of every job.
+    - max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+    - manifest (BuildManifest, optional): Build manifest of the documents: the documents it has up to date are
+      skipped, the ones generated are recorded in it and it is saved. Default is None, everything is generated.
+
+    Returns:
+    - list: One result dictionary per job, in the order of jobs.
+    """
+    results = {}
+    documents = {}
+    futures = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for i,job in enumerate(jobs):
+            skipped = []
+            if manifest is not None:
+                try:
+                    documents[i] = get_job_documents(job)
+                except Exception:
+                    # Misnamed or missing files, unknown companies: the job reports the error
+                    documents[i] = {}
+                skipped = [name for name,(output_path,dependencies) in documents[i].items()
+                           if manifest.is_up_to_date(output_path,dependencies)]
+                if skipped and len(skipped)==len(documents[i]):
+                    company_name,month,year = parse_raw_file_name(job['file_path'])
+                    results[i] = {'file':job['file_path'],'person':job.get('person_id'),'company':company_name,
+                                  'month':month,'year':year,'seconds':0.,'error':None,'skipped':skipped}
+                    continue
+                job = dict(job,**{name:False for name in skipped})
+            futures[executor.submit(process_raw_file,**job)] = (i,skipped)
+        for future in as_completed(futures):
+            i,skipped = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception:
+                # The worker itself died (e.g. BrokenProcessPool)
+                results[i] = {'file':jobs[i]['file_path'],'person':jobs[i].get('person_id'),'company':None,
+                              'month':None,'year':None,'seconds':0.,'error':traceback.format_exc()}
+            results[i]['skipped'] = skipped
+    if manifest is not None:
+        for i,result in results.items():
+            if result['error'] is None:
+                for name,(output_path,dependencies) in documents[i].items():
+                    if name not in result['skipped']:
+                        manifest.record(output_path,dependencies)
+        manifest.save()
+    return [results[i] for i in range(len(jobs))]
+
+def print_batch_summary(results):
+    """
+    Print the timing and outcome of every job of a batch.
+
+    Parameters:
+    - results (list): Result dictionaries as returned by run_batch.
+    """
+    for result in results:
+        status = 'ok' if result['error'] is None else 'FAILED'
+        up_to_date = f" ({', '.join(result['skipped'])} up to date)" if result.get('skipped') else ''
+        print(f"{status:<7}{result['seconds']:>8.2f}s  {result['file']}{up_to_date}")
+    failed = [result for result in results if result['error'] is not None]
+    skipped = sum(len(result.get('skipped',[])) for result in results)
+    print(f'{len(results)-len(failed)}/{len(results)} jobs succeeded'+(f', {skipped} documents up to date' if skipped else ''))
+    for result in failed:
+        print(f"\n{result['file']}:\n{result['error']}")
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIRECTORY = os.path.join(os.path.abspath(''),".worklog_cache")
+CACHE_MAX_BYTES = 256*1024**2 # Least recently used entries are evicted above this size
+CACHE_EXTENSION = '.pkl'
+# Pickled frames are only read back by the pandas and NumPy versions that wrote them
+LIBRARY_VERSIONS = f'pandas{pd.__version__}_numpy{np.__version__}'
+# What unpickling an entry written by other library versions can raise, read as a cache miss
+CACHE_READ_ERRORS = (OSError,EOFError,pickle.UnpicklingError,AttributeError,ImportError,TypeError,ValueError)
+
+def get_file_hash(file_path,chunk_size=1024**2):
+    """
+    Get the SHA-256 hash of the content of a file.
+
+    Parameters:
+    - file_path (str): Path to the file.
+    - chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+    - str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path,'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size),b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_cache_key(file_path,*args):
+    """
+    Build the cache key of a raw data file: the hash of its content plus anything else the parsed result depends on,
+    and the pandas and NumPy versions.
+
+    Parameters:
+    - file_path (str): Path to the raw data file.
+    - args: Extra values the parsed result depends on, e.g. the parser version and the year.
+
+    Returns:
+    - str: The cache key, usable as a file name.
+    """
+    return '_'.join([get_file_hash(file_path)]+[str(arg) for arg in args]+[LIBRARY_VERSIONS])
+
+def load_from_cache(key,cache_directory=None):
+    """
+    Load a cached object and mark it as recently used.
+
+    Parameters:
+    - key (str): The cache key.
+    - cache_directory (str, optional): The cache directory. Defaults to CACHE_DIRECTORY.
+
+    Returns:
+    - object: The cached object, or None when the key is not cached or the entry cannot be read back, e.g. it was
+      written by other library versions.
+    """
+    cache_path = os.path.join(cache_directory or CACHE_DIRECTORY,key+CACHE_EXTENSION)
+    try:
+        with open(cache_path,'rb') as f:
+            cached = pickle.load(f)
+    except CACHE_READ_ERRORS:
+        return None
+    # The modification time is the last use, which is what eviction goes by
+    os.utime(cache_path)
+    return cached
+
+def save_to_cache(key,obj,cache_directory=None,max_bytes=None):
+    """
+    Save an object to the cache and evict the least recently used entries if the cache gets too large.
+
+    Parameters:
+    - key (str): The cache key.
+    - obj (object): The object to cache, it must be picklable.
+    - cache_directory (str, optional): The cache directory. Defaults to CACHE_DIRECTORY.
+    - max_bytes (int, optional): Maximum size of the cache. Defaults to CACHE_MAX_BYTES.
+    """
+    cache_directory = cache_directory or CACHE_DIRECTORY
+    os.makedirs(cache_directory,exist_ok=True)
+    cache_path = os.path.join(cache_directory,key+CACHE_EXTENSION)
+    # Write to a temporary file first so parallel jobs never read a partial entry
+    temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temporary_path,'wb') as f:
+        pickle.dump(obj,f,protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path,cache_path)
+    evict_cache(cache_directory,max_bytes)
+
+def evict_cache(cache_directory=None,max_bytes=None):
+    """
+    Remove the least recently used cache entries until the cache fits in max_bytes.
+
+    Parameters:
+    - cache_directory (str, optional): The cache directory. Defaults to CACHE_DIRECTORY.
+    - max_bytes (int, optional): Maximum size of the cache. Defaults to CACHE_MAX_BYTES.
+    """
+    cache_directory = cache_directory or CACHE_DIRECTORY
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(cache_directory):
+        return
+    entries = []
+    with os.scandir(cache_directory) as it:
+        for entry in it:
+            if entry.name.endswith(CACHE_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime,stat.st_size,entry.path))
+    total_bytes = sum(size for _,size,_ in entries)
+    for _,size,path in sorted(entries):
+        if total_bytes<=max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass # Already evicted by another process
+        total_bytes -= size
+
+def clear_cache(cache_directory=None):
+    """
+    Remove every entry of the cache.
+
+    Parameters:
+    - cache_directory (str, optional): The cache directory. Defaults to CACHE_DIRECTORY.
+    """
+    evict_cache(cache_directory,max_bytes=-1)
@@ -0,0 +1,153 @@
+import datetime
+from functools import lru_cache
+
+import numpy as np
+
+CALENDAR_FIRST_YEAR = 1970
+CALENDAR_LAST_YEAR = 2099
+EPOCH_ORDINAL = datetime.date(1970,1,1).toordinal()
+
+class CalendarIndex:
+    """
+    Precomputed calendar of a range of years, so date questions become array lookups.
+
+    Days are day numbers (days since 1970-01-01, as in ShiftStore) and months are addressed by year and month
+    number. Every lookup accepts scalars or arrays and raises ValueError outside the range of the index.
+    """
+
+    def __init__(self,first_year=CALENDAR_FIRST_YEAR,last_year=CALENDAR_LAST_YEAR):
+        """
+        Parameters:
+        - first_year (int): First year covered. Default is CALENDAR_FIRST_YEAR.
+        - last_year (int): Last year covered. Default is CALENDAR_LAST_YEAR.
+        """
+        self.first_year = first_year
+        self.last_year = last_year
+
+        # Month tables: first day number and length of every month of the range
+        month_starts = (np.arange((first_year-1970)*12,(last_year-1970+1)*12+1).astype('datetime64[M]')
+                        .astype('datetime64[D]').astype(np.int64))
+        self.month_first_days = month_starts[:-1].astype(np.int32)
+        self.month_lengths = np.diff(month_starts).astype(np.int8)
+        self.first_day = int(month_starts[0])
+
+        # Day tables
+        days = np.arange(month_starts[0],month_starts[-1])
+        self.weekdays = ((days+3)%7).astype(np.int8) # 1970-01-01 was a Thursday
+        # The Thursday of a week decides its ISO year, weeks are counted from the first Thursday
+        thursdays = days-self.weekdays+3
+        iso_years = thursdays.astype('datetime64[D]').astype('datetime64[Y]')
+        self.iso_weeks = ((thursdays-iso_years.astype('datetime64[D]').astype(np.int64))//7+1).astype(np.int8)
+        self.iso_years = (iso_years.astype(np.int64)+1970).astype(np.int16)
+        self.month_indexes = np.repeat(np.arange(len(self.month_lengths),dtype=np.int32),self.month_lengths)
+
+    def _day_positions(self,days):
+        positions = np.asarray(days,dtype=np.int64)-self.first_day
+        if (positions<0).any() or (positions>=len(self.weekdays)).any():
+            raise ValueError(f'Date outside the calendar range {self.first_year}-{self.last_year}')
+        return positions
+
+    def _month_positions(self,years,months):
+        years = np.asarray(years,dtype=np.int64)
+        months = np.asarray(months,dtype=np.int64)
+        if (months<1).any() or (months>12).any():
+            raise ValueError('Month number out of range')
+        if (years<self.first_year).any() or (years>self.last_year).any():
+            raise ValueError(f'Date outside the calendar range {self.first_year}-{self.last_year}')
+        return (years-self.first_year)*12+months-1
+
+    def day_numbers(self,years,months,days):
+        """
+        Get the day numbers of dates given as components.
+
+        Parameters:
+        - years (int or np.ndarray): The years.
+        - months (int or np.ndarray): The month numbers.
+        - days (int or np.ndarray): The days of the month.
+
+        Returns:
+        - np.ndarray: int64 day numbers.
+        """
+        month_positions = self._month_positions(years,months)
+        days = np.asarray(days,dtype=np.int64)
+        if (days<1).any() or (days>self.month_lengths[month_positions]).any():
+            raise ValueError('Day out of range for month')
+        return self.month_first_days[month_positions]+days-1
+
+    def weekday(self,days):
+        """
+        Returns:
+        - np.ndarray: The weekday of the days, Monday is 0.
+        """
+        return self.weekdays[self._day_positions(days)]
+
+    def iso_week(self,days):
+        """
+        Returns:
+        - np.ndarray: The ISO week number of the days.
+        """
+        return self.iso_weeks[self._day_positions(days)]
+
+    def iso_year(self,days):
+        """
+        Returns:
+        - np.ndarray: The ISO year of the days, which differs from the year around New Year.
+        """
+        return self.iso_years[self._day_positions(days)]
+
+    def month(self,days):
+        """
+        Returns:
+        - np.ndarray: The month number of the days.
+        """
+        return self.month_indexes[self._day_positions(days)]%12+1
+
+    def month_bounds(self,year,month):
+        """
+        Get the first and last day of a month.
+
+        Parameters:
+        - year (int or np.ndarray): The year.
+        - month (int or np.ndarray): The month number.
+
+        Returns:
+        - tuple: (first_day, last_day) day numbers.
+        """
+        month_positions = self._month_positions(year,month)
+        first_days = self.month_first_days[month_positions]
+        return first_days,first_days+self.month_lengths[month_positions]-1
+
+    def month_weeks(self,year,month):
+        """
+        Get the ISO weeks of the first and last day of a month.
+
+        Parameters:
+        - year (int): The year.
+        - month (int): The month number.
+
+        Returns:
+        - tuple: (first_week, last_week).
+        """
+        first_day,last_day = self.month_bounds(year,month)
+        return int(self.iso_week(first_day)),int(self.iso_week(last_day))
+
+    @staticmethod
+    def date(day):
+        """
+        Convert a day number to a datetime.date.
+        """
+        return datetime.date.fromordinal(int(day)+EPOCH_ORDINAL)
+
+@lru_cache(maxsize=None)
+def get_calendar_index(first_year=CALENDAR_FIRST_YEAR,last_year=CALENDAR_LAST_YEAR):
+    """
+    Get the calendar index of a range of years, built on first use and shared afterwards.
+
+    Parameters:
+    - first_year (int): First year covered. Default is CALENDAR_FIRST_YEAR.
+    - last_year (int): Last year covered. Default is CALENDAR_LAST_YEAR.
+
+    Returns:
+    - CalendarIndex: The index.
+    """
+    return CalendarIndex(first_year,last_year)
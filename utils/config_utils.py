@@ -0,0 +1,222 @@
+import glob
+import json
+import os
+
+from utils.batch_utils import RAW_FILE_NAME_PATTERN, parse_raw_file_name
+from utils.invoice_utils import RAW_DIRECTORY
+from utils.project_utils import check_project_rules
+
+EMPLOYEE_KEYS = ['name','initials','position','email','street','city','state','postcode','country','phone',
+                 'bank_name','bank_address','holder_name','swift','routing_nb','account_nb']
+COMPANY_KEYS = ['name','street','street_cont','city','postcode']
+CONFIG_FORMATS = ('.json','.toml')
+DEFAULT_CONFIG_PATH = 'config.json' # Personal details, not committed
+EXAMPLE_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'config.example.json')
+
+def get_config_path(config_path=DEFAULT_CONFIG_PATH):
+    """
+    Get the config file to read, config.example.json when the default config.json was not created.
+
+    Parameters:
+    - config_path (str): Path to the file. Default is DEFAULT_CONFIG_PATH.
+
+    Returns:
+    - str: The path of the file to read.
+    """
+    if config_path == DEFAULT_CONFIG_PATH and not os.path.exists(config_path):
+        return EXAMPLE_CONFIG_PATH
+    return config_path
+
+def read_config_file(config_path):
+    """
+    Read a JSON or TOML config file, told apart by its extension.
+
+    Parameters:
+    - config_path (str): Path to the file.
+
+    Returns:
+    - dict: The content of the file.
+    """
+    extension = os.path.splitext(config_path)[1].lower()
+    if extension not in CONFIG_FORMATS:
+        raise ValueError(f"Config files are expected as one of {list(CONFIG_FORMATS)}, got '{config_path}'")
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError(f"Reading '{config_path}' needs Python 3.11 or later (tomllib), use a JSON file instead") from None
+        with open(config_path,'rb') as f:
+            return tomllib.load(f)
+    with open(config_path) as f:
+        return json.load(f)
+
+class ConfigRegistry:
+    """
+    People and client companies of a config file, checked once and indexed by id.
+
+    A config has a 'people' list (or, as in config.example.json, a single 'employee') and a 'companies' list.
+    Every person has the EMPLOYEE_KEYS and optionally an 'id' (the initials by default), a 'raw_directory' with
+    the person's '{company}_{MMYYYY}.csv' files (0-RawData/{id} by default, 0-RawData itself for a single
+    'employee') and a 'pay_rate'. Companies are indexed by their name, the one in the raw file names.
+
+        registry = ConfigRegistry.from_file('config.toml')
+        registry.get_person('MyInitials'), registry.get_company('CompanyName')
+        registry.get_jobs() # every (person, raw file) pair
+    """
+
+    def __init__(self,people,companies,single_employee=False):
+        """
+        Parameters:
+        - people (list): The person dictionaries.
+        - companies (list): The company dictionaries.
+        - single_employee (bool): Whether the config has a single 'employee' whose files are in RAW_DIRECTORY itself.
+          Default is False.
+        """
+        self.people = {}
+        for person in people:
+            _check_keys(person,EMPLOYEE_KEYS,'person')
+            person_id = str(person.get('id',person['initials']))
+            if person_id in self.people:
+                raise ValueError(f"The person id '{person_id}' is used twice")
+            if 'pay_rate' in person and (not isinstance(person['pay_rate'],(int,float)) or person['pay_rate']<0):
+                raise ValueError(f"The pay rate of the person '{person_id}' must be a non-negative number")
+            self.people[person_id] = dict(person,id=person_id)
+        self.companies = {}
+        for company in companies:
+            _check_keys(company,COMPANY_KEYS,'company')
+            if company['name'] in self.companies:
+                raise ValueError(f"The company '{company['name']}' is listed twice")
+            check_project_rules(company.get('projects',[]))
+            self.companies[company['name']] = company
+        self.single_employee = single_employee
+
+    @classmethod
+    def from_file(cls,config_path=DEFAULT_CONFIG_PATH):
+        """
+        Load a registry from a JSON or TOML config file.
+
+        Parameters:
+        - config_path (str): Path to the file. Default is DEFAULT_CONFIG_PATH, or config.example.json when there is
+          no config.json.
+
+        Returns:
+        - ConfigRegistry: The registry.
+        """
+        config = read_config_file(get_config_path(config_path))
+        if 'people' in config:
+            return cls(config['people'],config.get('companies',[]))
+        return cls([config['employee']],config.get('companies',[]),single_employee=True)
+
+    def get_person(self,person_id=None):
+        """
+        Get the details of a person.
+
+        Parameters:
+        - person_id (str, optional): The id of the person. Can be left out when there is a single person.
+
+        Returns:
+        - dict: The person's details, with their 'id'.
+        """
+        if person_id is None:
+            if len(self.people)!=1:
+                raise ValueError(f'The config has {len(self.people)} people, choose one of {list(self.people)}')
+            return next(iter(self.people.values()))
+        try:
+            return self.people[person_id]
+        except KeyError:
+            raise ValueError(f"Unknown person '{person_id}', expected one of {list(self.people)}") from None
+
+    def get_company(self,company_name):
+        """
+        Get the details of a company.
+
+        Parameters:
+        - company_name (str): The name of the company.
+
+        Returns:
+        - dict: The company's details.
+        """
+        try:
+            return self.companies[company_name]
+        except KeyError:
+            raise ValueError(f"Unknown company '{company_name}', expected one of {list(self.companies)}") from None
+
+    def get_raw_directory(self,person_id=None):
+        """
+        Get the directory of the raw data files of a person.
+
+        Parameters:
+        - person_id (str, optional): The id of the person, see get_person.
+
+        Returns:
+        - str: The directory.
+        """
+        person = self.get_person(person_id)
+        if 'raw_directory' in person:
+            return os.path.abspath(person['raw_directory'])
+        return RAW_DIRECTORY if self.single_employee else os.path.join(RAW_DIRECTORY,person['id'])
+
+    def get_jobs(self,person_ids=None,company_names=None,periods=None):
+        """
+        List the raw data files of every person.
+
+        Parameters:
+        - person_ids (list, optional): The people to include. Defaults to everyone.
+        - company_names (list, optional): The companies to include. Defaults to every file, companies missing from
+          the config included, so their jobs report them.
+        - periods (list, optional): (month, year) tuples to include. Defaults to every month.
+
+        Returns:
+        - list: (person_id, file_path) tuples, sorted by person and file.
+        """
+        periods = None if periods is None else {(int(month),int(year)) for month,year in periods}
+        jobs = []
+        for person_id in (self.people if person_ids is None else person_ids):
+            raw_directory = self.get_raw_directory(person_id)
+            for file_path in sorted(glob.glob(os.path.join(raw_directory,'*.csv'))):
+                if not RAW_FILE_NAME_PATTERN.match(os.path.basename(file_path)):
+                    continue
+                company_name,month,year = parse_raw_file_name(file_path)
+                if company_names is not None and company_name not in company_names:
+                    continue
+                if periods is not None and (month,year) not in periods:
+                    continue
+                jobs.append((person_id,file_path))
+        return jobs
+
+def load_registry(config_path=DEFAULT_CONFIG_PATH):
+    """
+    Load the people and companies of a JSON or TOML config file, see ConfigRegistry.
+
+    Parameters:
+    - config_path (str): Path to the file. Default is DEFAULT_CONFIG_PATH, or config.example.json when there is
+      no config.json.
+
+    Returns:
+    - ConfigRegistry: The registry.
+    """
+    return ConfigRegistry.from_file(config_path)
+
+def load_config(config_path=DEFAULT_CONFIG_PATH):
+    """
+    Load the employee and company details from a JSON or TOML file (see config.example.json).
+
+    A company can have a 'projects' list of rules splitting its invoices into line items, see
+    utils.project_utils.check_project_rules.
+
+    Parameters:
+    - config_path (str): Path to the file, with an 'employee' dictionary (or a 'people' list with a single
+      person) and a 'companies' list. Default is DEFAULT_CONFIG_PATH, or config.example.json when there is no
+      config.json.
+
+    Returns:
+    - employee_data (dict): Dictionary containing the employee's details.
+    - company_data_by_name (dict): Company data dictionaries indexed by company name.
+    """
+    registry = load_registry(config_path)
+    return registry.get_person(),registry.companies
+
+def _check_keys(data,keys,kind):
+    missing = [key for key in keys if key not in data]
+    if missing:
+        raise ValueError(f"The {kind} '{data.get('name','')}' is missing the keys {missing}")
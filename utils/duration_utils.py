@@ -0,0 +1,196 @@
+import numpy as np
+
+MINUTES_PER_HOUR = 60
+MINOR_UNITS = 100 # Pence per pound, cents per dollar
+# Billing rounding policies: name -> (increment in minutes, direction)
+ROUNDING_POLICIES = {
+    'exact':(1,'nearest'),
+    'floor_hour':(60,'down'),
+    'nearest_hour':(60,'nearest'),
+    'ceil_hour':(60,'up'),
+    'floor_quarter':(15,'down'),
+    'nearest_quarter':(15,'nearest'),
+    'ceil_quarter':(15,'up'),
+}
+ROUNDING_INCREMENT_NAMES = {1:'minute',15:'quarter hour',60:'hour'}
+
+def round_minutes(minutes,policy='exact'):
+    """
+    Round durations in minutes following a billing rounding policy.
+
+    Parameters:
+    - minutes (int or np.ndarray): The durations, in minutes.
+    - policy (str): A key of ROUNDING_POLICIES, e.g. 'nearest_quarter'. Default is 'exact'.
+
+    Returns:
+    - int or np.ndarray: The rounded durations, in minutes. Halves are rounded up for 'nearest' policies.
+    """
+    try:
+        increment,direction = ROUNDING_POLICIES[policy]
+    except KeyError:
+        raise ValueError(f"Unknown rounding policy '{policy}', expected one of {list(ROUNDING_POLICIES)}") from None
+    minutes = np.asarray(minutes,dtype=np.int64)
+    if direction == 'down':
+        rounded = minutes//increment*increment
+    elif direction == 'up':
+        rounded = -(-minutes//increment)*increment
+    else:
+        rounded = (minutes+increment//2)//increment*increment
+    return rounded if rounded.ndim else int(rounded)
+
+def get_billable_minutes(minutes,policy='exact',per_shift=False):
+    """
+    Get the minutes to bill for a set of shifts.
+
+    Parameters:
+    - minutes (int or np.ndarray): The minutes of every shift, or a total.
+    - policy (str): A key of ROUNDING_POLICIES. Default is 'exact'.
+    - per_shift (bool): Whether to round every shift before adding them up, instead of rounding the total. Default is False.
+
+    Returns:
+    - int: The minutes to bill.
+    """
+    minutes = np.asarray(minutes,dtype=np.int64)
+    if per_shift:
+        return int(np.sum(round_minutes(minutes,policy)))
+    return round_minutes(int(minutes.sum()),policy)
+
+def describe_rounding(policy,exact_minutes,billed_minutes,per_shift=False):
+    """
+    Describe how the billed time of an invoice was rounded, e.g. "Billed time rounded down to the hour, 0:07 not billed".
+
+    Parameters:
+    - policy (str): A key of ROUNDING_POLICIES.
+    - exact_minutes (int): The minutes worked.
+    - billed_minutes (int): The minutes billed.
+    - per_shift (bool): Whether every shift was rounded rather than the total. Default is False.
+
+    Returns:
+    - str or None: The description, None for the 'exact' policy when nothing was rounded.
+    """
+    increment,direction = ROUNDING_POLICIES[policy]
+    difference = int(billed_minutes)-int(exact_minutes)
+    if increment == 1 and not difference:
+        return None
+    unit = ROUNDING_INCREMENT_NAMES.get(increment,f'{increment} minutes')
+    rounding = {'down':f'rounded down to the {unit}','up':f'rounded up to the {unit}',
+                'nearest':f'rounded to the nearest {unit}'}[direction]
+    description = f"Billed time{' of every shift' if per_shift else ''} {rounding}"
+    if difference<0:
+        return f'{description}, {format_duration(-difference)} not billed'
+    if difference>0:
+        return f'{description}, {format_duration(difference)} added'
+    return description
+
+def split_rounded_minutes(minutes,policy='exact'):
+    """
+    Round the durations of several lines so they add up to their rounded total, e.g. the projects of an invoice.
+
+    The total is rounded once. Every line is rounded down, and the increments left over go one each to the lines
+    with the largest unrounded remainders, so splitting a total never bills more or less than the total itself.
+
+    Parameters:
+    - minutes (np.ndarray): The durations of the lines, in minutes.
+    - policy (str): A key of ROUNDING_POLICIES. Default is 'exact'.
+
+    Returns:
+    - np.ndarray: The rounded durations, adding up to round_minutes(minutes.sum(),policy).
+    """
+    minutes = np.asarray(minutes,dtype=np.int64)
+    total = round_minutes(int(minutes.sum()),policy)
+    increment = ROUNDING_POLICIES[policy][0]
+    rounded = minutes//increment*increment
+    leftover = (total-int(rounded.sum()))//increment
+    # Largest remainders first, the earlier line on ties
+    rounded[np.argsort(-(minutes-rounded),kind='stable')[:leftover]] += increment
+    return rounded
+
+def to_minor_units(amount):
+    """
+    Convert an amount of money to integer minor units, e.g. 20.5 -> 2050.
+
+    Parameters:
+    - amount (float or np.ndarray): The amount in major units (pounds, dollars).
+
+    Returns:
+    - int or np.ndarray: The amount in minor units, rounded to the nearest one.
+    """
+    minor = np.rint(np.asarray(amount,dtype=float)*MINOR_UNITS).astype(np.int64)
+    return minor if minor.ndim else int(minor)
+
+def get_amount_for_minutes(minutes,hourly_rate_minor):
+    """
+    Get the amount due for durations at an hourly rate, in integer arithmetic.
+
+    Parameters:
+    - minutes (int or np.ndarray): The durations, in minutes.
+    - hourly_rate_minor (int or np.ndarray): The hourly rates, in minor units.
+
+    Returns:
+    - int or np.ndarray: The amounts in minor units, fractions of a minor unit rounded half up.
+    """
+    amount = (np.asarray(minutes,dtype=np.int64)*np.asarray(hourly_rate_minor,dtype=np.int64)*2
+              +MINUTES_PER_HOUR)//(2*MINUTES_PER_HOUR)
+    return amount if amount.ndim else int(amount)
+
+def convert_minor_units(amount_minor,rate,rounding_minor=1):
+    """
+    Convert amounts in minor units to another currency.
+
+    Parameters:
+    - amount_minor (int or np.ndarray): The amounts, in minor units.
+    - rate (float or np.ndarray): Units of the other currency per unit.
+    - rounding_minor (int): Round the result to a multiple of this many minor units, e.g. 100 for whole dollars. Default is 1.
+
+    Returns:
+    - int or np.ndarray: The converted amounts in minor units, rounded half to even.
+    """
+    converted = (np.rint(np.asarray(amount_minor,dtype=np.int64)*np.asarray(rate,dtype=float)/rounding_minor)
+                 .astype(np.int64)*rounding_minor)
+    return converted if converted.ndim else int(converted)
+
+def format_duration(minutes):
+    """
+    Format minutes as hours and minutes, e.g. 4027 -> "67:07". Hours are not limited to 24.
+
+    Parameters:
+    - minutes (int): The duration, in minutes.
+
+    Returns:
+    - str: The duration in "H:MM" format.
+    """
+    minutes = int(minutes)
+    sign = '-' if minutes<0 else ''
+    return f'{sign}{abs(minutes)//60}:{abs(minutes)%60:02d}'
+
+def format_hours_quantity(minutes):
+    """
+    Format minutes as a number of hours for an invoice line, e.g. 4020 -> "67" and 4035 -> "67.25".
+
+    Parameters:
+    - minutes (int): The duration, in minutes.
+
+    Returns:
+    - str: Whole hours without decimals, other durations with two decimals.
+    """
+    minutes = int(minutes)
+    if minutes%MINUTES_PER_HOUR == 0:
+        return str(minutes//MINUTES_PER_HOUR)
+    return f'{minutes/MINUTES_PER_HOUR:.2f}'
+
+def format_money(amount_minor,symbol='',thousands_separator=True):
+    """
+    Format an amount in minor units, e.g. 402700 -> "4,027.00".
+
+    Parameters:
+    - amount_minor (int): The amount, in minor units.
+    - symbol (str): Prefix, e.g. "£ ". Default is ''.
+    - thousands_separator (bool): Whether to group the thousands with commas. Default is True.
+
+    Returns:
+    - str: The formatted amount, with two decimals.
+    """
+    amount_minor = int(amount_minor)
+    sign = '-' if amount_minor<0 else ''
+    units = f'{abs(amount_minor)//MINOR_UNITS:,}' if thousands_separator else str(abs(amount_minor)//MINOR_UNITS)
+    return f'{sign}{symbol}{units}.{abs(amount_minor)%MINOR_UNITS:02d}'
@@ -0,0 +1,89 @@
+import csv
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from utils.cache_utils import LIBRARY_VERSIONS, load_from_cache, save_to_cache
+from utils.invoice_utils import (PARSER_VERSION, convert_shift_times, get_minutes_from_total_hours,
+                                 get_total_hours_from_minutes, parse_worked_hour_file, read_worklog_csv)
+
+def update_worked_hours(file_path,year,cache=True):
+    """
+    Parse a month-in-progress worklog incrementally.
+
+    The worklog app exports the newest shift first, so the rows added since the last call are the ones above the
+    last processed entry (its date, begin and the rest of its CSV record). Only those rows are parsed; they are put on top of the
+    stored frame and added to the running total. When the last processed entry is no longer in the file, e.g.
+    because it was edited, the whole file is parsed again.
+
+    Parameters:
+    - file_path (str): Path to a '{company}_{MMYYYY}.csv' file exported by the worklog app.
+    - year (int): The year the worked hours belong to.
+    - cache (bool): Whether to read and save the state of the file in the cache. Without it, the whole file is
+      parsed and nothing is written. Default is True.
+
+    Returns:
+    - df (pd.DataFrame): DataFrame with the worked hours, 'Begin' and 'End' as datetimes.
+    - total_hours (str): The total hours worked in "HH:MM" format.
+    """
+    if not cache:
+        return parse_worked_hour_file(file_path,year)
+    # Keyed on the full path, the raw directories of different people have files of the same name
+    path_hash = hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:16]
+    state_key = (f'incremental_{os.path.splitext(os.path.basename(file_path))[0]}_{path_hash}_v{PARSER_VERSION}_{year}'
+                 f'_{LIBRARY_VERSIONS}')
+    state = load_from_cache(state_key)
+
+    found = False
+    if state is not None:
+        header,new_records,found = _read_records_until(file_path,state['last_entry'])
+    if found and not new_records:
+        return state['df'],get_total_hours_from_minutes(state['total_minutes'])
+
+    if found:
+        new_df = _parse_records(header,new_records,year)
+        total_minutes = state['total_minutes']+int(convert_shift_times(new_df).sum())
+        df = pd.concat([new_df,state['df']],ignore_index=True)
+        last_entry = new_records[0]
+    else:
+        df,total_hours = parse_worked_hour_file(file_path,year)
+        total_minutes = get_minutes_from_total_hours(total_hours)
+        last_entry = _read_records_until(file_path,None,max_records=1)[1][0]
+
+    if len(df):
+        save_to_cache(state_key,{'df':df,'total_minutes':total_minutes,'last_entry':last_entry})
+    return df,get_total_hours_from_minutes(total_minutes)
+
+def _read_records_until(file_path,last_entry,max_records=None):
+    """
+    Read the CSV records of a worklog export from the top until the record equal to last_entry.
+
+    Returns:
+    - header (list): The column names.
+    - records (list): The records above last_entry (all records when it is None, at most max_records).
+    - found (bool): Whether last_entry was found.
+    """
+    records = []
+    with open(file_path,newline='',encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        for record in reader:
+            if last_entry is not None and record==last_entry:
+                return header,records,True
+            if max_records is not None and len(records)>=max_records:
+                break
+            records.append(record)
+    return header,records,last_entry is None
+
+def _parse_records(header,records,year):
+    """
+    Parse CSV records of a worklog export the same way parse_worked_hour_file parses a whole file.
+    """
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(header)
+    writer.writerows(records)
+    text.seek(0)
+    return read_worklog_csv(text,year)
@@ -1,77 +1,61 @@
-from calendar import monthrange
 import datetime
-from fpdf import FPDF
-from matplotlib.dates import DateFormatter,HourLocator
-import matplotlib.pyplot as plt
+from functools import lru_cache
+import importlib
+import json
 import numpy as np
 import os
 import pandas as pd
 
+from utils.cache_utils import get_cache_key, load_from_cache, save_to_cache
+from utils.calendar_utils import EPOCH_ORDINAL, get_calendar_index
+from utils.duration_utils import (MINOR_UNITS, convert_minor_units, describe_rounding, format_duration,
+                                  format_hours_quantity, format_money, round_minutes)
+from utils import locale_utils
+from utils.profiling_utils import profile_stage, profiled
+from utils.rate_utils import RATES_PATH, get_exchange_rate_store
+
 RAW_DIRECTORY = os.path.join(os.path.abspath(''),"0-RawData")
 PROCESSED_DIRECTORY = os.path.join(os.path.abspath(''),"1-Invoices")
 PROCESSED_HOURS_DIRECTORY = os.path.join(os.path.abspath(''),"2-ProcessedHours")
 DAYS = ['Monday','Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-
-class PDF(FPDF):
-    """
-    Custom PDF class inheriting from FPDF for generating PDF files.
-    This class overrides the default header and footer methods of FPDF to provide a custom header and footer.
-    """
-
-    # Uncommented and added docstring for header
-    # def header(self):
-    #     """
-    #     Overrides the default header method to set a custom header for the PDF.
-    #     Sets the font to Arial bold with size 15 and displays the title in the center.
-    #     """
-    #     # Arial bold 15
-    #     self.set_font('Arial', 'B', 15)
-    #     # Move to the right
-    #     self.cell(80)
-    #     # Title
-    #     self.cell(30, 10, 'Title', 1, 0, 'C')
-    #     # Line break
-    #     self.ln(20)
-
-    def footer(self):
-        """
-        Overrides the default footer method to set a custom footer for the PDF.
-        Sets the font to Arial italic with size 8 and displays the page number in the center.
-        """
-        # Position at 1.5 cm from bottom
-        self.set_y(-15)
-        # Arial italic 8
-        self.set_font('Arial', 'I', 8)
-        # Page number
-        self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
-
-
-def add_day_when_end_is_next_day(x):
-    """
-    Adjusts the 'End' field if it's earlier than the 'Begin' field by adding one day.
-    
-    Parameters:
-    - x (dict): Dictionary containing 'Begin', 'End', and 'Date' keys.
-
-    Returns:
-    - dict: Updated dictionary with corrected 'End' date-time.
+WORKLOG_COLUMNS = ['Date', 'Begin', 'End', 'Hours','Pause','Notes']
+# fpdf and matplotlib are only imported by the functions that draw with them, so parsing never pays for either
+LAZY_ATTRIBUTES = {'PDF':'utils.pdf_utils'}
+PARSER_VERSION = 3 # Bump whenever the parsed output changes, it invalidates the cached worklogs
+MINUTES_PER_DAY = 24*60
+INVOICE_ROUNDING_POLICY = 'floor_hour' # Invoices bill whole hours only, the minutes past the last full hour are printed as not billed
+INVOICE_CURRENCY_PAIR = 'GBP/USD' # Invoiced in GBP, paid in USD
+DEFAULT_RATE_SOURCE = "OANDA's monthly average rate" # Where hand-copied rates come from
+HHMM_STRINGS = np.array([f'{minutes//60:02d}:{minutes%60:02d}' for minutes in range(MINUTES_PER_DAY)]) # Lookup table for rendering minutes as "HH:MM"
+
+def __getattr__(name):
     """
-    if (x['Begin'] > x['End']):
-        x['End'] = x['Date'] + x['End'] + np.timedelta64(1, 'D')
-    else:
-        x['End'] = x['End'] + x['Date']
-    
-    return x  
+    Import the attributes listed in LAZY_ATTRIBUTES, e.g. the PDF class, on first access.
+    """
+    if name in LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(LAZY_ATTRIBUTES[name]),name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
-def extract_worked_hour_as_df(month,year,company_name,drop_date_from_beginning_end=True):
+@profiled
+def extract_worked_hour_as_df(month,year,company_name,drop_date_from_beginning_end=True,raw_directory=None,cache=True,
+                              incremental=False,overlaps=None):
     """
     Extracts worked hours from a CSV file and returns a DataFrame with the relevant details.
 
+    The parsed file is cached on disk, keyed on the hash of its content, so repeated calls for an unchanged file skip the CSV parsing.
+
     Parameters:
     - month (int or str): The month for which data is to be extracted.
     - year (int): The year for which data is to be extracted.
     - company_name (str): The name of the company, used in the filename.
     - drop_date_from_beginning_end (bool): Whether to drop the date part from 'Begin' and 'End' columns. Default is True.
+    - raw_directory (str, optional): Directory containing the CSV file. Defaults to RAW_DIRECTORY.
+    - cache (bool): Whether to use the parsed worklog cache. Default is True.
+    - incremental (bool): Whether to only parse the rows added since the last call for this file (see
+      utils.incremental_utils.update_worked_hours), for month-in-progress exports. Its state is kept in the cache,
+      so with cache=False the whole file is parsed. Default is False.
+    - overlaps (str, optional): How duplicated and overlapping shifts are handled before the total is computed,
+      a value of utils.overlap_utils.OVERLAP_POLICIES: 'warn', 'error' or 'merge'. Default is None (not checked).
 
     Returns:
     - df (pd.DataFrame): DataFrame with the worked hours.
@@ -82,76 +66,228 @@ def extract_worked_hour_as_df(month,year,company_name,drop_date_from_beginning_e
     if len(str(month))==1:
         month = '0'+str(month)
 
-    # Import the file
-    df = pd.read_csv(os.path.join(RAW_DIRECTORY,f'{company_name}_{month}{year}.csv'))
-    
-    # Get the file language
-    if df.columns[0] == 'Datum':
-        file_language = 'German'
-    elif df.columns[0] == 'Fecha':
-        file_language = 'Spanish'
+    if raw_directory is None:
+        raw_directory = RAW_DIRECTORY
+    file_path = os.path.join(raw_directory,f'{company_name}_{month}{year}.csv')
+
+    # The dates in the file have no year, so the parsed result depends on it too. Incremental mode keeps its own
+    # state in the cache instead
+    cache_key = None
+    if cache and not incremental:
+        with profile_stage('cache_lookup'):
+            cache_key = get_cache_key(file_path,f'v{PARSER_VERSION}',year)
+    cached = None
+    if incremental:
+        from utils.incremental_utils import update_worked_hours
+        cached = update_worked_hours(file_path,year,cache=cache)
+    elif cache_key is not None:
+        with profile_stage('cache_lookup'):
+            cached = load_from_cache(cache_key)
+    if cached is None:
+        df,total_hours = parse_worked_hour_file(file_path,year)
+        if cache_key is not None:
+            with profile_stage('cache_save'):
+                save_to_cache(cache_key,(df,total_hours))
     else:
-        file_language = 'Engish'
-    
-    # Remove the last row with the months total hours 
-    df.drop(index=df.index[-1], axis=0,inplace=True)
+        df,total_hours = cached
 
-    # Rename the columns
-    df.columns = ['Date', 'Begin', 'End', 'Hours','Pause','Notes']
+    if overlaps is not None:
+        from utils.overlap_utils import apply_overlap_policy
+        with profile_stage('overlaps') as stage:
+            df,merged_total_hours = apply_overlap_policy(df,overlaps)
+            total_hours = merged_total_hours or total_hours
+            stage.rows = len(df)
 
-    # Convert the date column to datetime
-    df['Date']=df['Date'].apply(get_datetime_object_from_date,args=(month,year,file_language,))
-
-    # Add date to beginning and end (Consider when the end date is the next day)
-    df['End']=pd.to_timedelta((df['End'].str.split(':', expand=True).astype(int) * (60, 1)).sum(axis=1), unit='min')
-    df['Begin']=pd.to_timedelta((df['Begin'].str.split(':', expand=True).astype(int) * (60, 1)).sum(axis=1), unit='min')
-    df = df.apply(lambda x: add_day_when_end_is_next_day(x), axis=1)
-    df['Begin'] = df['Date']+df['Begin'] 
-
-    # Recalculate hours and extract only hours as strings
-    df['Hours'] = df['End']-df['Begin']
-    total_hours = df['Hours'].sum().total_seconds()
-    hours_part = int(total_hours//3600)
-    minutes_part = int(total_hours%3600//60)
-    if len(str(minutes_part))==1:
-        minutes_part = '0'+str(minutes_part)
-    total_hours = f'{hours_part}:{minutes_part}'
-
-    df['Hours']=df['Hours'].apply(get_hhmm_from_timedelta)
-    
     if drop_date_from_beginning_end:
-        df['Begin'] = df['Begin'].dt.strftime("%H:%M")
-        df['End'] = df['End'].dt.strftime("%H:%M")
+        with profile_stage('format_times') as stage:
+            df['Begin'] = get_hhmm_from_datetimes(df['Begin'],df['Date'])
+            df['End'] = get_hhmm_from_datetimes(df['End'],df['Date'])
+            stage.rows = len(df)
     
 #     df['Notes'] = df.apply(lambda row : shorten_string(row['Notes'],40), axis = 1)
     return df,total_hours
 
+@profiled
+def parse_worked_hour_file(file_path,year):
+    """
+    Parse a CSV file exported by the worklog app into a DataFrame with full datetimes.
+
+    Parameters:
+    - file_path (str): Path to the CSV file.
+    - year (int): The year the worked hours belong to.
+
+    Returns:
+    - df (pd.DataFrame): DataFrame with the worked hours, 'Begin' and 'End' as datetimes.
+    - total_hours (str): The total hours worked in "HH:MM" format.
+    """
+    df = read_worklog_csv(file_path,year)
+
+    # Shift times, with the overnight shifts rolled over to the next day, and total hours
+    with profile_stage('shift_times') as stage:
+        total_hours = get_total_hours_from_minutes(int(convert_shift_times(df).sum()))
+        stage.rows = len(df)
+    return df,total_hours
+
+def read_worklog_csv(file_path_or_buffer,year):
+    """
+    Read a worklog export into a DataFrame with the WORKLOG_COLUMNS, its dates parsed and its summary row dropped.
+
+    Both the full parse and the incremental parse of the rows appended to a file go through it, so they give the
+    same frame.
+
+    Parameters:
+    - file_path_or_buffer (str or file-like): The CSV file, or its text.
+    - year (int): The year the worked hours belong to.
+
+    Returns:
+    - pd.DataFrame: The worklog, 'Begin' and 'End' still as exported.
+    """
+    # Import the file, every column as text: the types pandas would infer depend on which rows are read
+    with profile_stage('read_csv') as stage:
+        df = pd.read_csv(file_path_or_buffer,dtype=str)
+        stage.rows = len(df)
+    
+    # Get the file language
+    file_language = get_file_language(df.columns)
+    
+    # Rename the columns
+    df.columns = WORKLOG_COLUMNS
+
+    # Remove the rows with the months total hours 
+    df.drop(index=df.index[is_summary_row(df)],inplace=True)
+
+    # Convert the date column to datetime
+    with profile_stage('parse_dates') as stage:
+        df['Date']=get_datetime_series_from_dates(df['Date'],year,file_language)
+        stage.rows = len(df)
+    return df
+
+def get_file_language(columns):
+    """
+    Get the language of a worklog export from its column names.
+
+    Parameters:
+    - columns (list): The column names of the export.
+
+    Returns:
+    - str: The file language, one of the languages of utils.locale_utils.LOCALES (e.g. 'German', 'English', 'Spanish').
+    """
+    return locale_utils.get_locale_from_columns(columns)
+
+def is_summary_row(df):
+    """
+    Find the total/summary rows of a worklog export, e.g. ",,Gesamt:,67std 7m,0m,".
+
+    Parameters:
+    - df (pd.DataFrame): The export, with the columns renamed to WORKLOG_COLUMNS.
+
+    Returns:
+    - pd.Series: Boolean mask, True for the rows that are not shifts.
+    """
+    return df['Date'].isna() | df['Begin'].isna() | df['End'].isna()
+
+def convert_shift_times(df):
+    """
+    Convert the 'Begin' and 'End' times of a worklog to datetimes and recalculate 'Hours', in place.
+
+    Parameters:
+    - df (pd.DataFrame): The worklog, with 'Date' already converted to datetimes and 'Begin'/'End' as "HH:MM" strings.
+
+    Returns:
+    - np.ndarray: The minutes worked in every shift.
+    """
+    # Shift boundaries as minutes since midnight, rolling the end over to the next day when it is before the beginning
+    begin_minutes = get_minutes_from_hhmm(df['Begin'])
+    end_minutes = get_minutes_from_hhmm(df['End'])
+    end_minutes = end_minutes + np.where(end_minutes<begin_minutes,MINUTES_PER_DAY,0)
+    hour_minutes = end_minutes-begin_minutes
+
+    df['Hours'] = pd.Series(HHMM_STRINGS[hour_minutes],index=df.index)
+    df['Begin'] = df['Date']+pd.to_timedelta(begin_minutes,unit='min')
+    df['End'] = df['Date']+pd.to_timedelta(end_minutes,unit='min')
+    return hour_minutes
+
+def get_datetime_series_from_dates(date_series,year,file_language):
+    """
+    Convert a column of date strings to datetimes in one vectorized pass.
+
+    Parameters:
+    - date_series (pd.Series): Date strings as exported by the worklog app, e.g. "Do., Juni 30".
+    - year (int or np.ndarray): The year, or the year of every row.
+    - file_language (str): The language of the date strings, as returned by get_file_language.
+
+    Returns:
+    - pd.Series: The converted datetimes, with the index of date_series.
+    """
+    months,days = get_month_and_day_from_dates(date_series,file_language)
+    return pd.Series(get_datetimes_from_components(year,months,days),index=date_series.index)
+
+def get_month_and_day_from_dates(date_series,file_language):
+    """
+    Get the month and day numbers of a column of date strings.
+
+    See utils.locale_utils.get_month_and_day_from_dates, the month spellings of every language are there.
+
+    Parameters:
+    - date_series (pd.Series): Date strings as exported by the worklog app, e.g. "Do., Juni 30".
+    - file_language (str): The language of the date strings, as returned by get_file_language.
+
+    Returns:
+    - months (np.ndarray): The month number of every row.
+    - days (np.ndarray): The day of the month of every row.
+    """
+    return locale_utils.get_month_and_day_from_dates(date_series,file_language)
+
+def get_datetimes_from_components(years,months,days):
+    """
+    Build datetimes from year, month and day numbers with the calendar index.
+
+    Parameters:
+    - years (int or np.ndarray): The years.
+    - months (np.ndarray): The month numbers.
+    - days (np.ndarray): The days of the month.
+
+    Returns:
+    - np.ndarray: datetime64[us] array.
+    """
+    day_numbers = get_calendar_index().day_numbers(years,months,days)
+    return np.broadcast_to(day_numbers,np.shape(days)).astype('datetime64[D]').astype('datetime64[us]')
+
+def get_minutes_from_hhmm(hhmm_series):
+    """
+    Convert a column of "HH:MM" (or "H:MM") strings to minutes since midnight using NumPy only.
+
+    Parameters:
+    - hhmm_series (pd.Series): Times as exported by the worklog app.
+
+    Returns:
+    - np.ndarray: int64 array with the minutes since midnight of every row.
+    """
+    chars = np.asarray(hhmm_series,dtype='U5').view(np.uint32).reshape(-1,5).astype(np.int64)
+    digits = chars-ord('0')
+    # "H:MM" leaves the colon in the second position, "HH:MM" in the third
+    single_digit_hour = chars[:,1]==ord(':')
+    hours = np.where(single_digit_hour,digits[:,0],digits[:,0]*10+digits[:,1])
+    minutes = np.where(single_digit_hour,digits[:,2]*10+digits[:,3],digits[:,3]*10+digits[:,4])
+    if ((hours<0)|(hours>23)|(minutes<0)|(minutes>59)).any():
+        raise ValueError('Times are expected in "HH:MM" format')
+    return hours*60+minutes
+
 def get_datetime_object_from_date(date_str,month,year,file_language):
     """
     Convert a date string to a datetime object based on the given language.
 
     Parameters:
     - date_str (str): The date string to be converted.
-    - month (int): The month.
+    - month (int): The month, unused since the month is read from date_str.
     - year (int): The year.
-    - file_language (str): The language of the date string (one of 'German', 'English', 'Spanish').
+    - file_language (str): The language of the date string, as returned by get_file_language.
 
     Returns:
     - datetime.datetime: The converted datetime object.
     """
-
-    date_str_list=date_str.split()
-    if file_language == 'German':
-        if int(month)!=5:
-            date_time = datetime.datetime(year, int(get_month_number_from_DE_string(date_str_list[1][:-1])), int(date_str_list[-1]))
-        else:
-            date_time = datetime.datetime(year, int(get_month_number_from_DE_string(date_str_list[1])), int(date_str_list[-1]))
-    elif file_language == 'English':
-        date_time = datetime.datetime(year, int(get_month_number_from_EN_string(date_str_list[1])), int(date_str_list[-1]))
-    elif file_language == 'Spanish':
-        date_time = datetime.datetime(year, int(get_month_number_from_ES_string(date_str_list[1])), int(date_str_list[-1]))
-
-    return date_time
+    months,days = get_month_and_day_from_dates(pd.Series([date_str]),file_language)
+    return datetime.datetime(year,int(months[0]),int(days[0]))
 
 def get_month_number_from_DE_string(month_str):
     """
@@ -163,8 +299,7 @@ def get_month_number_from_DE_string(month_str):
     Returns:
     - str: Month number as a string in "MM" format.
     """
-    MONTHS_DE={'Jan':'01','Feb':'02','Mär':'03','Apr':'04','Mai':'05','Jun':'06','Jul':'07','Aug':'08','Sept':'09','Okt':'10','Nov':'11','Dez':'12'}
-    return MONTHS_DE[month_str]
+    return f'{locale_utils.get_month_number(month_str,"German"):02d}'
 
 def get_month_number_from_EN_string(month_str):
     """
@@ -176,8 +311,7 @@ def get_month_number_from_EN_string(month_str):
     Returns:
     - str: Month number as a string in "MM" format.
     """
-    MONTHS_DE={'Jan':'01','Feb':'02','Mar':'03','Apr':'04','May':'05','Jun':'06','Jul':'07','Aug':'08','Sep':'09','Oct':'10','Nov':'11','Dec':'12'}
-    return MONTHS_DE[month_str]
+    return f'{locale_utils.get_month_number(month_str,"English"):02d}'
 
 def get_month_number_from_ES_string(month_str):
     """
@@ -189,22 +323,151 @@ def get_month_number_from_ES_string(month_str):
     Returns:
     - str: Month number as a string in "MM" format.
     """
-    MONTHS_DE={'ene.':'01','feb.':'02','mar.':'03','abr.':'04','may.':'05','jun':'06','jul':'07','ago.':'08','sep.':'09','oct.':'10','nov.':'11','dic.':'12'}
-    return MONTHS_DE[month_str]
+    return f'{locale_utils.get_month_number(month_str,"Spanish"):02d}'
 
 def get_hhmm_from_timedelta(timedelta_str):
     """
-    Convert a timedelta string to "HH:MM" format.
+    Convert a timedelta (or its string) to "HH:MM" format.
+
+    Parameters:
+    - timedelta_str (str or timedelta): The timedelta to be converted, e.g. "0 days 01:59:00".
+
+    Returns:
+    - str: Time in "HH:MM" format, durations of a day or more keep all their hours (e.g. "25:30").
+    """
+    minutes = int(pd.Timedelta(timedelta_str).total_seconds()//60)
+    return f'{minutes//60:02d}:{minutes%60:02d}'
+
+def get_total_hours_from_minutes(total_minutes):
+    """
+    Format a number of minutes as total hours, e.g. 4027 -> "67:07".
+
+    Parameters:
+    - total_minutes (int): The minutes worked.
+
+    Returns:
+    - str: The total hours in "HH:MM" format, the hours are not limited to 24.
+    """
+    return format_duration(total_minutes)
+
+def get_minutes_from_total_hours(total_hours):
+    """
+    Get the number of minutes of total hours in "HH:MM" format, e.g. "67:07" -> 4027.
+
+    Parameters:
+    - total_hours (str): The total hours in "HH:MM" format.
+
+    Returns:
+    - int: The minutes worked.
+    """
+    hours,minutes = total_hours.split(':')
+    return int(hours)*60+int(minutes)
+
+def get_total_amount(amounts):
+    """
+    Add up formatted amounts, e.g. ["£ 1,200.00", "£ 35.50"] -> "£ 1,235.50".
+
+    Parameters:
+    - amounts (pd.Series): Amounts with two decimals, optionally prefixed by a currency symbol and with thousands separators.
+
+    Returns:
+    - str: The total, with the prefix of the first amount.
+    """
+    parts = amounts.astype(str).str.extract(r'^(?P<prefix>[^\d-]*)(?P<sign>-?)(?P<units>[\d,]*)\.?(?P<cents>\d{0,2})\s*$')
+    if parts['units'].isna().any():
+        raise ValueError(f'Amounts are expected with at most two decimals, e.g. "\xa3 1,234.50", got {list(amounts)}')
+    minor = (parts['units'].str.replace(',','').replace('','0').astype(np.int64)*MINOR_UNITS
+             +parts['cents'].str.ljust(2,'0').astype(np.int64))
+    minor = np.where(parts['sign']=='-',-minor,minor)
+    prefix = parts['prefix'].iloc[0] if len(parts) else ''
+    return format_money(int(minor.sum()),prefix)
+
+def get_hhmm_from_datetimes(datetime_series,date_series):
+    """
+    Convert a column of datetimes to "HH:MM" strings without going through strftime.
+
+    Parameters:
+    - datetime_series (pd.Series): The datetimes to be converted.
+    - date_series (pd.Series): The dates (at midnight) the datetimes belong to.
+
+    Returns:
+    - pd.Series: Time of day in "HH:MM" format, with the index of datetime_series.
+    """
+    minutes = ((datetime_series-date_series)//pd.Timedelta(minutes=1)).to_numpy()
+    return pd.Series(HHMM_STRINGS[minutes%MINUTES_PER_DAY],index=datetime_series.index)
+
+def get_hours_from_minutes(minutes):
+    """
+    Format shift durations as "HH:MM" strings, e.g. 90 -> "01:30", going past 24 hours for merged shifts, e.g. 1620 -> "27:00".
 
     Parameters:
-    - timedelta_str (str): The timedelta string to be converted.
+    - minutes (np.ndarray): The minutes of every shift.
 
     Returns:
-    - str: Time in "HH:MM" format.
+    - np.ndarray: The durations in "HH:MM" format.
     """
-    x = str(timedelta_str).split(':')
-    x=x[0][-2:]+':'+x[1]
-    return x
+    minutes = np.asarray(minutes,dtype=np.int64)
+    hours = HHMM_STRINGS[np.clip(minutes,0,MINUTES_PER_DAY-1)].astype(object)
+    long_shifts = np.flatnonzero(minutes>=MINUTES_PER_DAY)
+    hours[long_shifts] = [format_duration(shift_minutes) for shift_minutes in minutes[long_shifts]]
+    return hours
+
+def get_rate_source(rates_path=None):
+    """
+    Describe the exchange rates looked up in a rate file, for the invoice.
+
+    Parameters:
+    - rates_path (str, optional): The exchange rate CSV file. Defaults to utils.rate_utils.RATES_PATH.
+
+    Returns:
+    - str: The source of the rate, e.g. "the monthly average rate of exchange_rates.csv".
+    """
+    return f'the monthly average rate of {os.path.basename(rates_path or RATES_PATH)}'
+
+def get_report_date(report_date=None):
+    """
+    Get the date a document is dated, e.g. the 'Date of report' of the hour reports.
+
+    Parameters:
+    - report_date (str or datetime-like, optional): A pinned date, e.g. "2022-06-30". Defaults to today.
+
+    Returns:
+    - datetime.datetime: The date.
+    """
+    if report_date is None:
+        return datetime.datetime.today()
+    return pd.Timestamp(report_date).to_pydatetime()
+
+def get_hour_report_path(month,year,employee_data,output_directory=None):
+    """
+    Get the path of the hour report of a month, '{initials}_{Month}_{year}.pdf'.
+
+    Parameters:
+    - month (int or str): The month of the report.
+    - year (int): The year of the report.
+    - employee_data (dict): Dictionary containing the employee's details, with the key 'initials'.
+    - output_directory (str, optional): The directory of the report. Defaults to PROCESSED_HOURS_DIRECTORY.
+
+    Returns:
+    - str: The path.
+    """
+    month_name = datetime.date(int(year),int(month),1).strftime("%B")
+    return os.path.join(output_directory or PROCESSED_HOURS_DIRECTORY,f'{employee_data["initials"]}_{month_name}_{year}.pdf')
+
+def get_invoice_path(month,year,company_data,output_directory=None):
+    """
+    Get the path of the invoice of a month, '{year}-{MM}-{company}.pdf'.
+
+    Parameters:
+    - month (int or str): The month of the invoice.
+    - year (int): The year of the invoice.
+    - company_data (dict): Dictionary containing the billing company's details, with the key 'name'.
+    - output_directory (str, optional): The directory of the invoice. Defaults to PROCESSED_DIRECTORY.
+
+    Returns:
+    - str: The path.
+    """
+    return os.path.join(output_directory or PROCESSED_DIRECTORY,f'{year}-{int(month):02d}-{company_data["name"]}.pdf')
 
 def get_wk_nb(datetime_object):
     """
@@ -216,9 +479,11 @@ def get_wk_nb(datetime_object):
     Returns:
     - int: Week number.
     """
-    return datetime_object.isocalendar()[1]
+    return int(get_calendar_index().iso_week(datetime_object.toordinal()-EPOCH_ORDINAL))
 
-def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_data={}):
+@profiled
+def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_data={},destination='file',
+                          rounding_policy=INVOICE_ROUNDING_POLICY,output_directory=None,report_date=None):
     """
     Generates and saves a PDF file based on the given data.
 
@@ -229,6 +494,13 @@ def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_dat
     - total_hours (str): Total hours worked in the format 'HH:MM'.
     - company_data (dict, optional): Dictionary containing company information. Expected keys: 'name'.
     - employee_data (dict, optional): Dictionary containing employee details. Expected keys: 'name', 'position', 'email', and 'initials'.
+    - destination (str, optional): 'file' (default) to write the PDF before returning, 'background' to queue the write
+      for the PDF writer threads (see utils.pdf_utils.wait_for_pdf_writes), 'bytes' to return the PDF without writing it.
+    - rounding_policy (str, optional): How the billed 'Worked hours' are rounded, a key of
+      utils.duration_utils.ROUNDING_POLICIES. Default is INVOICE_ROUNDING_POLICY.
+    - output_directory (str, optional): Where the PDF is saved. Defaults to PROCESSED_HOURS_DIRECTORY.
+    - report_date (str or datetime-like, optional): The 'Date of report', e.g. "2022-06-30". Defaults to today. A pinned
+      date is also the creation date of the file, so the same inputs give the same bytes.
 
     Description:
     The function generates a detailed hour report in PDF format for an employee for a specific month and year. The PDF includes:
@@ -242,22 +514,115 @@ def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_dat
     The generated PDF is saved with a filename based on the employee's initials, month, and year in the PROCESSED_HOURS_DIRECTORY.
 
     Returns:
-    None. Saves the generated PDF file to disk.
+    None. Saves the generated PDF file to disk. With destination='background', the Future of the write; with
+    destination='bytes', the PDF content instead of saving it.
     """
     
     df=df.iloc[::-1]
-    
-    pdf = PDF()
-    pdf.alias_nb_pages()
-
-    pdf.add_page()
-    pdf.set_xy(0, 0)
 
     turn_on_border=False # For troubleshooting
     
     #dates
-    start_date = datetime.date(year,int(month),1)
-    end_date = datetime.date(year,int(month),monthrange(year,int(month))[1])
+    calendar_index = get_calendar_index()
+    first_day,last_day = calendar_index.month_bounds(year,int(month))
+    start_date = calendar_index.date(first_day)
+    end_date = calendar_index.date(last_day)
+    first_week,last_week = calendar_index.month_weeks(year,int(month))
+
+    # The header and the table headers only depend on the company and the employee
+    with profile_stage('template'):
+        pdf = get_hour_report_template(company_data,employee_data).render(
+            month=start_date.strftime("%B"),
+            start_date=start_date.strftime("%d %B, %Y"),
+            end_date=end_date.strftime("%d %B, %Y"),
+            report_date=get_report_date(report_date).strftime("%d %B, %Y"),
+            weeks=f'Weeks: #{ first_week} - { last_week}')
+    if report_date is not None:
+        pdf.set_document_date(get_report_date(report_date))
+
+    # -------------------------Begin Table-------------------------
+    table_spacing = 5
+    hour_cell_spacing=15
+
+    # Contents
+    pdf.set_font('arial', '', 11)
+    pdf.set_fill_color(220, 220, 220)
+
+    notes_width = 120
+    for i,(date,begin,end,hours,notes,row_height) in enumerate(get_hour_report_rows(pdf,df,notes_width,5)):
+        cell_filled = i%2
+
+        # spacing
+        pdf.cell(table_spacing,border=turn_on_border,ln=0)
+        pdf.cell(20, row_height, date, 0, 0, 'C',fill=cell_filled)
+        pdf.cell(hour_cell_spacing, row_height, begin, 0, 0, 'C',fill=cell_filled)
+        pdf.cell(hour_cell_spacing, row_height, end, 0, 0, 'C',fill=cell_filled)
+        pdf.cell(hour_cell_spacing, row_height, hours, 0, 0, 'C',fill=cell_filled)
+        if row_height>5:
+            pdf.multi_cell(notes_width, 5, notes,border= 0,align= 'L',fill=cell_filled)
+        else:
+            pdf.cell(notes_width, 5, notes, 0, 1, 'L',fill=cell_filled)
+
+    pdf.set_font('arial', 'B', 13)
+    pdf.cell(table_spacing,border=turn_on_border,ln=0)
+
+    pdf.cell(50,10,"Total time:",turn_on_border,0,'R')
+    pdf.set_font('arial', '', 11)
+
+    pdf.cell(hour_cell_spacing,10,total_hours,border=turn_on_border,ln=1)
+    pdf.cell(20,20,border=turn_on_border,ln=1)
+    # -------------------------End Table-------------------------
+    
+    pdf.set_font('arial', 'B', 13)
+    pdf.cell(160,5,f'Worked hours:',turn_on_border,0,'R')
+    pdf.set_font('arial', '', 12)
+    pdf.cell(30,5,format_duration(round_minutes(get_minutes_from_total_hours(total_hours),rounding_policy)),turn_on_border,1,'R')
+
+    pdf.cell(20,30,border=turn_on_border,ln=1)
+
+#     # Line
+    pdf.set_fill_color(0, 0, 0)
+    pdf.cell(190, 2, "", 0, 2, 'C',True)
+    save_file_name = get_hour_report_path(month,year,employee_data,output_directory)
+    with profile_stage('output') as stage:
+        stage.rows = len(df)
+        from utils.pdf_utils import output_pdf
+        return output_pdf(pdf,save_file_name,destination)
+
+def get_hour_report_template(company_data,employee_data):
+    """
+    Get the hour report template of a company and employee, building it only the first time.
+
+    Parameters:
+    - company_data (dict): Dictionary containing company information. Expected keys: 'name'.
+    - employee_data (dict): Dictionary containing employee details. Expected keys: 'name', 'position' and 'email'.
+
+    Returns:
+    - PDFTemplate: The template, see build_hour_report_template.
+    """
+    return _get_template(build_hour_report_template,json.dumps(company_data,sort_keys=True,default=str),json.dumps(employee_data,sort_keys=True,default=str))
+
+# Keyed on the JSON of the details; values JSON cannot hold, e.g. the dates of a TOML config, become strings
+@lru_cache(maxsize=256)
+def _get_template(build_template,company_json,employee_json):
+    return build_template(json.loads(company_json),json.loads(employee_json))
+
+def build_hour_report_template(company_data,employee_data):
+    """
+    Lay out the static part of the hour report: header, company, employee details and table headers.
+
+    Parameters:
+    - company_data (dict): Dictionary containing company information. Expected keys: 'name'.
+    - employee_data (dict): Dictionary containing employee details. Expected keys: 'name', 'position' and 'email'.
+
+    Returns:
+    - PDFTemplate: The template, with the slots 'month', 'start_date', 'end_date', 'report_date' and 'weeks'.
+    """
+    from utils.pdf_utils import PDFTemplate
+    template = PDFTemplate()
+    pdf = template.pdf
+
+    turn_on_border=False # For troubleshooting
 
     # Header
     pdf.set_font('arial', 'B', 22)
@@ -280,7 +645,7 @@ def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_dat
     pdf.set_font('arial', 'B', 13)
     pdf.cell(18,5,"Month: ",turn_on_border,0,'L')
     pdf.set_font('arial', '', 13)
-    pdf.cell(15,5,start_date.strftime("%B"),turn_on_border,1,'L')
+    template.add_slot('month',15,5,1,'L')
 
     # Employee data
     pdf.set_font('arial', '', 12)
@@ -293,15 +658,15 @@ def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_dat
     pdf.set_font('arial', 'B', 13)
     pdf.cell(140,5,"From: ",turn_on_border,0,'R')
     pdf.set_font('arial', '', 12)
-    pdf.cell(50,5,start_date.strftime("%d %B, %Y"),turn_on_border,1,'R')
+    template.add_slot('start_date',50,5,1,'R')
     pdf.set_font('arial', 'B', 13)
     pdf.cell(140,5,"To: ",turn_on_border,0,'R')
     pdf.set_font('arial', '', 12)
-    pdf.cell(50,5,end_date.strftime("%d %B, %Y"),turn_on_border,1,'R')
+    template.add_slot('end_date',50,5,1,'R')
     pdf.set_font('arial', 'B', 13)
     pdf.cell(140,5,f'Date of report:',turn_on_border,0,'R')
     pdf.set_font('arial', '', 12)
-    pdf.cell(50,5,datetime.datetime.today().strftime("%d %B, %Y"),turn_on_border,1,'R')
+    template.add_slot('report_date',50,5,1,'R')
 
 
     # Spacing
@@ -310,7 +675,7 @@ def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_dat
     # Week numbers:
     pdf.cell(10)
     pdf.set_font('arial', '', 15)
-    pdf.cell(10, 5,f'Weeks: #{ start_date.isocalendar()[1]} - { end_date.isocalendar()[1]}', turn_on_border, 1, 'L',False)
+    template.add_slot('weeks',10,5,1,'L')
     pdf.cell(1,5,border=turn_on_border,ln=1)
 
     # -------------------------Begin Table-------------------------
@@ -329,55 +694,47 @@ def generate_and_save_pdf(df,month,year,total_hours,company_data={},employee_dat
     pdf.cell(hour_cell_spacing, header_row_height, 'Hours', 1, 0, 'C',True)
     pdf.cell(120, header_row_height, 'Task', 1, 1, 'C',True)
     pdf.set_text_color(0,0,0)    
+    return template
 
-    # Contents
-    pdf.set_font('arial', '', 11)
-    pdf.set_fill_color(220, 220, 220)
-
-    for i in range(0, len(df)):
-        cell_filled = i%2
-        
-        #Get length of the notes column string to get the height of the row
-        if not (type(df['Notes'].iat[i])==float):
-            row_height = 10 if len(df['Notes'].iat[i])>70 else 5
-        else:
-            df.iloc[i,df.columns.get_loc('Notes')] = ''
-            row_height = 5
-
-        # spacing
-        pdf.cell(table_spacing,border=turn_on_border,ln=0)
-        pdf.cell(20, row_height, f'{df["Date"].iloc[i].date().strftime("%d %B")[:7]}', 0, 0, 'C',fill=cell_filled)
-        pdf.cell(hour_cell_spacing, row_height, f'{df["Begin"].iloc[i]}', 0, 0, 'C',fill=cell_filled)
-        pdf.cell(hour_cell_spacing, row_height, f'{str(df["End"].iloc[i])}', 0, 0, 'C',fill=cell_filled)
-        pdf.cell(hour_cell_spacing, row_height, f'{str(df["Hours"].iloc[i])}', 0, 0, 'C',fill=cell_filled)
-        pdf.multi_cell(120, 5, f'{df["Notes"].iat[i]}',border= 0,align= 'L',fill=cell_filled)
-
-    pdf.set_font('arial', 'B', 13)
-    pdf.cell(table_spacing,border=turn_on_border,ln=0)
-
-    pdf.cell(50,10,"Total time:",turn_on_border,0,'R')
-    pdf.set_font('arial', '', 11)
-
-    pdf.cell(hour_cell_spacing,10,total_hours,border=turn_on_border,ln=1)
-    pdf.cell(20,20,border=turn_on_border,ln=1)
-    # -------------------------End Table-------------------------
-    
-    pdf.set_font('arial', 'B', 13)
-    pdf.cell(160,5,f'Worked hours:',turn_on_border,0,'R')
-    pdf.set_font('arial', '', 12)
-    pdf.cell(30,5,total_hours[:-2]+'00',turn_on_border,1,'R')
+def get_hour_report_rows(pdf,df,notes_width,line_height):
+    """
+    Format all the rows of the hour report table in one pass, before any of them is drawn.
 
-    pdf.cell(20,30,border=turn_on_border,ln=1)
+    The row heights come from the width of the notes in the current font of the PDF, so a row is as high as
+    the number of lines multi_cell wraps its notes into.
 
-#     # Line
-    pdf.set_fill_color(0, 0, 0)
-    pdf.cell(190, 2, "", 0, 2, 'C',True)
-    save_file_name = os.path.join(PROCESSED_HOURS_DIRECTORY,f'{employee_data["initials"]}_{start_date.strftime("%B")}_{year}.pdf')
-    pdf.output(save_file_name, 'F')
+    Parameters:
+    - pdf (FPDF): The PDF, with the font of the table contents already set.
+    - df (pd.DataFrame): DataFrame containing the work hours data with columns: 'Date', 'Begin', 'End', 'Hours', and 'Notes'.
+    - notes_width (float): Width of the notes column.
+    - line_height (float): Height of one line of text.
 
+    Returns:
+    - list: One (date, begin, end, hours, notes, row_height) tuple of strings and height per row.
+    """
+    dates = df['Date'].dt.strftime("%d %B").str[:7].tolist()
+    begins = df['Begin'].astype(str).tolist()
+    ends = df['End'].astype(str).tolist()
+    hours = df['Hours'].astype(str).tolist()
+    notes = df['Notes'].fillna('').astype(str).tolist()
+
+    # Only the notes wider than the column need to be wrapped to know their number of lines
+    max_single_line_width = notes_width-2*pdf.c_margin
+    row_heights = [line_height if pdf.get_string_width(note)<=max_single_line_width
+                   else line_height*len(pdf.multi_cell(notes_width,line_height,note,split_only=True))
+                   for note in notes]
+    return list(zip(dates,begins,ends,hours,notes,row_heights))
+
+@profiled
 def generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,usd_pay,
                                 company_data={},
-                                employee_data={}):
+                                employee_data={},
+                                destination='file',
+                                subtotal=None,
+                                output_directory=None,
+                                report_date=None,
+                                rate_source=None,
+                                rounding_note=None):
     """
     Generate a PDF invoice from provided data and save it to a predefined directory.
 
@@ -403,96 +760,56 @@ def generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,usd_pay,
         * country: Country of the employee
         * phone: Mobile number of the employee
         * bank_name, bank_address, holder_name, swift, routing_nb, account_nb: Bank details of the employee
+    - destination (str, optional): 'file' (default) to write the PDF before returning, 'background' to queue the write
+      for the PDF writer threads (see utils.pdf_utils.wait_for_pdf_writes), 'bytes' to return the PDF without writing it.
+    - subtotal (str, optional): The formatted sum of the amounts, e.g. "£ 1,234.00". Defaults to the sum of the AMOUNT column.
+    - output_directory (str, optional): Where the PDF is saved. Defaults to PROCESSED_DIRECTORY.
+    - report_date (str or datetime-like, optional): The 'Invoice Date', the due date is 30 days later. Defaults to today.
+      A pinned date is also the creation date of the file, so the same inputs give the same bytes.
+    - rate_source (str, optional): Where the exchange rate comes from, printed under it, e.g. the result of
+      get_rate_source. Defaults to DEFAULT_RATE_SOURCE.
+    - rounding_note (str, optional): How the billed time was rounded, printed under the exchange rate, e.g. the
+      result of utils.duration_utils.describe_rounding. Default is None, nothing is printed.
 
     Outputs:
     - A PDF file saved in the PROCESSED_DIRECTORY with the filename format: 'year-month-company_name.pdf'.
+    - With destination='background' the Future of the write is returned, with destination='bytes' the PDF content.
     
     Notes:
     - This function assumes the existence of a PDF class for PDF generation.
     - The function also assumes that the PROCESSED_DIRECTORY is predefined.
-    - Additional libraries/modules required: os, datetime, monthrange (from calendar)
+    - Additional libraries/modules required: os, datetime
     """
     df=df.iloc[::-1]
-    
-    pdf = PDF()
-    pdf.alias_nb_pages()
-
-    pdf.add_page()
-    pdf.set_xy(0, 0)
 
     turn_on_border=False # For troubleshooting
             
     #dates
-    start_date = datetime.date(year,int(month),1)
-    end_date = datetime.date(year,int(month),monthrange(year,int(month))[1])
-    invoice_date = datetime.datetime.today().strftime("%d/%m/%Y")
-    due_date  = datetime.datetime.today() + datetime.timedelta(30)
+    calendar_index = get_calendar_index()
+    first_day,last_day = calendar_index.month_bounds(year,int(month))
+    start_date = calendar_index.date(first_day)
+    end_date = calendar_index.date(last_day)
+    invoice_date = get_report_date(report_date).strftime("%d/%m/%Y")
+    due_date  = get_report_date(report_date) + datetime.timedelta(30)
     if len(str(month))==1:
         month = '0'+str(month)
-    
-    # Header spacing
-    pdf.set_font('arial', 'B', 18)
-    pdf.cell(1,15,border=turn_on_border,ln=1)
-    pdf.cell(190,10,'',turn_on_border,1,'C')
-
-    # Header
-    pdf.set_fill_color(120, 194, 100)
-    pdf.set_text_color(255,255,255) 
-    pdf.cell(160, 10, f"{employee_data['name']}", 0, 0, 'L',True)
-    pdf.cell(30, 10, f"INVOICE", 0, 1, 'R',True)
-    pdf.cell(10, 5, "", turn_on_border, 2, 'C',False) # Spacing
-    pdf.set_text_color(0,0,0) 
-
-    # Employee adress
-    pdf.set_font('arial', '', 13)
-    pdf.cell(40,5,f"{employee_data['street']}",turn_on_border,2,'L')
-    pdf.cell(40,5,f"{employee_data['city']}, {employee_data['state']} {employee_data['postcode']}",turn_on_border,2,'L')
-    pdf.cell(40,5,f"{employee_data['country']}",turn_on_border,2,'L')
-    pdf.cell(40,5,f"Mobile: {employee_data['phone']}",turn_on_border,2,'L')
-
-    # Spacing
-    pdf.cell(1,21,'',turn_on_border,1,'R')
-
-    # Bill to and invoice info
-    pdf.set_font('arial', 'B', 13)
-    pdf.cell(40,5,"Bill To ",turn_on_border,0,'L')
-    pdf.cell(120,5,"Invoice #:",turn_on_border,0,'R')
-    pdf.set_font('arial', '', 12)
-    pdf.cell(30,5,f"{year}-{month}",turn_on_border,1,"R")
-    pdf.cell(40,5,f'{company_data["name"]}',turn_on_border,0,'L')
-    pdf.set_font('arial', 'B', 13)
-    pdf.cell(120,5,"Invoice Date:",turn_on_border,0,'R')
-    pdf.set_font('arial', '', 12)
-    pdf.cell(30,5,invoice_date,turn_on_border,1,"R")
-    pdf.cell(40,5,f'{company_data["street"]}',turn_on_border,0,'L')
-    pdf.set_font('arial', 'B', 13)
-    pdf.cell(120,5,"Due Date:",turn_on_border,0,'R')
-    pdf.set_font('arial','', 12)
-    pdf.cell(30,5,due_date.strftime("%d/%m/%Y"),turn_on_border,1,'R')
-    pdf.cell(40,5,f'{company_data["street_cont"]}',turn_on_border,1,'L')
-    pdf.cell(40,5,f'{company_data["city"]}',turn_on_border,1,'L')
-    pdf.cell(40,5,f'{company_data["postcode"]}',turn_on_border,2,'L')
-
-    # Spacing
-    pdf.cell(2, 10, "", turn_on_border, 1, 'C',False)
+    if subtotal is None:
+        subtotal = get_total_amount(df['AMOUNT'])
+
+    # The header, the billing details and the table headers only depend on the company and the employee
+    with profile_stage('template'):
+        pdf = get_invoice_template(company_data,employee_data).render(
+            invoice_number=f"{year}-{month}",
+            invoice_date=invoice_date,
+            due_date=due_date.strftime("%d/%m/%Y"))
+    if report_date is not None:
+        pdf.set_document_date(get_report_date(report_date))
 
     # -------------------------Begin Table-------------------------
     table_spacing = 0.1
     hour_cell_spacing=35
     background_fill = (240,240,220)
     last_column_width = 34
-    
-    # Headers
-    pdf.set_font('arial', 'B', 12)
-    pdf.set_text_color(0,0,0) 
-    pdf.set_fill_color(background_fill[0],background_fill[1],background_fill[2])
-    header_row_height = 9
-    pdf.cell(table_spacing,border=turn_on_border,ln=0)
-    pdf.cell(20, header_row_height, 'QTY', 1, 0, 'C',True)
-    pdf.cell(105, header_row_height, 'DESCRIPTION', 1, 0, 'C',True)
-    pdf.cell(30, header_row_height, 'UNIT PRICE', 1, 0, 'C',True)
-    pdf.cell(last_column_width, header_row_height, 'AMOUNT', 1, 1, 'C',True)
-    pdf.set_text_color(0,0,0)    
 
     # Contents
     pdf.set_font('arial', '', 11)
@@ -510,7 +827,7 @@ def generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,usd_pay,
     
     # Subtotal
     pdf.cell(155,row_height+2,f'Subtotal',turn_on_border,0,'R')
-    pdf.cell(last_column_width,row_height+2,f'{str(df["AMOUNT"].iloc[i])}',1,1,'R')
+    pdf.cell(last_column_width,row_height+2,subtotal,1,1,'R')
     
     # VAT
     pdf.cell(155,row_height+2,f'VAT 0.0%',turn_on_border,0,'R')
@@ -520,7 +837,7 @@ def generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,usd_pay,
     pdf.set_font('arial', 'B', 15)
     pdf.cell(155,row_height+2,f'Total in GBP',turn_on_border,0,'R')
     pdf.set_fill_color(background_fill[0],background_fill[1],background_fill[2])
-    pdf.cell(last_column_width,row_height+2,f' {str(df["AMOUNT"].iloc[i])}',1,1,'R',True)
+    pdf.cell(last_column_width,row_height+2,f' {subtotal}',1,1,'R',True)
     
     pdf.set_font('arial', 'B', 15)
     pdf.cell(155,row_height+2,f'Total in USD',turn_on_border,0,'R')
@@ -535,10 +852,17 @@ def generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,usd_pay,
     pdf.set_font('arial', 'B', 11)
     pdf.cell(10,5,f'Using 1 GBP = {gbp_to_usd_rate} USD',turn_on_border,ln=2)
     pdf.set_font('arial', '', 11)
-    pdf.cell(10,5,f"(Obtained from OANDA's monthly average rate from {start_date.strftime('%d')} - {end_date.strftime('%d %B, %Y')})",turn_on_border,ln=2)
+    pdf.cell(10,5,f"(Obtained from {rate_source or DEFAULT_RATE_SOURCE} from {start_date.strftime('%d')} - {end_date.strftime('%d %B, %Y')})",turn_on_border,ln=2)
+    if rounding_note:
+        pdf.cell(10,5,f'({rounding_note})',turn_on_border,ln=2)
     
-    # Spacing
-    pdf.cell(1,40,border=turn_on_border,ln=1)
+    # Spacing, less of it for every extra line item and the rounding note, and the payment details are kept on one page
+    bank_details_height = 38
+    spacing = max(40-row_height*(len(df)-1)-(5 if rounding_note else 0),10)
+    if pdf.get_y()+spacing+bank_details_height>pdf.page_break_trigger:
+        pdf.add_page()
+    else:
+        pdf.cell(1,spacing,border=turn_on_border,ln=1)
     
     # Bank details
     pdf.set_font('arial', 'B', 15)
@@ -552,43 +876,184 @@ def generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,usd_pay,
     pdf.cell(120,5,f"Routing Nr.: {employee_data['routing_nb']}",border=turn_on_border,ln=2)
     pdf.cell(120,5,f"Account Nr.: {employee_data['account_nb']}",border=turn_on_border,ln=2)
 
-    save_file_name = os.path.join(PROCESSED_DIRECTORY,f'{year}-{month}-{company_data["name"]}.pdf')
-    pdf.output(save_file_name, 'F')
+    save_file_name = get_invoice_path(month,year,company_data,output_directory)
+    with profile_stage('output') as stage:
+        stage.rows = len(df)
+        from utils.pdf_utils import output_pdf
+        return output_pdf(pdf,save_file_name,destination)
     
-def generate_invoice(month,year,gbp_to_usd_rate,pay_rate,company_data={},employee_data={}):
+def get_invoice_template(company_data,employee_data):
+    """
+    Get the invoice template of a company and employee, building it only the first time.
+
+    Parameters:
+    - company_data (dict): Dictionary containing the billing company's details (see generate_table_and_save_pdf).
+    - employee_data (dict): Dictionary containing the employee's details (see generate_table_and_save_pdf).
+
+    Returns:
+    - PDFTemplate: The template, see build_invoice_template.
+    """
+    return _get_template(build_invoice_template,json.dumps(company_data,sort_keys=True,default=str),json.dumps(employee_data,sort_keys=True,default=str))
+
+def build_invoice_template(company_data,employee_data):
+    """
+    Lay out the static part of the invoice: employee header and address, billing details and table headers.
+
+    Parameters:
+    - company_data (dict): Dictionary containing the billing company's details (see generate_table_and_save_pdf).
+    - employee_data (dict): Dictionary containing the employee's details (see generate_table_and_save_pdf).
+
+    Returns:
+    - PDFTemplate: The template, with the slots 'invoice_number', 'invoice_date' and 'due_date'.
+    """
+    from utils.pdf_utils import PDFTemplate
+    template = PDFTemplate()
+    pdf = template.pdf
+
+    turn_on_border=False # For troubleshooting
+
+    # Header spacing
+    pdf.set_font('arial', 'B', 18)
+    pdf.cell(1,15,border=turn_on_border,ln=1)
+    pdf.cell(190,10,'',turn_on_border,1,'C')
+
+    # Header
+    pdf.set_fill_color(120, 194, 100)
+    pdf.set_text_color(255,255,255) 
+    pdf.cell(160, 10, f"{employee_data['name']}", 0, 0, 'L',True)
+    pdf.cell(30, 10, f"INVOICE", 0, 1, 'R',True)
+    pdf.cell(10, 5, "", turn_on_border, 2, 'C',False) # Spacing
+    pdf.set_text_color(0,0,0) 
+
+    # Employee adress
+    pdf.set_font('arial', '', 13)
+    pdf.cell(40,5,f"{employee_data['street']}",turn_on_border,2,'L')
+    pdf.cell(40,5,f"{employee_data['city']}, {employee_data['state']} {employee_data['postcode']}",turn_on_border,2,'L')
+    pdf.cell(40,5,f"{employee_data['country']}",turn_on_border,2,'L')
+    pdf.cell(40,5,f"Mobile: {employee_data['phone']}",turn_on_border,2,'L')
+
+    # Spacing
+    pdf.cell(1,21,'',turn_on_border,1,'R')
+
+    # Bill to and invoice info
+    pdf.set_font('arial', 'B', 13)
+    pdf.cell(40,5,"Bill To ",turn_on_border,0,'L')
+    pdf.cell(120,5,"Invoice #:",turn_on_border,0,'R')
+    pdf.set_font('arial', '', 12)
+    template.add_slot('invoice_number',30,5,1,'R')
+    pdf.cell(40,5,f'{company_data["name"]}',turn_on_border,0,'L')
+    pdf.set_font('arial', 'B', 13)
+    pdf.cell(120,5,"Invoice Date:",turn_on_border,0,'R')
+    pdf.set_font('arial', '', 12)
+    template.add_slot('invoice_date',30,5,1,'R')
+    pdf.cell(40,5,f'{company_data["street"]}',turn_on_border,0,'L')
+    pdf.set_font('arial', 'B', 13)
+    pdf.cell(120,5,"Due Date:",turn_on_border,0,'R')
+    pdf.set_font('arial','', 12)
+    template.add_slot('due_date',30,5,1,'R')
+    pdf.cell(40,5,f'{company_data["street_cont"]}',turn_on_border,1,'L')
+    pdf.cell(40,5,f'{company_data["city"]}',turn_on_border,1,'L')
+    pdf.cell(40,5,f'{company_data["postcode"]}',turn_on_border,2,'L')
+
+    # Spacing
+    pdf.cell(2, 10, "", turn_on_border, 1, 'C',False)
+
+    # -------------------------Begin Table-------------------------
+    table_spacing = 0.1
+    hour_cell_spacing=35
+    background_fill = (240,240,220)
+    last_column_width = 34
+    
+    # Headers
+    pdf.set_font('arial', 'B', 12)
+    pdf.set_text_color(0,0,0) 
+    pdf.set_fill_color(background_fill[0],background_fill[1],background_fill[2])
+    header_row_height = 9
+    pdf.cell(table_spacing,border=turn_on_border,ln=0)
+    pdf.cell(20, header_row_height, 'QTY', 1, 0, 'C',True)
+    pdf.cell(105, header_row_height, 'DESCRIPTION', 1, 0, 'C',True)
+    pdf.cell(30, header_row_height, 'UNIT PRICE', 1, 0, 'C',True)
+    pdf.cell(last_column_width, header_row_height, 'AMOUNT', 1, 1, 'C',True)
+    pdf.set_text_color(0,0,0)
+    return template
+
+@profiled
+def generate_invoice(month,year,gbp_to_usd_rate,pay_rate,company_data={},employee_data={},raw_directory=None,
+                     destination='file',rounding_policy=INVOICE_ROUNDING_POLICY,round_each_shift=False,rates_path=None,
+                     overlaps=None,projects=None,output_directory=None,report_date=None,rate_source=None):
     """
     Generate an invoice for given month and year based on the worked hours and pay rate, and save it as a PDF.
 
     Parameters:
     - month (int): Month for which the invoice is to be generated.
     - year (int): Year for which the invoice is to be generated.
-    - gbp_to_usd_rate (float): The conversion rate from GBP (Great Britain Pound) to USD (US Dollar).
+    - gbp_to_usd_rate (float or None): The conversion rate from GBP (Great Britain Pound) to USD (US Dollar). When None,
+      the monthly average of the month in the exchange rate file is used (see utils.rate_utils).
     - pay_rate (float): The rate of pay per hour in GBP.
     - company_data (dict, optional): Dictionary containing the billing company's details. At minimum, it should have the key:
         * name: Name of the company. This is used to extract work hours specific to the company.
     - employee_data (dict, optional): Dictionary containing the employee's details, passed to the PDF generation function.
+    - raw_directory (str, optional): Directory containing the raw CSV file. Defaults to RAW_DIRECTORY.
+    - destination (str, optional): Passed on to generate_table_and_save_pdf, e.g. 'bytes' to get the invoice without writing it.
+    - rounding_policy (str, optional): How the billed time is rounded, a key of utils.duration_utils.ROUNDING_POLICIES,
+      e.g. 'nearest_quarter'. Default is INVOICE_ROUNDING_POLICY (whole hours, rounded down). The invoice says how the
+      time was rounded and how much of it was not billed (or added).
+    - round_each_shift (bool, optional): Whether to round every shift instead of the total. Default is False.
+    - rates_path (str, optional): Exchange rate CSV file used when gbp_to_usd_rate is None. Defaults to utils.rate_utils.RATES_PATH.
+    - projects (list, optional): Project rules splitting the invoice into one line item per project, with its own rate
+      (see utils.project_utils.check_project_rules). Defaults to the 'projects' of company_data; without rules, the
+      invoice has a single 'Work hours' line.
+    - overlaps (str, optional): Passed on to extract_worked_hour_as_df, e.g. 'merge' so overlapping shifts are not billed twice.
+    - output_directory (str, optional): Where the PDF is saved. Defaults to PROCESSED_DIRECTORY.
+    - report_date (str or datetime-like, optional): Passed on to generate_table_and_save_pdf, the invoice date. Defaults to today.
+    - rate_source (str, optional): Where gbp_to_usd_rate comes from, printed on the invoice. Defaults to the rate file
+      when the rate is looked up in it, DEFAULT_RATE_SOURCE otherwise.
 
     Outputs:
     - A PDF invoice saved in a predefined directory, generated using the generate_table_and_save_pdf function.
+    - Returns what generate_table_and_save_pdf returns for the destination.
 
     Notes:
     - This function utilizes the extract_worked_hour_as_df function to get the total worked hours for the given company.
     - The function uses pandas for DataFrame operations.
+    - Durations are integer minutes and amounts integer pence/cents until they are formatted; the USD total is rounded to whole dollars.
     - Additional libraries/modules required: pandas (as pd).
     - The function assumes that generate_table_and_save_pdf is available and defined with the correct parameters.
     """
-    _,total_hours = extract_worked_hour_as_df(month,year,company_data['name'])
-
-    total_gbp = int(total_hours[:-3])*pay_rate
-
-    total_usd = round(gbp_to_usd_rate*total_gbp,0)
-    
-    df = pd.DataFrame([[total_hours[:-3],'Work hours',u"\xA3 "+f'{pay_rate:.2f}',u"\xA3 "+f'{total_gbp:,.2f}']],columns=['QTY','DESCRIPTION','UNIT PRICE','AMOUNT'])
-    generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,
-                                usd_pay=total_usd,
-                                company_data=company_data,
-                                employee_data=employee_data)
-
+    if gbp_to_usd_rate is None:
+        gbp_to_usd_rate = get_exchange_rate_store(rates_path).get_monthly_average(INVOICE_CURRENCY_PAIR,year,int(month))
+        rate_source = rate_source or get_rate_source(rates_path)
+    from utils.shift_utils import extract_worked_hour_as_store
+    # Integer minutes of every shift, merged shifts of 24 hours or more included
+    shifts = extract_worked_hour_as_store(month,year,company_data['name'],raw_directory=raw_directory,overlaps=overlaps)
+
+    from utils.project_utils import check_project_rules, get_line_items
+    rules = check_project_rules(company_data.get('projects',[]) if projects is None else projects)
+    line_items = get_line_items(shifts.minutes,np.asarray(shifts.notes),rules,pay_rate,rounding_policy,round_each_shift)
+    total_gbp_minor = int(line_items['amount_minor'].sum())
+    total_usd_minor = convert_minor_units(total_gbp_minor,gbp_to_usd_rate,rounding_minor=MINOR_UNITS)
+
+    # The table is drawn from the last row up
+    line_items = line_items.iloc[::-1]
+
+    df = pd.DataFrame({'QTY':[format_hours_quantity(minutes) for minutes in line_items['minutes']],
+                       'DESCRIPTION':line_items['description'].to_numpy(),
+                       'UNIT PRICE':[format_money(rate_minor,u"\xA3 ",thousands_separator=False) for rate_minor in line_items['rate_minor']],
+                       'AMOUNT':[format_money(amount_minor,u"\xA3 ") for amount_minor in line_items['amount_minor']]})
+    return generate_table_and_save_pdf(df,month,year,gbp_to_usd_rate,
+                                       usd_pay=total_usd_minor/MINOR_UNITS,
+                                       company_data=company_data,
+                                       employee_data=employee_data,
+                                       destination=destination,
+                                       subtotal=format_money(total_gbp_minor,u"\xA3 "),
+                                       output_directory=output_directory,
+                                       report_date=report_date,
+                                       rate_source=rate_source,
+                                       rounding_note=describe_rounding(rounding_policy,int(shifts.minutes.sum()),
+                                                                       int(line_items['minutes'].sum()),
+                                                                       round_each_shift))
+
+@profiled
 def plot_weekly_hour_distribution(df):
     """
     Plot the distribution of work hours for each day of the week based on the input DataFrame.
@@ -603,11 +1068,32 @@ def plot_weekly_hour_distribution(df):
 
     Notes:
     - The function assumes that matplotlib and numpy are imported respectively as plt and np.
-    - The function utilizes global variables like DAYS for weekday labels and relies on helper functions like get_wk_nb.
+    - The function utilizes global variables like DAYS for weekday labels. Weekdays and ISO weeks come from the calendar index.
+    - All shifts are drawn as a single PolyCollection; shifts that cross midnight are split at midnight into two bars.
     - The color coding of work hours is based on the week number of the month, and a legend is provided for clarity.
     - The function does not explicitly return the figure, but the plotted figure will be shown when using plt.show() in a script or interactive session.
     """
-    fig = plt.figure(figsize=(18, 9))
+    import matplotlib.pyplot as plt
+
+    with profile_stage('figure'):
+        fig = plt.figure(figsize=(18, 9))
+    draw_weekly_hour_distribution(fig,df)
+
+@profiled
+def draw_weekly_hour_distribution(fig,df):
+    """
+    Draw the distribution of work hours for each day of the week on a figure (see plot_weekly_hour_distribution).
+
+    Works on any matplotlib Figure, including ones not managed by pyplot, so it can be used with a headless backend.
+
+    Parameters:
+    - fig (matplotlib.figure.Figure): The figure to draw on, it should be empty.
+    - df (pandas.DataFrame): DataFrame containing work hour data, with 'Begin' and 'End' as datetimes.
+    """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.colors import to_rgba_array
+    from matplotlib.dates import DateFormatter,HourLocator,date2num
+
     ax=fig.add_subplot(1, 1, 1)
     ax.set_title('Workweek', y=1, fontsize=18)
 
@@ -619,20 +1105,53 @@ def plot_weekly_hour_distribution(df):
 
     ax.yaxis.set_major_formatter(DateFormatter("%H:00"))
 
-    start=df.Begin[0]-np.timedelta64(df.Begin[0].hour,'h')-np.timedelta64(df.Begin[0].minute,'m')
+    start=df.Begin.iloc[0].normalize()
     end = start+np.timedelta64(24,'h')
     ax.set_ylim(start, end)
     width=0.48
-    month = df.Begin[0].month
-    for i in range(len(df)):
-        day_shift= np.timedelta64((df.Begin[i]-start).days, 'D')
-        ax.fill_between([1+df.Begin[i].weekday()-width,1+df.Begin[i].weekday()+width],
-                        [df.Begin[i]-day_shift,
-                         df.Begin[i]-day_shift],
-                        [df.End[i]-day_shift,
-                         df.End[i]-day_shift],
-                        alpha=0.8,color=f'C{get_wk_nb(df.Begin[i])-month}')
-    plt.gca().invert_yaxis()
-    weeks_present = np.unique(df.Begin.apply(get_wk_nb))
+    month = df.Begin.iloc[0].month
+
+    # Every shift is drawn on the same day, as minutes since its midnight
+    begin = df.Begin.to_numpy(dtype='datetime64[m]')
+    dates = begin.astype('datetime64[D]')
+    begin_minutes = (begin-dates).astype(np.int64)
+    end_minutes = (df.End.to_numpy(dtype='datetime64[m]')-dates).astype(np.int64)
+    calendar_index = get_calendar_index()
+    weekdays = calendar_index.weekday(dates.astype(np.int64)).astype(np.int64)
+    weeks = calendar_index.iso_week(dates.astype(np.int64)).astype(np.int64)
+
+    # Shifts that cross midnight are split into a bar until midnight and a bar from midnight on the next weekday
+    overnight = end_minutes>MINUTES_PER_DAY
+    bar_weekdays = np.concatenate([weekdays,(weekdays[overnight]+1)%len(DAYS)])
+    bar_begins = np.concatenate([begin_minutes,np.zeros(overnight.sum(),dtype=np.int64)])
+    bar_ends = np.concatenate([np.minimum(end_minutes,MINUTES_PER_DAY),end_minutes[overnight]-MINUTES_PER_DAY])
+    bar_weeks = np.concatenate([weeks,weeks[overnight]])
+
+    # One rectangle per bar, all drawn as a single collection
+    left = 1+bar_weekdays-width
+    right = 1+bar_weekdays+width
+    top = date2num(start)+bar_begins/MINUTES_PER_DAY
+    bottom = date2num(start)+bar_ends/MINUTES_PER_DAY
+    vertices = np.stack([np.column_stack([left,top]),np.column_stack([left,bottom]),
+                         np.column_stack([right,bottom]),np.column_stack([right,top])],axis=1)
+    color_indexes,bar_color_indexes = np.unique(get_week_color_index(bar_weeks,month),return_inverse=True)
+    colors = to_rgba_array([f'C{index}' for index in color_indexes])[bar_color_indexes]
+    ax.add_collection(PolyCollection(vertices,facecolors=colors,edgecolors=colors,alpha=0.8))
+
+    ax.invert_yaxis()
+    weeks_present = np.unique(weeks)
     for ind,week_nb in enumerate(weeks_present):
-        fig.text(0.15+ind*0.04, 0.9, f"Week {week_nb} ",backgroundcolor=f'C{week_nb-month}', color='white', weight='roman', size='medium')
\ No newline at end of file
+        fig.text(0.15+ind*0.04, 0.9, f"Week {week_nb} ",backgroundcolor=f'C{get_week_color_index(week_nb,month)}', color='white', weight='roman', size='medium')
+
+def get_week_color_index(week_nb,month):
+    """
+    Get the index of the matplotlib color ('C0' to 'C9') used for an ISO week in the weekly plots.
+
+    Parameters:
+    - week_nb (int or np.ndarray): The ISO week numbers.
+    - month (int): The month being plotted.
+
+    Returns:
+    - int or np.ndarray: The color indexes.
+    """
+    return (week_nb-month)%10
@@ -0,0 +1,124 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Export languages of the worklog app. The first column header identifies the language of a file and the
+# month tokens are every spelling of each month found in its dates, e.g. "Do., Juni 30". Adding a language
+# is one entry here (or a register_locale call); tokens are matched case insensitively.
+LOCALES = {
+    'German':{'date_header':'Datum',
+              'months':[('Jan.','Jan','Januar'),('Feb.','Feb','Februar'),('März','Mär'),('Apr.','Apr','April'),
+                        ('Mai',),('Juni','Jun'),('Juli','Jul'),('Aug.','Aug','August'),
+                        ('Sept.','Sept','Sep.','Sep','September'),('Okt.','Okt','Oktober'),
+                        ('Nov.','Nov','November'),('Dez.','Dez','Dezember')]},
+    'English':{'date_header':'Date',
+               'months':[('Jan','Jan.','January'),('Feb','Feb.','February'),('Mar','Mar.','March'),
+                         ('Apr','Apr.','April'),('May',),('Jun','June'),('Jul','July'),('Aug','Aug.','August'),
+                         ('Sep','Sep.','Sept','Sept.','September'),('Oct','Oct.','October'),
+                         ('Nov','Nov.','November'),('Dec','Dec.','December')]},
+    'Spanish':{'date_header':'Fecha',
+               'months':[('ene.','ene','enero'),('feb.','feb','febrero'),('mar.','mar','marzo'),
+                         ('abr.','abr','abril'),('may.','may','mayo'),('jun','jun.','junio'),('jul','jul.','julio'),
+                         ('ago.','ago','agosto'),('sep.','sep','sept.','sept','septiembre'),
+                         ('oct.','oct','octubre'),('nov.','nov','noviembre'),('dic.','dic','diciembre')]},
+}
+
+_locales_by_header = {}
+_month_numbers = {}
+_date_pattern = None
+
+def register_locale(name,date_header,months):
+    """
+    Add (or replace) an export language.
+
+    Parameters:
+    - name (str): Name of the language, e.g. 'French'.
+    - date_header (str): Header of the first (date) column of its exports, e.g. 'Date'.
+    - months (list): 12 tuples, January first, with the spellings of each month in its dates.
+    """
+    if len(months)!=12:
+        raise ValueError(f'{name} needs the spellings of 12 months, got {len(months)}')
+    LOCALES[name] = {'date_header':date_header,'months':[tuple(tokens) for tokens in months]}
+    _compile_locales()
+
+def _compile_locales():
+    """
+    Build the header lookup, the month lookups and the date regex of all registered languages.
+    """
+    global _date_pattern
+    _locales_by_header.clear()
+    _month_numbers.clear()
+    all_tokens = set()
+    for name,locale in LOCALES.items():
+        _locales_by_header[locale['date_header']] = name
+        _month_numbers[name] = {token.lower():month for month,tokens in enumerate(locale['months'],1)
+                                for token in tokens}
+        all_tokens.update(_month_numbers[name])
+    # Longest tokens first, so "Sept." is not matched as "Sep"
+    month_alternatives = '|'.join(re.escape(token) for token in sorted(all_tokens,key=len,reverse=True))
+    _date_pattern = re.compile(rf'^\s*\S+\s+(?P<month>{month_alternatives})\s+(?P<day>\d{{1,2}})\s*$',
+                               re.IGNORECASE)
+
+def get_locale_from_columns(columns):
+    """
+    Get the language of a worklog export from its column names.
+
+    Parameters:
+    - columns (list): The column names of the export.
+
+    Returns:
+    - str: The name of the language, a key of LOCALES.
+    """
+    try:
+        return _locales_by_header[columns[0]]
+    except KeyError:
+        known_headers = ', '.join(f"'{header}' ({name})" for header,name in _locales_by_header.items())
+        raise ValueError(f"Unknown worklog export format: the first column is '{columns[0]}', expected one of "
+                         f'{known_headers}') from None
+
+def get_month_number(month_token,locale):
+    """
+    Get the month number of a month spelling.
+
+    Parameters:
+    - month_token (str): The month as written in the dates, e.g. "Juni".
+    - locale (str): The name of the language.
+
+    Returns:
+    - int: The month number.
+    """
+    try:
+        return _month_numbers[locale][month_token.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown {locale} month '{month_token}'") from None
+
+def get_month_and_day_from_dates(date_series,locale):
+    """
+    Get the month and day numbers of a column of date strings.
+
+    Only the distinct strings (at most 31 in a month) go through the date regex, the result is broadcast
+    back to every row.
+
+    Parameters:
+    - date_series (pd.Series): Date strings as exported by the worklog app, e.g. "Do., Juni 30".
+    - locale (str): The name of the language of the dates.
+
+    Returns:
+    - months (np.ndarray): The month number of every row.
+    - days (np.ndarray): The day of the month of every row.
+    """
+    if locale not in _month_numbers:
+        raise ValueError(f"Unknown language '{locale}', expected one of {list(LOCALES)}")
+    codes,uniques = pd.factorize(date_series)
+    parts = pd.Series(uniques,dtype=object).str.extract(_date_pattern)
+    month_numbers = parts['month'].str.lower().map(_month_numbers[locale])
+    unparsed = month_numbers.isna().to_numpy()
+    if unparsed.any():
+        raise ValueError(f'Dates not in the {locale} format of the worklog app, e.g. '
+                         f'{list(np.asarray(uniques,dtype=object)[unparsed][:5])}')
+    months = month_numbers.to_numpy(dtype=np.int64)[codes]
+    days = parts['day'].to_numpy(dtype=np.int64)[codes]
+    return months,days
+
+_compile_locales()
@@ -0,0 +1,128 @@
+from functools import lru_cache
+import glob
+import hashlib
+import json
+import os
+
+MANIFEST_PATH = os.path.join(os.path.abspath(''),".worklog_build","manifest.json")
+MANIFEST_VERSION = 1
+
+@lru_cache(maxsize=None)
+def get_code_version():
+    """
+    Get the version of the code that renders the documents: a hash of the source of every module of utils and
+    of the PDF library version, so any change to them rebuilds every document.
+
+    Returns:
+    - str: The hexadecimal hash.
+    """
+    digest = hashlib.sha256()
+    for file_path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),'*.py'))):
+        digest.update(os.path.basename(file_path).encode())
+        with open(file_path,'rb') as f:
+            digest.update(f.read())
+    try:
+        import fpdf
+        digest.update(str(getattr(fpdf,'FPDF_VERSION',getattr(fpdf,'__version__',''))).encode())
+    except ImportError:
+        pass
+    return digest.hexdigest()
+
+def get_config_hash(*config_data):
+    """
+    Hash configuration dictionaries, e.g. the company and employee details of a document.
+
+    Parameters:
+    - config_data (dict): The dictionaries.
+
+    Returns:
+    - str: The hexadecimal hash, independent of the order of the keys.
+    """
+    return hashlib.sha256(json.dumps(config_data,sort_keys=True,default=str).encode()).hexdigest()
+
+class BuildManifest:
+    """
+    Make-style record of the inputs every generated document was built from.
+
+    Every output path maps to its dependencies (e.g. the hash of the raw file and of the config, the rates, the
+    code version) and to the size and modification time the file had once written. A document is up to date
+    when its dependencies are the same and the file was not deleted or changed since. The manifest is saved to
+    MANIFEST_PATH.
+
+        manifest = BuildManifest.load()
+        if not manifest.is_up_to_date(output_path,dependencies):
+            ... # generate the document
+            manifest.record(output_path,dependencies)
+        manifest.save()
+    """
+
+    def __init__(self,entries=None,file_path=None):
+        """
+        Parameters:
+        - entries (dict, optional): Recorded outputs by absolute path.
+        - file_path (str, optional): Where the manifest is saved. Defaults to MANIFEST_PATH.
+        """
+        self.entries = entries or {}
+        self.file_path = file_path or MANIFEST_PATH
+
+    @classmethod
+    def load(cls,file_path=None):
+        """
+        Load a saved manifest.
+
+        Parameters:
+        - file_path (str, optional): The manifest file. Defaults to MANIFEST_PATH.
+
+        Returns:
+        - BuildManifest: The manifest, empty when there is none or it was written by another version.
+        """
+        try:
+            with open(file_path or MANIFEST_PATH) as f:
+                state = json.load(f)
+        except (OSError,ValueError):
+            return cls(file_path=file_path)
+        if not isinstance(state,dict) or state.get('version')!=MANIFEST_VERSION:
+            return cls(file_path=file_path)
+        return cls(state['outputs'],file_path)
+
+    def save(self):
+        """
+        Save the manifest to its file.
+        """
+        os.makedirs(os.path.dirname(self.file_path),exist_ok=True)
+        temporary_path = f'{self.file_path}.{os.getpid()}.tmp'
+        with open(temporary_path,'w') as f:
+            json.dump({'version':MANIFEST_VERSION,'outputs':self.entries},f,indent=1,sort_keys=True)
+        os.replace(temporary_path,self.file_path)
+
+    def is_up_to_date(self,output_path,dependencies):
+        """
+        Check whether a document was built from the same dependencies and is still as it was written.
+
+        Parameters:
+        - output_path (str): The path of the document.
+        - dependencies (dict): What the document is built from, JSON serializable.
+
+        Returns:
+        - bool: True when the document does not need to be generated again.
+        """
+        entry = self.entries.get(os.path.abspath(output_path))
+        if entry is None or entry['dependencies']!=json.loads(json.dumps(dependencies,default=str)):
+            return False
+        try:
+            stat = os.stat(output_path)
+        except OSError:
+            return False
+        return (stat.st_size,stat.st_mtime)==(entry['size'],entry['mtime'])
+
+    def record(self,output_path,dependencies):
+        """
+        Record a document that was just written.
+
+        Parameters:
+        - output_path (str): The path of the document.
+        - dependencies (dict): What the document was built from, JSON serializable.
+        """
+        stat = os.stat(output_path)
+        self.entries[os.path.abspath(output_path)] = {'dependencies':json.loads(json.dumps(dependencies,default=str)),
+                                                      'size':stat.st_size,'mtime':stat.st_mtime}
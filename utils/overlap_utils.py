@@ -0,0 +1,255 @@
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utils.duration_utils import format_duration
+from utils.invoice_utils import get_hours_from_minutes, get_total_hours_from_minutes
+
+OVERLAP_POLICIES = ('warn','error','merge')
+UTILS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))+os.sep
+
+class ShiftIntervalIndex:
+    """
+    Shifts sorted by group (e.g. person) and begin, to find duplicated and overlapping shifts in one sweep.
+
+    Sorting is O(n log n), the sweep is O(n): a shift overlaps an earlier one of its group when it begins before
+    the latest end seen so far. Shifts that only touch (one ends when the next begins) do not overlap. Positions
+    are the row positions of the arrays the index was built from.
+    """
+
+    def __init__(self,begin_minutes,end_minutes,groups=None):
+        """
+        Parameters:
+        - begin_minutes (array-like): Begin of every shift, in minutes on a common clock (e.g. since 1970-01-01).
+        - end_minutes (array-like): End of every shift, on the same clock.
+        - groups (array-like, optional): Group of every shift, e.g. the person. Shifts of different groups never
+          overlap. Defaults to a single group.
+        """
+        begin_minutes = np.asarray(begin_minutes,dtype=np.int64)
+        end_minutes = np.asarray(end_minutes,dtype=np.int64)
+        group_codes = np.zeros(len(begin_minutes),dtype=np.int64) if groups is None else pd.factorize(groups)[0]
+        self.order = np.lexsort((end_minutes,begin_minutes,group_codes))
+        self.begin_minutes = begin_minutes[self.order]
+        self.end_minutes = end_minutes[self.order]
+        self.group_codes = group_codes[self.order]
+        n = len(self.order)
+
+        # Offset every group past the clock range of the previous ones, so one running maximum serves all groups
+        if n:
+            origin = self.begin_minutes.min()
+            span = int(max(self.end_minutes.max(),self.begin_minutes.max())-origin)+1
+            begin_keys = self.group_codes*span+self.begin_minutes-origin
+            end_keys = self.group_codes*span+self.end_minutes-origin
+        else:
+            begin_keys = end_keys = np.zeros(0,dtype=np.int64)
+        latest_end = np.maximum.accumulate(end_keys)
+        # Sorted position of the shift ending last so far
+        latest_holder = np.maximum.accumulate(np.where(end_keys==latest_end,np.arange(n),0))
+
+        previous_end = np.concatenate([[-1],latest_end[:-1]])
+        same_as_previous = np.zeros(n,dtype=bool)
+        same_as_previous[1:] = ((self.group_codes[1:]==self.group_codes[:-1])
+                                &(self.begin_minutes[1:]==self.begin_minutes[:-1])
+                                &(self.end_minutes[1:]==self.end_minutes[:-1]))
+        self.is_duplicate = same_as_previous
+        self.is_overlap = (begin_keys<previous_end) | same_as_previous
+        # The earlier shift every flagged shift collides with: the first copy for duplicates, the one ending last otherwise
+        run_starts = np.maximum.accumulate(np.where(same_as_previous,0,np.arange(n)))
+        self.other = np.where(same_as_previous,run_starts,np.concatenate([[0],latest_holder[:-1]]))
+        self.overlap_minutes = np.where(self.is_overlap,
+                                        np.minimum(end_keys,previous_end)-begin_keys,0)
+        # Overlapping shifts chain into clusters, every cluster becomes one shift in the merged view
+        self.cluster_ids = np.cumsum(~self.is_overlap)-1
+        self.cluster_starts = np.flatnonzero(~self.is_overlap)
+
+    def __len__(self):
+        return len(self.order)
+
+    def flagged_positions(self):
+        """
+        Returns:
+        - np.ndarray: Positions of the shifts that duplicate or overlap an earlier shift of their group, in order.
+        """
+        return np.sort(self.order[self.is_overlap])
+
+    def report(self):
+        """
+        Get the duplicated and overlapping shifts.
+
+        Returns:
+        - pd.DataFrame: One row per flagged shift, in position order, with the columns 'position', 'other_position'
+          (the earlier shift it collides with), 'kind' ('duplicate' or 'overlap') and 'overlap_minutes'.
+        """
+        flagged = np.flatnonzero(self.is_overlap)
+        report = pd.DataFrame({'position':self.order[flagged],
+                               'other_position':self.order[self.other[flagged]],
+                               'kind':np.where(self.is_duplicate[flagged],'duplicate','overlap'),
+                               'overlap_minutes':self.overlap_minutes[flagged]})
+        return report.sort_values('position',kind='stable',ignore_index=True)
+
+    def merged_intervals(self):
+        """
+        Merge every cluster of overlapping shifts into one interval.
+
+        Returns:
+        - positions (np.ndarray): Position of the first shift (in position order) of every cluster, sorted.
+        - begin_minutes (np.ndarray): Begin of every merged interval.
+        - end_minutes (np.ndarray): End of every merged interval.
+        - cluster_ids (np.ndarray): Cluster of every shift, by position, numbered like the merged intervals.
+        - earliest_positions (np.ndarray): Position of the shift beginning first in every cluster.
+        """
+        if not len(self):
+            empty = np.zeros(0,dtype=np.int64)
+            return empty,empty,empty,empty,empty
+        begins = self.begin_minutes[self.cluster_starts]
+        ends = np.maximum.reduceat(self.end_minutes,self.cluster_starts)
+        first_positions = np.minimum.reduceat(self.order,self.cluster_starts)
+        # Number the clusters in position order
+        cluster_order = np.argsort(first_positions,kind='stable')
+        renumbered = np.empty_like(cluster_order)
+        renumbered[cluster_order] = np.arange(len(cluster_order))
+        cluster_ids = np.empty(len(self),dtype=np.int64)
+        cluster_ids[self.order] = renumbered[self.cluster_ids]
+        # Shifts are sorted by begin, the first one of every cluster begins first
+        earliest_positions = self.order[self.cluster_starts]
+        return (first_positions[cluster_order],begins[cluster_order],ends[cluster_order],cluster_ids,
+                earliest_positions[cluster_order])
+
+    def double_counted_minutes(self):
+        """
+        Returns:
+        - int: Minutes counted more than once when the shifts are added up as they are.
+        """
+        _,begins,ends,_,_ = self.merged_intervals()
+        return int((self.end_minutes-self.begin_minutes).sum()-(ends-begins).sum())
+
+def get_shift_interval_index(df,group_columns=None):
+    """
+    Index the shifts of a worklog with 'Begin' and 'End' as datetimes, as returned by
+    extract_worked_hour_as_df(..., drop_date_from_beginning_end=False).
+
+    Parameters:
+    - df (pd.DataFrame): The worklog.
+    - group_columns (str or list, optional): Columns identifying whose shifts they are, e.g. 'Person'. Defaults
+      to every shift belonging to the same person.
+
+    Returns:
+    - ShiftIntervalIndex: The index, with the row positions of df.
+    """
+    begin_minutes = df['Begin'].to_numpy(dtype='datetime64[m]').astype(np.int64)
+    end_minutes = df['End'].to_numpy(dtype='datetime64[m]').astype(np.int64)
+    groups = None
+    if group_columns is not None:
+        keys = df[group_columns]
+        groups = keys if isinstance(keys,pd.Series) else pd.MultiIndex.from_frame(keys)
+    return ShiftIntervalIndex(begin_minutes,end_minutes,groups)
+
+def find_shift_overlaps(df,group_columns=None):
+    """
+    Find the duplicated and overlapping shifts of a worklog.
+
+    Parameters:
+    - df (pd.DataFrame): The worklog, with 'Begin' and 'End' as datetimes.
+    - group_columns (str or list, optional): Columns identifying whose shifts they are, e.g. 'Person'.
+
+    Returns:
+    - pd.DataFrame: One row per shift that duplicates or overlaps an earlier one, indexed like df, with its
+      'Date', 'Begin', 'End' and 'Notes', the index label of the earlier shift ('overlaps'), 'kind'
+      ('duplicate' or 'overlap') and 'overlap_minutes'.
+    """
+    report = get_shift_interval_index(df,group_columns).report()
+    rows = df.iloc[report['position']]
+    return pd.DataFrame({'Date':rows['Date'].to_numpy(),
+                         'Begin':rows['Begin'].to_numpy(),
+                         'End':rows['End'].to_numpy(),
+                         'Notes':rows['Notes'].to_numpy(),
+                         'overlaps':df.index[report['other_position']],
+                         'kind':report['kind'].to_numpy(),
+                         'overlap_minutes':report['overlap_minutes'].to_numpy()},
+                        index=rows.index)
+
+def merge_overlapping_shifts(df,group_columns=None):
+    """
+    Merge the duplicated and overlapping shifts of a worklog, so no minute is counted twice.
+
+    Every cluster of overlapping shifts becomes one row, in place of its first row: it begins with the first
+    shift, on its date, ends with the last one, and keeps the distinct notes of the cluster joined with "; ".
+
+    Parameters:
+    - df (pd.DataFrame): The worklog, with 'Begin' and 'End' as datetimes.
+    - group_columns (str or list, optional): Columns identifying whose shifts they are, e.g. 'Person'.
+
+    Returns:
+    - pd.DataFrame: The merged worklog, in the same format and order as df.
+    """
+    index = get_shift_interval_index(df,group_columns)
+    if not index.is_overlap.any():
+        return df.copy()
+    positions,begin_minutes,end_minutes,cluster_ids,earliest_positions = index.merged_intervals()
+    merged = df.iloc[positions].copy()
+    # Raw files list the newest shifts first, the date of a cluster is the one of the shift it begins with
+    merged['Date'] = df['Date'].to_numpy()[earliest_positions]
+    merged['Begin'] = begin_minutes.astype('datetime64[m]').astype(df['Begin'].dtype)
+    merged['End'] = end_minutes.astype('datetime64[m]').astype(df['End'].dtype)
+    merged['Hours'] = get_hours_from_minutes(end_minutes-begin_minutes)
+    notes = pd.DataFrame({'cluster':cluster_ids,'Notes':df['Notes'].to_numpy()}).dropna().drop_duplicates()
+    joined_notes = notes.groupby('cluster',sort=True)['Notes'].agg(lambda cluster_notes: '; '.join(map(str,cluster_notes)))
+    merged['Notes'] = joined_notes.reindex(np.arange(len(positions))).to_numpy()
+    return merged
+
+def _get_outside_stacklevel():
+    # The stacklevel of the first frame outside utils, as seen by the function calling this one
+    frame = sys._getframe(1)
+    stacklevel = 1
+    while frame.f_back is not None and os.path.abspath(frame.f_code.co_filename).startswith(UTILS_DIRECTORY):
+        frame = frame.f_back
+        stacklevel += 1
+    return stacklevel
+
+def apply_overlap_policy(df,policy,group_columns=None):
+    """
+    Check a worklog for duplicated and overlapping shifts before its hours are totalled.
+
+    Parameters:
+    - df (pd.DataFrame): The worklog, with 'Begin' and 'End' as datetimes.
+    - policy (str): A value of OVERLAP_POLICIES: 'warn' to issue a warning listing them, 'error' to raise a
+      ValueError, 'merge' to merge them (see merge_overlapping_shifts).
+    - group_columns (str or list, optional): Columns identifying whose shifts they are, e.g. 'Person'.
+
+    Returns:
+    - df (pd.DataFrame): The worklog, merged with the 'merge' policy.
+    - total_hours (str or None): The total hours of the merged worklog in "HH:MM" format, None when df is
+      returned unchanged.
+    """
+    if policy not in OVERLAP_POLICIES:
+        raise ValueError(f"Unknown overlap policy '{policy}', expected one of {list(OVERLAP_POLICIES)}")
+    if policy == 'merge':
+        merged = merge_overlapping_shifts(df,group_columns)
+        if len(merged) == len(df):
+            return df,None
+        minutes = (merged['End']-merged['Begin'])//pd.Timedelta(minutes=1)
+        return merged,get_total_hours_from_minutes(int(minutes.sum()))
+    index = get_shift_interval_index(df,group_columns)
+    report = index.report()
+    if len(report):
+        kinds = report['kind'].value_counts()
+        begins = df['Begin'].to_numpy(dtype='datetime64[m]').astype(object)
+        ends = df['End'].to_numpy(dtype='datetime64[m]').astype(object)
+        lines = [f"{begins[row.position]:%d/%m %H:%M}-{ends[row.position]:%H:%M} {row.kind}s "
+                 f"{begins[row.other_position]:%d/%m %H:%M}-{ends[row.other_position]:%H:%M}"
+                 for row in report.head(10).itertuples()]
+        if len(report)>10:
+            lines.append(f'... and {len(report)-10} more')
+        message = (f"{kinds.get('duplicate',0)} duplicated and {kinds.get('overlap',0)} overlapping shifts, "
+                   f"{format_duration(index.double_counted_minutes())} counted twice:\n  "+'\n  '.join(lines))
+        if policy == 'error':
+            raise ValueError(message)
+        # Reported at the first caller outside utils, whichever function of utils it went through
+        if sys.version_info >= (3,12):
+            warnings.warn(message,skip_file_prefixes=(UTILS_DIRECTORY,))
+        else:
+            warnings.warn(message,stacklevel=_get_outside_stacklevel())
+    return df,None
@@ -0,0 +1,230 @@
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import os
+import threading
+
+from fpdf import FPDF
+
+PDF_DESTINATIONS = ('file','background','bytes')
+PDF_WRITER_THREADS = 4 # Writes mostly wait on the disk (or network share), so threads are enough
+
+_writer_pool = None
+_pending_writes = set()
+_pending_writes_lock = threading.Lock()
+
+class PDF(FPDF):
+    """
+    Custom PDF class inheriting from FPDF for generating PDF files.
+    This class overrides the default header and footer methods of FPDF to provide a custom header and footer.
+    """
+
+    # Uncommented and added docstring for header
+    # def header(self):
+    #     """
+    #     Overrides the default header method to set a custom header for the PDF.
+    #     Sets the font to Arial bold with size 15 and displays the title in the center.
+    #     """
+    #     # Arial bold 15
+    #     self.set_font('Arial', 'B', 15)
+    #     # Move to the right
+    #     self.cell(80)
+    #     # Title
+    #     self.cell(30, 10, 'Title', 1, 0, 'C')
+    #     # Line break
+    #     self.ln(20)
+
+    def footer(self):
+        """
+        Overrides the default footer method to set a custom footer for the PDF.
+        Sets the font to Arial italic with size 8 and displays the page number in the center.
+        """
+        # Position at 1.5 cm from bottom
+        self.set_y(-15)
+        # Arial italic 8
+        self.set_font('Arial', 'I', 8)
+        # Page number
+        self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
+
+    def set_document_date(self,document_date):
+        """
+        Pin the creation date written in the document information, instead of the time of output.
+
+        Parameters:
+        - document_date (datetime.datetime): The date.
+        """
+        if hasattr(FPDF,'set_creation_date'):
+            # fpdf2
+            self.set_creation_date(document_date)
+        else:
+            self.creation_date = document_date
+
+    def _putinfo(self):
+        """
+        Write the document information, with the pinned creation date of fpdf 1.7 (see set_document_date).
+        """
+        super()._putinfo()
+        creation_date = getattr(self,'creation_date',None)
+        if creation_date is not None and isinstance(self.buffer,str):
+            # fpdf 1.7 writes the time of output last, swap it for the pinned date
+            self.buffer = (self.buffer[:self.buffer.rindex('/CreationDate ')]
+                           +'/CreationDate '+self._textstring('D:'+creation_date.strftime('%Y%m%d%H%M%S'))+'\n')
+
+    def clone(self):
+        """
+        Make an independent copy of the PDF, to continue drawing on it without changing the original.
+
+        The page contents are immutable strings, so only the containers holding them are copied,
+        which is far cheaper than copy.deepcopy.
+
+        Returns:
+        - PDF: The copy.
+        """
+        pdf = copy.copy(self)
+        for name,value in vars(self).items():
+            if isinstance(value,(dict,list)):
+                setattr(pdf,name,copy.copy(value))
+        # Font entries get their object numbers written into them on output
+        pdf.fonts = {key:dict(font) for key,font in self.fonts.items()}
+        if self.current_font:
+            pdf.current_font = next(font for key,font in pdf.fonts.items() if self.fonts[key] is self.current_font)
+        return pdf
+
+class PDFTemplate:
+    """
+    A first page laid out once, with named slots for the values that change from one document to the next.
+
+    The static layout is drawn on self.pdf, calling add_slot where a variable value goes. render then stamps
+    the values into a cheap copy of the page and leaves the cursor and font where the layout ended, so the
+    caller continues drawing (e.g. a table) as if it had built the whole page itself.
+    """
+
+    def __init__(self):
+        self.pdf = PDF()
+        self.pdf.alias_nb_pages()
+        self.pdf.add_page()
+        self.pdf.set_xy(0, 0)
+        self.slots = {}
+
+    def add_slot(self,name,w,h,ln=0,align='L'):
+        """
+        Reserve a cell for a variable value at the current position, with the current font and text color.
+
+        Parameters:
+        - name (str): Name of the slot, used as keyword argument of render.
+        - w (float): Cell width.
+        - h (float): Cell height.
+        - ln (int): Where the cursor goes after the cell, as for FPDF.cell. Default is 0.
+        - align (str): Text alignment, as for FPDF.cell. Default is 'L'.
+        """
+        pdf = self.pdf
+        self.slots[name] = (pdf.x,pdf.y,w,h,align,pdf.font_family,pdf.font_style,pdf.font_size_pt,
+                            pdf.text_color,pdf.color_flag)
+        pdf.cell(w,h,'',0,ln,align)
+
+    def render(self,**values):
+        """
+        Make a copy of the laid out page with the slots filled in.
+
+        Parameters:
+        - values: Text of every slot, by slot name.
+
+        Returns:
+        - PDF: The page, ready for the variable content.
+        """
+        pdf = self.pdf.clone()
+        for name,text in values.items():
+            x,y,w,h,align,family,style,size,text_color,color_flag = self.slots[name]
+            pdf.set_xy(x,y)
+            pdf.set_font(family,style,size)
+            pdf.text_color,pdf.color_flag = text_color,color_flag
+            pdf.cell(w,h,text,0,0,align)
+
+        # Back to where the layout ended
+        template = self.pdf
+        pdf.set_font(template.font_family,template.font_style,template.font_size_pt)
+        pdf.text_color,pdf.color_flag = template.text_color,template.color_flag
+        pdf.set_xy(template.x,template.y)
+        return pdf
+
+def get_pdf_bytes(pdf):
+    """
+    Serialize a PDF in memory.
+
+    Parameters:
+    - pdf (FPDF): The finished document.
+
+    Returns:
+    - bytes: The PDF file content, the same bytes pdf.output(name, 'F') would write.
+    """
+    content = pdf.output(dest='S')
+    # fpdf 1.7 returns the document as a latin-1 string, fpdf2 as a bytearray
+    return content.encode('latin-1') if isinstance(content,str) else bytes(content)
+
+def write_pdf(file_name,content):
+    """
+    Write PDF bytes to a file.
+
+    Parameters:
+    - file_name (str): The destination.
+    - content (bytes): The PDF file content.
+    """
+    os.makedirs(os.path.dirname(file_name) or '.',exist_ok=True)
+    with open(file_name,'wb') as f:
+        f.write(content)
+
+def write_pdf_in_background(file_name,content):
+    """
+    Queue PDF bytes to be written to a file by the writer threads, so the next document can be laid out meanwhile.
+
+    Parameters:
+    - file_name (str): The destination.
+    - content (bytes): The PDF file content.
+
+    Returns:
+    - concurrent.futures.Future: Completes when the file is written, raising the error of the write if any.
+    """
+    global _writer_pool
+    with _pending_writes_lock:
+        if _writer_pool is None:
+            _writer_pool = ThreadPoolExecutor(max_workers=PDF_WRITER_THREADS,thread_name_prefix='pdf-writer')
+        future = _writer_pool.submit(write_pdf,file_name,content)
+        _pending_writes.add(future)
+    future.add_done_callback(_forget_write)
+    return future
+
+def _forget_write(future):
+    with _pending_writes_lock:
+        _pending_writes.discard(future)
+
+def wait_for_pdf_writes():
+    """
+    Wait until every PDF queued with write_pdf_in_background is written.
+
+    Raises the error of the first failed write, if any.
+    """
+    with _pending_writes_lock:
+        pending = list(_pending_writes)
+    for future in pending:
+        future.result()
+
+def output_pdf(pdf,file_name,destination='file'):
+    """
+    Finish a PDF and send it to its destination.
+
+    Parameters:
+    - pdf (FPDF): The document.
+    - file_name (str): Where the file goes for the 'file' and 'background' destinations.
+    - destination (str): 'file' to write it now, 'background' to queue it for the writer threads, 'bytes' to
+      only return its content. Default is 'file'.
+
+    Returns:
+    - None for 'file', a concurrent.futures.Future for 'background' and the PDF bytes for 'bytes'.
+    """
+    if destination not in PDF_DESTINATIONS:
+        raise ValueError(f"Unknown PDF destination '{destination}', expected one of {PDF_DESTINATIONS}")
+    content = get_pdf_bytes(pdf)
+    if destination == 'bytes':
+        return content
+    if destination == 'background':
+        return write_pdf_in_background(file_name,content)
+    write_pdf(file_name,content)
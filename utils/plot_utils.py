@@ -0,0 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import time
+import traceback
+
+from utils.invoice_utils import draw_weekly_hour_distribution, extract_worked_hour_as_df
+
+IMAGES_DIRECTORY = os.path.join(os.path.abspath(''),"3-Images")
+PLOT_FIGURE_SIZE = (18, 9)
+
+# Figure reused by all the jobs of a worker process
+_worker_figure = None
+
+def _init_plot_worker():
+    """
+    Set up a worker process: headless Agg backend and one figure for all its jobs.
+    """
+    global _worker_figure
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Not created through pyplot, so pyplot never holds a reference to it
+    _worker_figure = Figure(figsize=PLOT_FIGURE_SIZE)
+    FigureCanvasAgg(_worker_figure)
+
+def render_weekly_plot(company_name,month,year,formats=('png',),output_directory=None,raw_directory=None,dpi=100,
+                       person_id=None):
+    """
+    Render the week distribution chart of one month and save it in every requested format.
+
+    Must run in a process set up by _init_plot_worker. Exceptions are caught and returned, so a failing job
+    never stops the rest of a batch.
+
+    Parameters:
+    - company_name (str): The name of the company, used in the raw data filename.
+    - month (int): The month to plot.
+    - year (int): The year to plot.
+    - formats (tuple): Image formats understood by matplotlib, e.g. ('png', 'svg'). Default is ('png',).
+    - output_directory (str, optional): Where the images are written. Defaults to IMAGES_DIRECTORY.
+    - raw_directory (str, optional): Directory containing the CSV file. Defaults to RAW_DIRECTORY.
+    - dpi (int): Resolution of raster formats. Default is 100.
+    - person_id (str, optional): The id of the person whose month it is, reported in the result.
+
+    Returns:
+    - dict: Job result with keys 'person', 'company', 'month', 'year', 'files', 'seconds' and 'error' (None on success).
+    """
+    result = {'person':person_id,'company':company_name,'month':month,'year':year,'files':[],'seconds':0.,'error':None}
+    start = time.perf_counter()
+    try:
+        os.makedirs(output_directory or IMAGES_DIRECTORY,exist_ok=True)
+        df,_ = extract_worked_hour_as_df(month,year,company_name,drop_date_from_beginning_end=False,
+                                         raw_directory=raw_directory)
+        draw_weekly_hour_distribution(_worker_figure,df)
+        for image_format in formats:
+            file_name = os.path.join(output_directory or IMAGES_DIRECTORY,
+                                     f'{company_name}_{int(month):02d}{year}_week_distribution.{image_format}')
+            _worker_figure.savefig(file_name,format=image_format,dpi=dpi)
+            result['files'].append(file_name)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    finally:
+        # Drop the axes, collections and texts of this job before the next one
+        _worker_figure.clear()
+    result['seconds'] = time.perf_counter()-start
+    return result
+
+def export_weekly_plots(jobs,formats=('png',),output_directory=None,raw_directory=None,dpi=100,max_workers=None):
+    """
+    Render the week distribution charts of many months in parallel, headless, and save them as images.
+
+    Every worker process uses the Agg backend and a single figure, cleared between jobs, so long runs do not
+    accumulate figures.
+
+    Parameters:
+    - jobs (list): (company_name, month, year) tuples.
+    - formats (tuple): Image formats understood by matplotlib, e.g. ('png', 'svg'). Default is ('png',).
+    - output_directory (str, optional): Where the images are written. Defaults to IMAGES_DIRECTORY.
+    - raw_directory (str, optional): Directory containing the CSV files. Defaults to RAW_DIRECTORY.
+    - dpi (int): Resolution of raster formats. Default is 100.
+    - max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+    - list: One result dictionary per job (see render_weekly_plot), in the order of the jobs.
+    """
+    return _run_plot_jobs([{'company_name':company_name,'month':month,'year':year,'formats':tuple(formats),
+                            'output_directory':output_directory,'raw_directory':raw_directory,'dpi':dpi}
+                           for company_name,month,year in jobs],max_workers)
+
+def export_registry_weekly_plots(registry,person_ids=None,company_names=None,periods=None,formats=('png',),
+                                 output_directory=None,dpi=100,max_workers=None):
+    """
+    Render the week distribution chart of every person, client and month of a config registry.
+
+    Every person's months are read from their own raw directory and, with several people, their images go to a
+    '{person}' subdirectory of output_directory, so people working for the same company never overwrite each
+    other's charts.
+
+    Parameters:
+    - registry (utils.config_utils.ConfigRegistry): The people and companies.
+    - person_ids, company_names, periods: Narrow down the months, see ConfigRegistry.get_jobs.
+    - formats, dpi, max_workers: See export_weekly_plots.
+    - output_directory (str, optional): Where the images are written. Defaults to IMAGES_DIRECTORY.
+
+    Returns:
+    - list: One result dictionary per month (see render_weekly_plot), sorted by person and file.
+    """
+    from utils.batch_utils import parse_raw_file_name
+    output_directory = output_directory or IMAGES_DIRECTORY
+    jobs = []
+    for person_id,file_path in registry.get_jobs(person_ids,company_names,periods):
+        company_name,month,year = parse_raw_file_name(file_path)
+        jobs.append({'company_name':company_name,'month':month,'year':year,'formats':tuple(formats),
+                     'output_directory':(output_directory if registry.single_employee
+                                         else os.path.join(output_directory,person_id)),
+                     'raw_directory':os.path.dirname(os.path.abspath(file_path)),'dpi':dpi,'person_id':person_id})
+    return _run_plot_jobs(jobs,max_workers)
+
+def _run_plot_jobs(jobs,max_workers=None):
+    """
+    Run render_weekly_plot jobs, given as keyword argument dictionaries, over a pool of plot workers.
+    """
+    results = [None]*len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers,initializer=_init_plot_worker) as executor:
+        futures = {executor.submit(render_weekly_plot,**job):i for i,job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception:
+                # The worker itself died (e.g. BrokenProcessPool)
+                job = jobs[i]
+                results[i] = {'person':job.get('person_id'),'company':job['company_name'],'month':job['month'],
+                              'year':job['year'],'files':[],'seconds':0.,'error':traceback.format_exc()}
+    return results
@@ -0,0 +1,211 @@
+from contextlib import nullcontext
+import functools
+import json
+import time
+import tracemalloc
+
+# Profiler collecting the stages, None when profiling is off
+_active_profiler = None
+
+class _StageRecord:
+    """
+    One timed stage; code inside the stage can set rows.
+    """
+    __slots__ = ('name','path','depth','seconds','rows','peak_bytes','_start','_start_memory','_child_peak')
+
+    def __init__(self,name,path,depth):
+        self.name = name
+        self.path = path
+        self.depth = depth
+        self.seconds = 0.
+        self.rows = None
+        self.peak_bytes = None
+        self._child_peak = 0
+
+    def to_dict(self):
+        return {'stage':self.name,'path':self.path,'depth':self.depth,'seconds':self.seconds,'rows':self.rows,
+                'peak_bytes':self.peak_bytes}
+
+class Profiler:
+    """
+    Record the wall time, row count and peak memory of the pipeline stages run inside a with block.
+
+        with Profiler() as profiler:
+            generate_invoice(...)
+        print(profiler.summary())
+
+    Stages nest: a stage started while another one runs is recorded under its path, e.g.
+    'generate_invoice/extract_worked_hour_as_df/read_csv'. Peak memory is the highest memory allocated by
+    Python during the stage, above what was allocated when it started, as seen by tracemalloc.
+    """
+
+    def __init__(self,trace_memory=True):
+        """
+        Parameters:
+        - trace_memory (bool): Whether to measure peak memory. tracemalloc slows allocations down, so
+          timings are more accurate without it. Default is True.
+        """
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+        self._started_tracemalloc = False
+        self._previous_profiler = None
+
+    def __enter__(self):
+        global _active_profiler
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._previous_profiler,_active_profiler = _active_profiler,self
+        return self
+
+    def __exit__(self,*exc_info):
+        global _active_profiler
+        _active_profiler = self._previous_profiler
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def stage(self,name):
+        """
+        Time a stage.
+
+        Parameters:
+        - name (str): Name of the stage.
+
+        Returns:
+        - context manager: Yields the stage record, whose rows attribute can be set.
+        """
+        return _Stage(self,name)
+
+    def to_dicts(self):
+        """
+        Returns:
+        - list: One dictionary per recorded stage, in the order the stages ended.
+        """
+        return [record.to_dict() for record in self.records]
+
+    def to_json(self,file_path=None):
+        """
+        Export the recorded stages as JSON.
+
+        Parameters:
+        - file_path (str, optional): Where to write the JSON. When None, the JSON is only returned.
+
+        Returns:
+        - str: The JSON document.
+        """
+        document = json.dumps({'stages':self.to_dicts()},indent=2)
+        if file_path is not None:
+            with open(file_path,'w') as f:
+                f.write(document)
+        return document
+
+    def summary(self):
+        """
+        Summarize the recorded stages as a table, one line per stage path, every stage under the stage it ran in.
+
+        Returns:
+        - str: The table, with the number of calls, total and mean seconds, total rows and highest peak memory.
+        """
+        first_starts = {}
+        for record in self.records:
+            first_starts[record.path] = min(first_starts.get(record.path,record._start),record._start)
+        def tree_order(record):
+            # Start times of the stage and of all its enclosing stages, outermost first
+            parts = record.path.split('/')
+            return tuple(first_starts['/'.join(parts[:i+1])] for i in range(len(parts)))
+
+        totals = {}
+        for record in sorted(self.records,key=tree_order):
+            total = totals.setdefault(record.path,{'name':'  '*record.depth+record.name,'calls':0,'seconds':0.,
+                                                   'rows':None,'peak_bytes':None})
+            total['calls'] += 1
+            total['seconds'] += record.seconds
+            if record.rows is not None:
+                total['rows'] = (total['rows'] or 0)+record.rows
+            if record.peak_bytes is not None:
+                total['peak_bytes'] = max(total['peak_bytes'] or 0,record.peak_bytes)
+
+        name_width = max([len('stage')]+[len(total['name']) for total in totals.values()])
+        lines = [f"{'stage':<{name_width}} {'calls':>6} {'seconds':>10} {'mean s':>10} {'rows':>10} {'peak MB':>9}"]
+        for total in totals.values():
+            rows = '' if total['rows'] is None else f"{total['rows']:,}"
+            peak = '' if total['peak_bytes'] is None else f"{total['peak_bytes']/1024**2:.1f}"
+            lines.append(f"{total['name']:<{name_width}} {total['calls']:>6} {total['seconds']:>10.4f} "
+                         f"{total['seconds']/total['calls']:>10.4f} {rows:>10} {peak:>9}")
+        return '\n'.join(lines)
+
+class _Stage:
+    """
+    Context manager timing one stage of a Profiler.
+    """
+    __slots__ = ('profiler','record')
+
+    def __init__(self,profiler,name):
+        self.profiler = profiler
+        stack = profiler._stack
+        path = f'{stack[-1].path}/{name}' if stack else name
+        self.record = _StageRecord(name,path,len(stack))
+
+    def __enter__(self):
+        profiler,record = self.profiler,self.record
+        if profiler.trace_memory and tracemalloc.is_tracing():
+            current,peak = tracemalloc.get_traced_memory()
+            # The peak is reset for this stage, keep what the enclosing stage reached so far
+            if profiler._stack:
+                profiler._stack[-1]._child_peak = max(profiler._stack[-1]._child_peak,peak)
+            tracemalloc.reset_peak()
+            record._start_memory = current
+        profiler._stack.append(record)
+        record._start = time.perf_counter()
+        return record
+
+    def __exit__(self,*exc_info):
+        profiler,record = self.profiler,self.record
+        record.seconds = time.perf_counter()-record._start
+        profiler._stack.pop()
+        if profiler.trace_memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1],record._child_peak)
+            record.peak_bytes = max(peak-record._start_memory,0)
+            if profiler._stack:
+                profiler._stack[-1]._child_peak = max(profiler._stack[-1]._child_peak,peak)
+        profiler.records.append(record)
+
+def profile_stage(name):
+    """
+    Time a stage of the pipeline when a Profiler is active.
+
+        with profile_stage('read_csv') as stage:
+            df = pd.read_csv(file_path)
+            stage.rows = len(df)
+
+    Parameters:
+    - name (str): Name of the stage.
+
+    Returns:
+    - context manager: Yields the stage record, or a throwaway object when profiling is off.
+    """
+    if _active_profiler is None:
+        return _NULL_STAGE
+    return _active_profiler.stage(name)
+
+def profiled(function):
+    """
+    Decorator timing every call of a function as a stage named after it when a Profiler is active.
+    """
+    @functools.wraps(function)
+    def wrapper(*args,**kwargs):
+        if _active_profiler is None:
+            return function(*args,**kwargs)
+        with _active_profiler.stage(function.__name__):
+            return function(*args,**kwargs)
+    return wrapper
+
+class _NullRecord:
+    """
+    Stands in for the stage record when profiling is off, setting rows on it does nothing.
+    """
+    __slots__ = ('rows',)
+
+_NULL_STAGE = nullcontext(_NullRecord())
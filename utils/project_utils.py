@@ -0,0 +1,117 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.duration_utils import get_amount_for_minutes, round_minutes, split_rounded_minutes, to_minor_units
+
+DEFAULT_LINE_DESCRIPTION = 'Work hours' # Line item of the shifts no project rule matches
+PROJECT_RULE_KEYS = ['name','pattern']
+
+def load_project_rules(rules_path):
+    """
+    Load project rules from a JSON file: a list of rules, or an object with a 'projects' list.
+
+    Parameters:
+    - rules_path (str): Path to the JSON file.
+
+    Returns:
+    - list: The checked rules, see check_project_rules.
+    """
+    with open(rules_path) as f:
+        rules = json.load(f)
+    if isinstance(rules,dict):
+        rules = rules.get('projects',[])
+    return check_project_rules(rules)
+
+def check_project_rules(rules):
+    """
+    Check project rules, e.g. the 'projects' list of a company in the config file.
+
+    Every rule has a 'name' and a 'pattern', a regular expression searched in the notes, case insensitive.
+    Optional keys are 'rate', the hourly rate of the project (the invoice pay rate by default), and
+    'description', the text of its line item (the name by default). A shift goes to the first rule whose
+    pattern its notes match.
+
+    Parameters:
+    - rules (list): The rules, as dictionaries.
+
+    Returns:
+    - list: The rules.
+    """
+    for rule in rules:
+        missing = [key for key in PROJECT_RULE_KEYS if key not in rule]
+        if missing:
+            raise ValueError(f"The project rule '{rule.get('name','')}' is missing the keys {missing}")
+        try:
+            re.compile(rule['pattern'])
+        except re.error as error:
+            raise ValueError(f"The pattern of the project rule '{rule['name']}' is invalid: {error}") from None
+        if 'rate' in rule and (not isinstance(rule['rate'],(int,float)) or rule['rate']<0):
+            raise ValueError(f"The rate of the project rule '{rule['name']}' must be a non-negative number")
+    return rules
+
+def assign_projects(notes,rules):
+    """
+    Assign shifts to projects from their notes.
+
+    Every distinct note is matched once against every rule, the result is broadcast back to the shifts.
+
+    Parameters:
+    - notes (array-like): The notes of the shifts, NaN for shifts without notes.
+    - rules (list): Project rules, see check_project_rules.
+
+    Returns:
+    - np.ndarray: Index in rules of the project of every shift, -1 for the shifts no rule matches.
+    """
+    codes,unique_notes = pd.factorize(pd.Series(notes,dtype=object).fillna(''))
+    if not rules or not len(unique_notes):
+        return np.full(len(codes),-1,dtype=np.int64)
+    unique_notes = pd.Series(unique_notes,dtype=object).astype(str)
+    matches = np.vstack([unique_notes.str.contains(rule['pattern'],case=False,regex=True).to_numpy(dtype=bool)
+                         for rule in rules])
+    # First matching rule of every distinct note
+    projects = np.where(matches.any(axis=0),matches.argmax(axis=0),-1)
+    return projects[codes]
+
+def get_line_items(shift_minutes,notes,rules,pay_rate,rounding_policy='exact',round_each_shift=False):
+    """
+    Group the shifts of an invoice into one line item per project and price them.
+
+    Parameters:
+    - shift_minutes (array-like): The minutes of every shift.
+    - notes (array-like): The notes of every shift.
+    - rules (list): Project rules, see check_project_rules. Without rules, all shifts are one line item.
+    - pay_rate (float): The hourly rate of the shifts no rule matches and of the projects without a rate.
+    - rounding_policy (str): How the billed time is rounded, a key of utils.duration_utils.ROUNDING_POLICIES. The
+      total of the invoice is rounded once and split over the line items (see split_rounded_minutes), so the
+      line items bill the same time as a single line would. Default is 'exact'.
+    - round_each_shift (bool): Whether to round every shift instead of the total of every line item. Default is False.
+
+    Returns:
+    - pd.DataFrame: One row per project with shifts, in the order of the rules, then the shifts no rule matches,
+      with the columns 'description', 'minutes' (billed), 'rate_minor' and 'amount_minor'. Without rules or
+      shifts, a single DEFAULT_LINE_DESCRIPTION row.
+    """
+    shift_minutes = np.asarray(shift_minutes,dtype=np.int64)
+    # Line 0 is the default line, line i+1 the project of rule i
+    lines = assign_projects(notes,rules)+1
+    n_lines = len(rules)+1
+    if round_each_shift:
+        shift_minutes = round_minutes(shift_minutes,rounding_policy)
+    minutes = np.bincount(lines,weights=shift_minutes,minlength=n_lines).astype(np.int64)
+    if not round_each_shift:
+        minutes = split_rounded_minutes(minutes,rounding_policy)
+    shift_counts = np.bincount(lines,minlength=n_lines)
+
+    descriptions = np.array([DEFAULT_LINE_DESCRIPTION]+[rule.get('description',rule['name']) for rule in rules],
+                            dtype=object)
+    rates_minor = to_minor_units(np.array([pay_rate]+[rule.get('rate',pay_rate) for rule in rules],dtype=float))
+    # Projects first, the default line last; lines without shifts are left out unless there is nothing else
+    order = np.r_[1:n_lines,0]
+    order = order[shift_counts[order]>0] if shift_counts.any() else np.array([0])
+    return pd.DataFrame({'description':descriptions[order],
+                         'minutes':minutes[order],
+                         'rate_minor':rates_minor[order],
+                         'amount_minor':get_amount_for_minutes(minutes[order],rates_minor[order])})
@@ -0,0 +1,195 @@
+from functools import lru_cache
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.duration_utils import convert_minor_units
+
+RATES_PATH = os.path.join(os.path.abspath(''),"exchange_rates.csv")
+RATE_DECIMALS = 6 # Rates are quoted, shown and applied with 6 decimals, as OANDA publishes them
+
+class ExchangeRateStore:
+    """
+    Daily or monthly exchange rates, indexed by currency pair and date.
+
+    Pairs are written 'GBP/USD' (units of USD per GBP). The rate of a date is the last one quoted on or before
+    it, found by binary search; the inverse pair and same-currency pairs are answered too. Monthly averages are
+    computed for all the months of a pair at once, on first use, and kept.
+    """
+
+    def __init__(self,rates):
+        """
+        Parameters:
+        - rates (pd.DataFrame): One row per quote, with the columns 'date', 'pair' and 'rate'.
+        """
+        rates = pd.DataFrame({'day':pd.to_datetime(rates['date']).to_numpy(dtype='datetime64[D]').astype(np.int64),
+                              'pair':rates['pair'].str.upper().str.replace(' ',''),
+                              'rate':rates['rate'].astype(float)})
+        if (rates['rate']<=0).any():
+            raise ValueError('Exchange rates must be positive')
+        self._quotes = {}
+        for pair,quotes in rates.sort_values(['pair','day'],kind='stable').groupby('pair',sort=False):
+            self._quotes[pair] = (quotes['day'].to_numpy(),quotes['rate'].to_numpy())
+        self._monthly_averages = {}
+
+    @classmethod
+    def from_csv(cls,file_path=None):
+        """
+        Load the rates of a CSV file with the columns 'date' (YYYY-MM-DD), 'pair' (e.g. 'GBP/USD') and 'rate'.
+
+        Parameters:
+        - file_path (str, optional): The CSV file. Defaults to RATES_PATH.
+
+        Returns:
+        - ExchangeRateStore: The rates.
+        """
+        return cls(pd.read_csv(file_path or RATES_PATH,dtype={'pair':str}))
+
+    @property
+    def pairs(self):
+        """
+        list: The quoted currency pairs.
+        """
+        return list(self._quotes)
+
+    def _get_quotes(self,pair):
+        """
+        Get the quote days and rates of a pair, and whether they have to be inverted.
+        """
+        pair = pair.upper().replace(' ','')
+        if pair in self._quotes:
+            return self._quotes[pair],False
+        base,quote = pair.split('/')
+        if f'{quote}/{base}' in self._quotes:
+            return self._quotes[f'{quote}/{base}'],True
+        raise ValueError(f"No exchange rates for {pair}, the rate store has {self.pairs}")
+
+    def get_rates(self,pair,dates):
+        """
+        Get the rates of a pair in force on some dates.
+
+        Parameters:
+        - pair (str): The currency pair, e.g. 'GBP/USD'.
+        - dates (array-like): The dates (anything pandas converts to dates).
+
+        Returns:
+        - np.ndarray: The rate of every date.
+        """
+        days = pd.to_datetime(np.atleast_1d(dates)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+        base,quote = pair.upper().replace(' ','').split('/')
+        if base == quote:
+            return np.ones(len(days))
+        (quote_days,rates),inverted = self._get_quotes(pair)
+        positions = np.searchsorted(quote_days,days,side='right')-1
+        if (positions<0).any():
+            raise ValueError(f'No {pair} rate on or before {pd.Timestamp(days[positions<0].min(),unit="D").date()}')
+        return 1/rates[positions] if inverted else rates[positions]
+
+    def get_rate(self,pair,date):
+        """
+        Get the rate of a pair in force on a date.
+
+        Parameters:
+        - pair (str): The currency pair, e.g. 'GBP/USD'.
+        - date (str or datetime-like): The date.
+
+        Returns:
+        - float: The rate.
+        """
+        return float(self.get_rates(pair,[date])[0])
+
+    def get_monthly_average(self,pair,year,month):
+        """
+        Get the average of the rates quoted for a pair during a month, rounded to RATE_DECIMALS.
+
+        Parameters:
+        - pair (str): The currency pair, e.g. 'GBP/USD'.
+        - year (int): The year.
+        - month (int): The month number.
+
+        Returns:
+        - float: The average rate.
+        """
+        return float(self.get_monthly_averages(pair,[year],[month])[0])
+
+    def get_monthly_averages(self,pair,years,months):
+        """
+        Get the average rates of a pair for several months at once.
+
+        Parameters:
+        - pair (str): The currency pair, e.g. 'GBP/USD'.
+        - years (array-like): The years.
+        - months (array-like): The month numbers.
+
+        Returns:
+        - np.ndarray: The average rate of every month, rounded to RATE_DECIMALS.
+        """
+        years = np.asarray(years,dtype=np.int64)
+        months = np.asarray(months,dtype=np.int64)
+        base,quote = pair.upper().replace(' ','').split('/')
+        if base == quote:
+            return np.ones(len(years))
+        (quote_days,rates),inverted = self._get_quotes(pair)
+        key = pair.upper().replace(' ','')
+        if key not in self._monthly_averages:
+            # Average every month of the pair in one pass: month numbers of the quotes, then bincount
+            month_keys = quote_days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+            unique_months,inverse = np.unique(month_keys,return_inverse=True)
+            quoted = 1/rates if inverted else rates
+            averages = np.bincount(inverse,weights=quoted)/np.bincount(inverse)
+            self._monthly_averages[key] = (unique_months,np.round(averages,RATE_DECIMALS))
+        unique_months,averages = self._monthly_averages[key]
+        month_keys = (years-1970)*12+months-1
+        positions = np.searchsorted(unique_months,month_keys)
+        missing = (positions>=len(unique_months)) | (unique_months[np.minimum(positions,len(unique_months)-1)]!=month_keys)
+        if missing.any():
+            raise ValueError(f'No {pair} rates quoted in {int(months[missing][0]):02d}/{int(years[missing][0])}')
+        return averages[positions]
+
+    def convert_monthly(self,amounts_minor,pairs,years,months,rounding_minor=1):
+        """
+        Convert amounts at the monthly average rates, e.g. all the invoices of a batch in one call.
+
+        Parameters:
+        - amounts_minor (array-like): The amounts, in minor units of the base currency of their pair.
+        - pairs (str or array-like): The currency pair of every amount, or one pair for all, e.g. 'GBP/USD'.
+        - years (array-like): The year of every amount.
+        - months (array-like): The month of every amount.
+        - rounding_minor (int): Round the results to a multiple of this many minor units. Default is 1.
+
+        Returns:
+        - np.ndarray: The converted amounts, in minor units of the quote currency of their pair.
+        """
+        amounts_minor = np.asarray(amounts_minor,dtype=np.int64)
+        pairs = np.broadcast_to(np.asarray(pairs,dtype=object),amounts_minor.shape)
+        years = np.broadcast_to(np.asarray(years,dtype=np.int64),amounts_minor.shape)
+        months = np.broadcast_to(np.asarray(months,dtype=np.int64),amounts_minor.shape)
+        rates = np.empty(amounts_minor.shape)
+        # One lookup per distinct pair, vectorized over its amounts
+        pair_codes,unique_pairs = pd.factorize(pairs.ravel())
+        pair_codes = pair_codes.reshape(amounts_minor.shape)
+        for code,pair in enumerate(unique_pairs):
+            selected = pair_codes==code
+            rates[selected] = self.get_monthly_averages(pair,years[selected],months[selected])
+        return np.asarray(convert_minor_units(amounts_minor,rates,rounding_minor))
+
+@lru_cache(maxsize=None)
+def _load_exchange_rate_store(file_path,modification_time):
+    return ExchangeRateStore.from_csv(file_path)
+
+def get_exchange_rate_store(file_path=None):
+    """
+    Get the rate store of a CSV file, loaded once and reloaded when the file changes.
+
+    Parameters:
+    - file_path (str, optional): The CSV file. Defaults to RATES_PATH.
+
+    Returns:
+    - ExchangeRateStore: The rates.
+    """
+    file_path = os.path.abspath(file_path or RATES_PATH)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"No exchange rate file at '{file_path}', pass the rate explicitly or create it "
+                                "(see exchange_rates.example.csv)")
+    return _load_exchange_rate_store(file_path,os.path.getmtime(file_path))
@@ -0,0 +1,305 @@
+import os
+import pickle
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_utils import expand_raw_files, parse_raw_file_name
+from utils.cache_utils import get_file_hash
+from utils.invoice_utils import RAW_DIRECTORY
+from utils.shift_utils import ShiftStore, extract_worked_hour_as_store
+
+NOTES_INDEX_PATH = os.path.join(os.path.abspath(''),".worklog_index","notes_index.pkl")
+NOTES_INDEX_VERSION = 2 # Bump whenever the tokens or the stored segments change, it rebuilds the index
+# Words, keeping ticket numbers and versions such as "ABC-123" or "v2.1" together
+NOTE_TOKEN_PATTERN = re.compile(r'\w+(?:[-./#]\w+)*')
+WORD_PATTERN = re.compile(r'\w+')
+COMBINING_MARK_PATTERN = re.compile('[\u0300-\u036f]')
+
+def normalize_text(text):
+    """
+    Normalize text for indexing and queries: case folded, without accents, e.g. "Réunion" -> "reunion".
+
+    Parameters:
+    - text (str): The text.
+
+    Returns:
+    - str: The normalized text.
+    """
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    return COMBINING_MARK_PATTERN.sub('',unicodedata.normalize('NFKD',text)).casefold()
+
+def get_note_tokens(note):
+    """
+    Get the distinct tokens of a note: its normalized words and compound tokens, and the words of the compounds,
+    e.g. "Fixed ABC-123" -> ('123', 'abc', 'abc-123', 'fixed').
+
+    Parameters:
+    - note (str): The note.
+
+    Returns:
+    - tuple: The tokens, sorted.
+    """
+    text = normalize_text(note)
+    # The words of the compounds are the words of the whole note
+    return tuple(sorted(set(NOTE_TOKEN_PATTERN.findall(text)).union(WORD_PATTERN.findall(text))))
+
+class NotesIndex:
+    """
+    Inverted index from the tokens of the notes to the shifts of every parsed raw data file.
+
+    Every file is a segment of the indexed shifts, kept with the hash of the file: updating the index only
+    parses the files that are new or changed since the last update. Tokens map to distinct notes and notes to
+    shifts, both as sorted arrays, so a query is a few binary searches and slices. The whole index, arrays
+    included, is persisted to NOTES_INDEX_PATH.
+
+        index = NotesIndex.load()
+        index.update()
+        index.save()
+        index.hours('abc-123')       # exact token
+        index.search('proj* review') # shifts with a token starting with "proj" and the token "review"
+
+    With a config registry, index.update(registry=registry) indexes the files of every person, each from their
+    own raw directory, and the shifts keep the id of their person.
+    """
+
+    def __init__(self):
+        # Segment by absolute raw file path: 'size', 'mtime', 'hash', 'company', 'person', 'month', 'year', and its rows
+        # 'start':'stop' of self.store
+        self.segments = {}
+        # Tokens by note, so notes seen before are not tokenized again
+        self.note_tokens = {}
+        self.store = ShiftStore.concat([])
+        self.companies = pd.Categorical([])
+        self.persons = pd.Categorical([])
+        self._build_index()
+
+    @classmethod
+    def load(cls,file_path=None):
+        """
+        Load a persisted index.
+
+        Parameters:
+        - file_path (str, optional): The index file. Defaults to NOTES_INDEX_PATH.
+
+        Returns:
+        - NotesIndex: The index, empty when there is no index file or it was written by another version.
+        """
+        try:
+            with open(file_path or NOTES_INDEX_PATH,'rb') as f:
+                state = pickle.load(f)
+        except (OSError,EOFError,pickle.UnpicklingError,AttributeError):
+            return cls()
+        if not isinstance(state,dict) or state.get('version')!=NOTES_INDEX_VERSION:
+            return cls()
+        return state['index']
+
+    def save(self,file_path=None):
+        """
+        Persist the index.
+
+        Parameters:
+        - file_path (str, optional): The index file. Defaults to NOTES_INDEX_PATH.
+        """
+        file_path = file_path or NOTES_INDEX_PATH
+        os.makedirs(os.path.dirname(file_path),exist_ok=True)
+        temporary_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(temporary_path,'wb') as f:
+            pickle.dump({'version':NOTES_INDEX_VERSION,'index':self},f,protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path,file_path)
+
+    def update(self,files=None,person='',registry=None,**kwargs):
+        """
+        Index the raw data files that are new or changed since the last update.
+
+        Parameters:
+        - files (str or list, optional): Glob pattern(s) or paths of '{company}_{MMYYYY}.csv' files. Defaults to
+          every CSV file of RAW_DIRECTORY. The files indexed before and deleted since are dropped, whether listed or not.
+        - person (str): The person whose shifts the files are, e.g. the initials of the employee. Default is ''.
+        - registry (utils.config_utils.ConfigRegistry, optional): Index the files of every person of the registry
+          instead, from their own raw directory (see ConfigRegistry.get_jobs).
+        - kwargs: Passed on to extract_worked_hour_as_df, e.g. cache=False.
+
+        Returns:
+        - int: The number of files parsed.
+        """
+        if registry is not None:
+            person_files = registry.get_jobs()
+        else:
+            person_files = [(person,file_path) for file_path in expand_raw_files(files or os.path.join(RAW_DIRECTORY,'*.csv'))]
+        new_stores = {}
+        for person,file_path in person_files:
+            file_name = os.path.abspath(file_path)
+            stat = os.stat(file_path)
+            segment = self.segments.get(file_name)
+            if (segment is not None and segment['person']==person
+                    and (segment['size'],segment['mtime'])==(stat.st_size,stat.st_mtime)):
+                continue
+            file_hash = get_file_hash(file_path)
+            if segment is not None and segment['person']==person and segment['hash']==file_hash:
+                segment.update(size=stat.st_size,mtime=stat.st_mtime)
+                continue
+            company_name,month,year = parse_raw_file_name(file_path)
+            new_stores[file_name] = extract_worked_hour_as_store(month,year,company_name,
+                                                                 raw_directory=os.path.dirname(file_name),**kwargs)
+            self.segments[file_name] = {'size':stat.st_size,'mtime':stat.st_mtime,'hash':file_hash,
+                                        'company':company_name,'person':person,'month':month,'year':year}
+        removed = [file_name for file_name in self.segments if not os.path.exists(file_name)]
+        for file_name in removed:
+            del self.segments[file_name]
+        if new_stores or removed:
+            self._rebuild(new_stores)
+        return len(new_stores)
+
+    def _rebuild(self,new_stores):
+        """
+        Drop the rows of the changed and deleted files, append the shifts of the new and changed ones, and index them.
+        """
+        kept = sorted((segment['start'],segment['stop'],file_name) for file_name,segment in self.segments.items()
+                      if file_name not in new_stores)
+        # The kept rows are selected in one pass, so the notes are merged once
+        kept_rows = np.concatenate([np.arange(start,stop) for start,stop,_ in kept]) if kept else np.zeros(0,dtype=np.int64)
+        stores = ([self.store[kept_rows]] if kept else [])+list(new_stores.values())
+        companies = [np.asarray(self.companies[kept_rows],dtype=object)]
+        persons = [np.asarray(self.persons[kept_rows],dtype=object)]
+        position = 0
+        for start,stop,file_name in kept:
+            self.segments[file_name].update(start=position,stop=position+stop-start)
+            position += stop-start
+        for file_name,store in new_stores.items():
+            self.segments[file_name].update(start=position,stop=position+len(store))
+            position += len(store)
+            companies.append(np.full(len(store),self.segments[file_name]['company'],dtype=object))
+            persons.append(np.full(len(store),self.segments[file_name]['person'],dtype=object))
+        self.store = ShiftStore.concat(stores)
+        self.store.notes = self.store.notes.remove_unused_categories()
+        self.companies = pd.Categorical(np.concatenate(companies))
+        self.persons = pd.Categorical(np.concatenate(persons))
+        self._build_index()
+
+    def _build_index(self):
+        """
+        Build the query arrays of the shifts in self.store.
+        """
+        notes = self.store.notes
+        self._notes = list(notes.categories)
+
+        # Shifts of every note: positions sorted by note, and where every note starts
+        note_codes = notes.codes.astype(np.int64)
+        with_note = np.flatnonzero(note_codes>=0)
+        self._shifts_by_note = with_note[np.argsort(note_codes[with_note],kind='stable')]
+        self._note_offsets = np.concatenate([[0],np.cumsum(np.bincount(note_codes[with_note],
+                                                                        minlength=len(self._notes)))])
+
+        # Notes of every token, tokens sorted so prefixes are ranges
+        note_tokens = {}
+        pair_tokens = []
+        pair_notes = []
+        for note_code,note in enumerate(self._notes):
+            tokens = self.note_tokens.get(note)
+            if tokens is None:
+                tokens = get_note_tokens(note)
+            note_tokens[note] = tokens
+            pair_tokens.extend(tokens)
+            pair_notes.extend([note_code]*len(tokens))
+        self.note_tokens = note_tokens
+        token_codes,tokens = pd.factorize(np.asarray(pair_tokens,dtype=object),sort=True)
+        self._tokens = np.asarray(tokens,dtype=str)
+        order = np.argsort(token_codes,kind='stable')
+        self._notes_by_token = np.asarray(pair_notes,dtype=np.int64)[order]
+        self._token_offsets = np.concatenate([[0],np.cumsum(np.bincount(token_codes,minlength=len(self._tokens)))])
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def tokens(self):
+        """
+        np.ndarray: Every indexed token, sorted.
+        """
+        return self._tokens
+
+    def _get_token_range(self,term):
+        """
+        Get the range of token codes matching a query term, a prefix when it ends with '*'.
+        """
+        prefix = term.endswith('*')
+        term = normalize_text(term.rstrip('*'))
+        first = np.searchsorted(self._tokens,term,side='left')
+        if prefix:
+            # Every token starting with the prefix sorts before the prefix followed by the highest character
+            last = np.searchsorted(self._tokens,term+'\U0010ffff',side='left')
+        else:
+            last = first+int(first<len(self._tokens) and self._tokens[first]==term)
+        return first,last
+
+    def _get_notes(self,term):
+        """
+        Get the sorted codes of the notes matching a query term.
+        """
+        first,last = self._get_token_range(term)
+        return np.unique(self._notes_by_token[self._token_offsets[first]:self._token_offsets[last]])
+
+    def search_positions(self,query,start=None,end=None,companies=None,persons=None):
+        """
+        Get the positions of the shifts whose notes match a query.
+
+        Parameters:
+        - query (str): Terms separated by spaces, all of which must match. A term ending with '*' matches every
+          token starting with it, e.g. "proj*"; a term with several words, e.g. "ABC-123", matches the compound.
+        - start (str or datetime-like, optional): First date included.
+        - end (str or datetime-like, optional): Last date included.
+        - companies (list, optional): Company names to include.
+        - persons (list, optional): Person ids to include.
+
+        Returns:
+        - np.ndarray: Sorted positions in self.store.
+        """
+        terms = query.split()
+        if not terms or not len(self._tokens):
+            return np.zeros(0,dtype=np.int64)
+        note_codes = self._get_notes(terms[0])
+        for term in terms[1:]:
+            note_codes = np.intersect1d(note_codes,self._get_notes(term),assume_unique=True)
+        # Gather the slices of the matching notes in one go
+        starts = self._note_offsets[note_codes]
+        lengths = self._note_offsets[note_codes+1]-starts
+        gathered = np.arange(lengths.sum())+np.repeat(starts-(np.cumsum(lengths)-lengths),lengths)
+        positions = np.sort(self._shifts_by_note[gathered])
+        keep = np.ones(len(positions),dtype=bool)
+        if start is not None:
+            keep &= self.store.days[positions]>=pd.Timestamp(start).to_datetime64().astype('datetime64[D]').astype(np.int64)
+        if end is not None:
+            keep &= self.store.days[positions]<=pd.Timestamp(end).to_datetime64().astype('datetime64[D]').astype(np.int64)
+        if companies is not None:
+            keep &= np.isin(np.asarray(self.companies[positions],dtype=object),list(companies))
+        if persons is not None:
+            keep &= np.isin(np.asarray(self.persons[positions],dtype=object),list(persons))
+        return positions[keep]
+
+    def search(self,query,start=None,end=None,companies=None,persons=None):
+        """
+        Get the shifts whose notes match a query, see search_positions.
+
+        Returns:
+        - pd.DataFrame: The matching shifts, as returned by extract_worked_hour_as_df, plus their 'Company' and 'Person'.
+        """
+        positions = self.search_positions(query,start,end,companies,persons)
+        df = self.store[positions].to_frame()
+        df['Company'] = np.asarray(self.companies[positions],dtype=object)
+        df['Person'] = np.asarray(self.persons[positions],dtype=object)
+        return df
+
+    def hours(self,query,start=None,end=None,companies=None,persons=None):
+        """
+        Get the hours worked in the shifts whose notes match a query, see search_positions.
+
+        Returns:
+        - float: The hours.
+        """
+        positions = self.search_positions(query,start,end,companies,persons)
+        return float(self.store.minutes[positions].sum(dtype=np.int64))/60
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from utils.invoice_utils import (HHMM_STRINGS, MINUTES_PER_DAY, extract_worked_hour_as_df, get_hours_from_minutes,
+                                 get_total_hours_from_minutes)
+
+class ShiftStore:
+    """
+    Compact columnar representation of worked shifts.
+
+    Every shift is stored as its day number (days since 1970-01-01) and its begin and end times in minutes since
+    the midnight of that day, all int32; shifts that end after midnight have an end above 24*60. Notes and
+    pauses are categorical, so repeated strings are stored once. Times are only formatted as "HH:MM" when a
+    frame is rendered with to_frame.
+    """
+
+    def __init__(self,days,begin_minutes,end_minutes,notes,pauses=None):
+        """
+        Parameters:
+        - days (array-like): Day numbers of the shifts, in days since 1970-01-01.
+        - begin_minutes (array-like): Begin times in minutes since the midnight of the day.
+        - end_minutes (array-like): End times in minutes since the midnight of the day.
+        - notes (array-like): Notes of the shifts, NaN for shifts without notes.
+        - pauses (array-like, optional): Pauses of the shifts as exported, e.g. "0m".
+        """
+        self.days = np.asarray(days,dtype=np.int32)
+        self.begin_minutes = np.asarray(begin_minutes,dtype=np.int32)
+        self.end_minutes = np.asarray(end_minutes,dtype=np.int32)
+        self.notes = pd.Categorical(notes)
+        self.pauses = pd.Categorical(['0m']*len(self.days) if pauses is None else pauses)
+
+    @classmethod
+    def from_frame(cls,df):
+        """
+        Build a store from a worklog DataFrame with 'Begin' and 'End' as datetimes, as returned by
+        extract_worked_hour_as_df(..., drop_date_from_beginning_end=False).
+
+        Parameters:
+        - df (pd.DataFrame): The worklog.
+
+        Returns:
+        - ShiftStore: The shifts of the worklog.
+        """
+        dates = df['Date'].to_numpy(dtype='datetime64[D]')
+        days = dates.astype(np.int64)
+        begin_minutes = (df['Begin'].to_numpy(dtype='datetime64[m]')-dates).astype(np.int64)
+        end_minutes = (df['End'].to_numpy(dtype='datetime64[m]')-dates).astype(np.int64)
+        return cls(days,begin_minutes,end_minutes,df['Notes'],df['Pause'])
+
+    @classmethod
+    def concat(cls,stores):
+        """
+        Concatenate several stores into one.
+
+        Parameters:
+        - stores (list): The ShiftStore objects.
+
+        Returns:
+        - ShiftStore: The shifts of all stores, in order.
+        """
+        stores = list(stores)
+        if not stores:
+            return cls([],[],[],[])
+        return cls(np.concatenate([store.days for store in stores]),
+                   np.concatenate([store.begin_minutes for store in stores]),
+                   np.concatenate([store.end_minutes for store in stores]),
+                   pd.api.types.union_categoricals([store.notes for store in stores]),
+                   pd.api.types.union_categoricals([store.pauses for store in stores]))
+
+    def __len__(self):
+        return len(self.days)
+
+    def __getitem__(self,index):
+        """
+        Select shifts with a slice, a boolean mask or an array of positions.
+        """
+        return ShiftStore(self.days[index],self.begin_minutes[index],self.end_minutes[index],
+                          self.notes[index],self.pauses[index])
+
+    @property
+    def minutes(self):
+        """
+        np.ndarray: The minutes worked in every shift.
+        """
+        return self.end_minutes-self.begin_minutes
+
+    @property
+    def nbytes(self):
+        """
+        int: Approximate memory used by the store, in bytes.
+        """
+        return (self.days.nbytes+self.begin_minutes.nbytes+self.end_minutes.nbytes
+                +self.notes.codes.nbytes+self.pauses.codes.nbytes
+                +sum(len(category) for category in self.notes.categories)
+                +sum(len(category) for category in self.pauses.categories))
+
+    def dates(self):
+        """
+        Get the dates of the shifts.
+
+        Returns:
+        - np.ndarray: datetime64[us] array with the dates at midnight.
+        """
+        return self.days.astype('datetime64[D]').astype('datetime64[us]')
+
+    def begin_datetimes(self):
+        """
+        Get the begin of the shifts as datetimes.
+
+        Returns:
+        - np.ndarray: datetime64[us] array.
+        """
+        return self.dates()+self.begin_minutes.astype('timedelta64[m]')
+
+    def end_datetimes(self):
+        """
+        Get the end of the shifts as datetimes.
+
+        Returns:
+        - np.ndarray: datetime64[us] array.
+        """
+        return self.dates()+self.end_minutes.astype('timedelta64[m]')
+
+    def total_hours(self):
+        """
+        Get the total hours worked in all shifts.
+
+        Returns:
+        - str: The total hours worked in "HH:MM" format.
+        """
+        return get_total_hours_from_minutes(int(self.minutes.sum(dtype=np.int64)))
+
+    def to_frame(self,drop_date_from_beginning_end=True):
+        """
+        Render the shifts as a worklog DataFrame, the same as returned by extract_worked_hour_as_df.
+
+        Parameters:
+        - drop_date_from_beginning_end (bool): Whether to render 'Begin' and 'End' as "HH:MM" strings instead of datetimes. Default is True.
+
+        Returns:
+        - pd.DataFrame: DataFrame with the columns 'Date', 'Begin', 'End', 'Hours', 'Pause' and 'Notes'.
+        """
+        if drop_date_from_beginning_end:
+            begin = HHMM_STRINGS[self.begin_minutes]
+            end = HHMM_STRINGS[self.end_minutes%MINUTES_PER_DAY]
+        else:
+            begin = self.begin_datetimes()
+            end = self.end_datetimes()
+        return pd.DataFrame({'Date':self.dates(),
+                             'Begin':begin,
+                             'End':end,
+                             'Hours':get_hours_from_minutes(self.minutes),
+                             'Pause':np.asarray(self.pauses),
+                             'Notes':np.asarray(self.notes)})
+
+def extract_worked_hour_as_store(month,year,company_name,**kwargs):
+    """
+    Extract the worked hours of a month as a ShiftStore.
+
+    Parameters:
+    - month (int or str): The month for which data is to be extracted.
+    - year (int): The year for which data is to be extracted.
+    - company_name (str): The name of the company, used in the filename.
+    - kwargs: Passed on to extract_worked_hour_as_df.
+
+    Returns:
+    - ShiftStore: The shifts of the month.
+    """
+    df,_ = extract_worked_hour_as_df(month,year,company_name,drop_date_from_beginning_end=False,**kwargs)
+    return ShiftStore.from_frame(df)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from utils.invoice_utils import (WORKLOG_COLUMNS, convert_shift_times, get_datetimes_from_components, get_file_language,
+                                 get_month_and_day_from_dates, get_total_hours_from_minutes, is_summary_row)
+
+STREAM_CHUNK_SIZE = 100_000
+
+def iter_worked_hours_by_month(file_path,year,chunksize=STREAM_CHUNK_SIZE):
+    """
+    Walk a worklog export in fixed-size chunks and yield the worked hours of every month it contains.
+
+    Exports list the newest shift first and their dates carry no year, so the year is decremented each time
+    the month number goes up from one row to the next (e.g. from a January shift to a December one).
+    Total/summary rows are skipped wherever they appear. Only the current chunk and the month being
+    collected are held in memory, whatever the size of the file.
+
+    Parameters:
+    - file_path (str): Path to the CSV file exported by the worklog app.
+    - year (int): The year of the newest (first) shift in the file.
+    - chunksize (int): Number of CSV rows read at a time. Default is STREAM_CHUNK_SIZE.
+
+    Yields:
+    - tuple: (year (int), month (int), df (pd.DataFrame), total_hours (str)), newest month first. df has the
+      same columns as parse_worked_hour_file, with 'Begin' and 'End' as datetimes.
+    """
+    file_language = None
+    current_year = year
+    previous_month = None
+    pending_key = None
+    pending_frames = []
+    pending_minutes = 0
+
+    with pd.read_csv(file_path,chunksize=chunksize,dtype=str) as reader:
+        for chunk in reader:
+            if file_language is None:
+                file_language = get_file_language(chunk.columns)
+            chunk.columns = WORKLOG_COLUMNS
+            chunk = chunk[~is_summary_row(chunk)].copy()
+            if chunk.empty:
+                continue
+
+            # Years of the rows, carrying the year and month of the previous chunk over
+            months,days = get_month_and_day_from_dates(chunk['Date'],file_language)
+            previous_months = np.concatenate([[months[0] if previous_month is None else previous_month],months[:-1]])
+            years = current_year-np.cumsum(months>previous_months)
+            current_year,previous_month = int(years[-1]),int(months[-1])
+
+            chunk['Date'] = pd.Series(get_datetimes_from_components(years,months,days),index=chunk.index)
+            hour_minutes = convert_shift_times(chunk)
+
+            # Split the chunk into runs of the same month
+            keys = years*12+(months-1)
+            boundaries = np.flatnonzero(np.diff(keys))+1
+            for start,end in zip(np.r_[0,boundaries],np.r_[boundaries,len(chunk)]):
+                if keys[start]!=pending_key:
+                    if pending_frames:
+                        yield _build_month(pending_key,pending_frames,pending_minutes)
+                    pending_key,pending_frames,pending_minutes = keys[start],[],0
+                pending_frames.append(chunk.iloc[start:end])
+                pending_minutes += int(hour_minutes[start:end].sum())
+
+    if pending_frames:
+        yield _build_month(pending_key,pending_frames,pending_minutes)
+
+def _build_month(key,frames,total_minutes):
+    """
+    Assemble the collected chunks of one month into the tuple yielded by iter_worked_hours_by_month.
+    """
+    df = pd.concat(frames).reset_index(drop=True)
+    return int(key//12),int(key%12)+1,df,get_total_hours_from_minutes(total_minutes)
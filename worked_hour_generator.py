@@ -1,31 +1,12 @@
+from utils.config_utils import load_registry
 from utils.invoice_utils import generate_and_save_pdf, extract_worked_hour_as_df
 
-company_data = {'name':'CompanyName',
-                'street':'Building Street',
-                'street_cont':'123 Street',
-                'city':'Company city',
-                'postcode':'12345'}
-
-employee_data = {'name':"My Name",
-                 'initials': "MyInitials",
-                 'position':"My position",
-                 'email':"myemail@company.com",
-                 # Address:
-                 'street':"My Street 123",
-                 'city':"MyCity",
-                 'state':"MyState",
-                 'postcode':"12345",
-                 'country':"My Country",
-                 'phone':"+123 456 789",
-                 # Bank details:
-                 'bank_name':"My Bank",
-                 'bank_address':"1234 Bank Street, Bank State, Country, Zip code",
-                 'holder_name':"Holder Name",
-                 'swift':"ABCDEF12",
-                 'routing_nb':"123456789",
-                 'account_nb':'12345679012'}
+registry = load_registry('config.json') # People and companies, config.example.json until config.json is created
+company_data = registry.get_company('CompanyName')
+employee_data = registry.get_person() # The only person, or registry.get_person('MyInitials')
 
 month = 6
 year = 2022
-df,total_hours =extract_worked_hour_as_df(month,year,company_data['name'])
-generate_and_save_pdf(df,month,year,total_hours,company_data,employee_data)
\ No newline at end of file
+df,total_hours =extract_worked_hour_as_df(month,year,company_data['name'],
+                                          raw_directory=registry.get_raw_directory(employee_data['id']))
+generate_and_save_pdf(df,month,year,total_hours,company_data,employee_data)
@@ -0,0 +1,124 @@
+"""
+Command line entry point to generate hour reports and invoices from the worklog exports in 0-RawData.
+
+Examples:
+    python worklog.py hours --month 6 --year 2022 --company CompanyName --config config.example.json
+    python worklog.py invoice --month 6 --year 2022 --company CompanyName --rate 1 --gbp-to-usd 1.232204 --config config.example.json
+    python worklog.py invoice --month 6 --year 2022 --company CompanyName --rate 1 --rates exchange_rates.example.csv --config config.example.json
+    python worklog.py batch --config people.toml --rate 1 --gbp-to-usd 1.232204
+"""
+import argparse
+import sys
+
+# Same names as utils.duration_utils.ROUNDING_POLICIES, repeated so --help does not import the pipeline
+ROUNDING_POLICIES = ['exact','floor_hour','nearest_hour','ceil_hour','floor_quarter','nearest_quarter','ceil_quarter']
+OVERLAP_POLICIES = ['warn','error','merge'] # utils.overlap_utils.OVERLAP_POLICIES
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.splitlines()[3:]))
+    subparsers = parser.add_subparsers(dest='command',required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--month',type=int,required=True)
+    common.add_argument('--year',type=int,required=True)
+    common.add_argument('--company',required=True,help='Company name, as in 0-RawData/{company}_{MMYYYY}.csv')
+    common.add_argument('--config',default='config.json',help='JSON or TOML file with the people and company details (default: config.json, else config.example.json)')
+    common.add_argument('--person',help='Id of the person in the config (default: the only person)')
+    common.add_argument('--rounding',choices=ROUNDING_POLICIES,default='floor_hour',
+                        help='How the billed hours are rounded (default: floor_hour, whole hours only)')
+    common.add_argument('--overlaps',choices=OVERLAP_POLICIES,
+                        help='Check for duplicated and overlapping shifts before the totals: warn, fail, or merge them')
+    common.add_argument('--report-date',metavar='YYYY-MM-DD',
+                        help='Date of the document (default: today), pinned dates give reproducible PDFs')
+    common.add_argument('--profile',nargs='?',const='',metavar='JSON',
+                        help='Print the time, rows and peak memory of every stage, and save them to JSON if given')
+
+    subparsers.add_parser('hours',parents=[common],help='Generate the hour report')
+    invoice_parser = subparsers.add_parser('invoice',parents=[common],help='Generate the invoice')
+    invoice_parser.add_argument('--rate',type=float,help="Hourly rate in GBP (default: the person's 'pay_rate' in the config)")
+    invoice_parser.add_argument('--gbp-to-usd',type=float,
+                                help='GBP to USD exchange rate (default: the monthly average in --rates)')
+    invoice_parser.add_argument('--rates',help='Exchange rate CSV file (default: exchange_rates.csv)')
+    invoice_parser.add_argument('--projects',metavar='JSON',
+                                help="Project rules for per-project line items (default: the company's 'projects' in the config)")
+
+    batch_parser = subparsers.add_parser('batch',help='Generate every document of every person, company and month')
+    batch_parser.add_argument('--config',default='config.json',help='JSON or TOML file with the people and company details (default: config.json, else config.example.json)')
+    batch_parser.add_argument('--person',action='append',help='Only this person, can be repeated (default: everyone)')
+    batch_parser.add_argument('--company',action='append',help='Only this company, can be repeated (default: every company)')
+    batch_parser.add_argument('--month',type=int,help='Only this month (with --year)')
+    batch_parser.add_argument('--year',type=int,help='Only this year, or month with --month')
+    batch_parser.add_argument('--rate',type=float,help="Hourly rate in GBP of the people without a 'pay_rate'")
+    batch_parser.add_argument('--gbp-to-usd',type=float,
+                              help='GBP to USD exchange rate (default: the monthly average in --rates)')
+    batch_parser.add_argument('--rates',help='Exchange rate CSV file (default: exchange_rates.csv)')
+    batch_parser.add_argument('--overlaps',choices=OVERLAP_POLICIES,
+                              help='Check for duplicated and overlapping shifts before the totals: warn, fail, or merge them')
+    batch_parser.add_argument('--report-date',metavar='YYYY-MM-DD',
+                              help='Date of the documents (default: today), pinned dates give reproducible PDFs')
+    batch_parser.add_argument('--skip-unchanged',action='store_true',
+                              help='Skip the documents whose raw file, config, rates and code did not change since they were generated')
+    batch_parser.add_argument('--workers',type=int,help='Number of worker processes (default: the number of CPUs)')
+    args = parser.parse_args(argv)
+    if args.command == 'batch' and args.month is not None and args.year is None:
+        parser.error('--month needs --year')
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Imported after parsing the arguments, so --help and argument errors return immediately
+    from utils.config_utils import load_registry
+    from utils.profiling_utils import Profiler
+    registry = load_registry(args.config)
+    if args.command == 'batch':
+        return run_batch_command(args,registry)
+    employee_data = registry.get_person(args.person)
+    company_data = registry.get_company(args.company)
+
+    raw_directory = registry.get_raw_directory(employee_data['id'])
+
+    if args.profile is None:
+        run_command(args,company_data,employee_data,raw_directory)
+        return 0
+    with Profiler() as profiler:
+        run_command(args,company_data,employee_data,raw_directory)
+    print(profiler.summary())
+    if args.profile:
+        profiler.to_json(args.profile)
+    return 0
+
+def run_command(args,company_data,employee_data,raw_directory=None):
+    if args.command == 'hours':
+        from utils.invoice_utils import extract_worked_hour_as_df, generate_and_save_pdf
+        df,total_hours = extract_worked_hour_as_df(args.month,args.year,company_data['name'],raw_directory=raw_directory,
+                                                   overlaps=args.overlaps)
+        generate_and_save_pdf(df,args.month,args.year,total_hours,company_data,employee_data,
+                              rounding_policy=args.rounding,report_date=args.report_date)
+    elif args.command == 'invoice':
+        from utils.invoice_utils import generate_invoice
+        from utils.project_utils import load_project_rules
+        projects = load_project_rules(args.projects) if args.projects else None
+        pay_rate = args.rate if args.rate is not None else employee_data.get('pay_rate')
+        if pay_rate is None:
+            raise SystemExit(f"No hourly rate: give --rate or a 'pay_rate' to '{employee_data['id']}' in the config")
+        generate_invoice(args.month,args.year,args.gbp_to_usd,pay_rate,company_data,employee_data,
+                         raw_directory=raw_directory,rounding_policy=args.rounding,rates_path=args.rates,
+                         overlaps=args.overlaps,projects=projects,report_date=args.report_date)
+
+def run_batch_command(args,registry):
+    from utils.batch_utils import print_batch_summary, run_registry_batch
+    periods = None
+    if args.year is not None:
+        periods = [(args.month,args.year)] if args.month is not None else [(month,args.year) for month in range(1,13)]
+    results = run_registry_batch(registry,args.rate,args.gbp_to_usd,person_ids=args.person,company_names=args.company,
+                                 periods=periods,max_workers=args.workers,rates_path=args.rates,overlaps=args.overlaps,
+                                 report_date=args.report_date,skip_unchanged=args.skip_unchanged)
+    print_batch_summary(results)
+    # Non-zero exit status when any job failed, so scripts and CI notice
+    return 1 if any(result['error'] is not None for result in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())